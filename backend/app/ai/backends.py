@@ -0,0 +1,162 @@
+import inspect
+import os
+import re
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from app.ai.batching import as_label_list
+from app.core.config import settings
+from app.core.logging import logger
+
+# Values accepted in the registry's "backend" field
+TORCH = "torch"
+ONNX = "onnx"
+ONNX_INT8 = "onnx-int8"
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return shifted / shifted.sum(axis=-1, keepdims=True)
+
+
+def sigmoid(logits: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-logits))
+
+
+def label_scores(scores: np.ndarray, labels: list[str], top_k: int = 1) -> list[list[dict]]:
+    """Per-row [{label, score}] sorted by score, like the text-classification pipeline"""
+    order = np.argsort(-scores, axis=-1)
+    if top_k is not None:
+        order = order[:, :top_k]
+    return [
+        [{"label": labels[j], "score": float(row[j])} for j in row_order]
+        for row, row_order in zip(scores, order)
+    ]
+
+
+class TransformersBackend:
+    """fp32 PyTorch through a transformers text-classification pipeline"""
+
+    name = TORCH
+
+    def __init__(self, model: str, top_k: int = 1):
+        from transformers import pipeline
+
+        self.pipeline = pipeline("text-classification", model=model, top_k=top_k)
+
+    def __call__(self, texts, **kwargs):
+        outputs = self.pipeline(list(texts), batch_size=len(texts), truncation=True)
+        return [as_label_list(o) for o in outputs]
+
+
+def export_onnx(model: str, out_dir: str, quantize: bool = True) -> str:
+    """
+    Export ``model`` to ONNX (and a dynamically int8-quantized copy) once.
+
+    Files are written to a temporary name and renamed, so concurrent workers
+    never load a half-written graph. Returns the path to load.
+    """
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    fp32 = out / "model.onnx"
+    int8 = out / "model.int8.onnx"
+
+    if not fp32.exists():
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        network = AutoModelForSequenceClassification.from_pretrained(model).eval()
+        encoded = AutoTokenizer.from_pretrained(model)(["export"], return_tensors="pt")
+        # Graph inputs follow forward()'s parameter order, so name them in that order
+        sample = {
+            name: encoded[name]
+            for name in inspect.signature(network.forward).parameters
+            if name in encoded
+        }
+        tmp = tempfile.NamedTemporaryFile(dir=out, suffix=".onnx", delete=False).name
+        with torch.no_grad():
+            torch.onnx.export(
+                network,
+                (sample,),
+                tmp,
+                input_names=list(sample),
+                output_names=["logits"],
+                dynamic_axes={name: {0: "batch", 1: "sequence"} for name in sample} | {"logits": {0: "batch"}},
+                opset_version=17,
+                dynamo=False,
+            )
+        os.replace(tmp, fp32)
+
+    if not quantize:
+        return str(fp32)
+
+    if not int8.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        tmp = tempfile.NamedTemporaryFile(dir=out, suffix=".onnx", delete=False).name
+        quantize_dynamic(str(fp32), tmp, weight_type=QuantType.QInt8)
+        os.replace(tmp, int8)
+    return str(int8)
+
+
+class OnnxBackend:
+    """ONNX Runtime on CPU, optionally with int8 dynamically-quantized weights"""
+
+    def __init__(self, model: str, quantize: bool = True, top_k: int = 1, cache_dir: str = None):
+        import onnxruntime as ort
+        from transformers import AutoConfig, AutoTokenizer
+
+        self.name = ONNX_INT8 if quantize else ONNX
+        self.top_k = top_k
+        self.tokenizer = AutoTokenizer.from_pretrained(model)
+
+        config = AutoConfig.from_pretrained(model)
+        self.labels = [config.id2label[i] for i in range(config.num_labels)]
+        # Same rule the pipeline uses to pick its output activation
+        self.multi_label = config.problem_type == "multi_label_classification" or config.num_labels == 1
+
+        slug = re.sub(r"[^A-Za-z0-9_.-]", "_", model)
+        path = export_onnx(model, os.path.join(cache_dir or settings.ONNX_CACHE_DIR, slug), quantize)
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = settings.ONNX_INTRA_OP_THREADS
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def __call__(self, texts, **kwargs):
+        encoded = self.tokenizer(list(texts), padding=True, truncation=True, return_tensors="np")
+        feeds = {k: v.astype(np.int64) for k, v in encoded.items() if k in self.input_names}
+        logits = self.session.run(None, feeds)[0]
+        scores = sigmoid(logits) if self.multi_label else softmax(logits)
+        return label_scores(scores, self.labels, self.top_k)
+
+
+def build_backend(model: str, backend: str = TORCH, top_k: int = 1):
+    if backend in (ONNX, ONNX_INT8):
+        try:
+            return OnnxBackend(model, quantize=backend == ONNX_INT8, top_k=top_k)
+        except ImportError as e:
+            logger.error(f"ONNX backend unavailable for {model}, using PyTorch: {e}")
+    elif backend != TORCH:
+        raise ValueError(f"Unknown inference backend {backend!r}")
+    return TransformersBackend(model, top_k=top_k)
+
+
+def compare_backends(reference, candidate, texts) -> dict:
+    """Score ``texts`` with both backends: worst per-label score gap and top-1 agreement"""
+    expected = reference(texts)
+    actual = candidate(texts)
+
+    max_abs_diff = 0.0
+    agree = 0
+    for want, got in zip(expected, actual):
+        got_scores = {r["label"]: r["score"] for r in got}
+        for r in want:
+            if r["label"] in got_scores:
+                max_abs_diff = max(max_abs_diff, abs(r["score"] - got_scores[r["label"]]))
+            else:
+                max_abs_diff = max(max_abs_diff, 1.0)
+        agree += want[0]["label"] == got[0]["label"]
+    return {"max_abs_diff": max_abs_diff, "top1_agreement": agree / max(len(texts), 1)}
@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+from queue import Queue, Empty
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import inference_batch_size, inference_queue_wait_seconds
+
+
+def as_label_list(output):
+    """Normalize one pipeline output to a list of {label, score} dicts"""
+    if isinstance(output, dict):
+        return [output]
+    return list(output)
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-item calls into dynamic batches.
+
+    A batch is dispatched when it reaches ``max_batch_size`` or when the
+    oldest queued item has waited ``max_wait_ms``. ``predict`` receives a
+    list of inputs and must return one result per input, in order.
+
+    The items of one ``map`` are queued together and never wait for each
+    other. The wait is only worth it while requests are on their way, so
+    a batch goes out as soon as it holds every request submitted so far:
+    under the prefork pool, where a process runs one task at a time, no
+    call ever waits.
+    """
+
+    def __init__(self, predict, name: str, max_batch_size: int = None, max_wait_ms: int = None):
+        self.predict = predict
+        self.name = name
+        self.max_batch_size = max_batch_size or settings.INFERENCE_MAX_BATCH_SIZE
+        self.max_wait = (
+            max_wait_ms if max_wait_ms is not None else settings.INFERENCE_MAX_WAIT_MS
+        ) / 1000
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        # Requests submitted but not yet taken into a batch
+        self._pending = 0
+
+    def submit(self, item) -> Future:
+        return self._submit([item])[0]
+
+    def __call__(self, item):
+        return self.map([item])[0]
+
+    def map(self, items):
+        futures = self._submit(items)
+        return [f.result() for f in futures]
+
+    def _submit(self, items) -> list[Future]:
+        # One queue entry per request, so the dispatcher sees all of it at once
+        enqueued = time.perf_counter()
+        request = [(item, Future(), enqueued) for item in items]
+        if request:
+            queue = self._ensure_started()
+            with self._lock:
+                self._pending += 1
+            queue.put(request)
+        return [future for _, future, _ in request]
+
+    def _take(self, request):
+        with self._lock:
+            self._pending -= 1
+        return request
+
+    def _ensure_started(self) -> Queue:
+        # Prefork workers inherit the parent's state but not its threads,
+        # so each process lazily starts its own dispatcher.
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._queue = Queue()
+                    self._thread = threading.Thread(
+                        target=self._run,
+                        args=(self._queue,),
+                        name=f"batcher-{self.name}",
+                        daemon=True,
+                    )
+                    self._pending = 0
+                    self._thread.start()
+                    self._pid = pid
+        return self._queue
+
+    def _collect(self, queue: Queue, carry: list):
+        """The next batch, and the items of a split request left for the one after"""
+        batch = carry or self._take(queue.get())
+        deadline = batch[0][2] + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0 and self._pending:
+                    batch = batch + self._take(queue.get(timeout=remaining))
+                else:
+                    # Nothing on its way, or past the deadline: still take
+                    # whatever is already queued.
+                    batch = batch + self._take(queue.get_nowait())
+            except Empty:
+                break
+        return batch[:self.max_batch_size], batch[self.max_batch_size:]
+
+    def _run(self, queue: Queue):
+        carry = []
+        while True:
+            batch, carry = self._collect(queue, carry)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        started = time.perf_counter()
+        inference_batch_size.labels(model=self.name).observe(len(batch))
+        for _, _, enqueued in batch:
+            inference_queue_wait_seconds.labels(model=self.name).observe(started - enqueued)
+
+        try:
+            results = self.predict([item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"{self.name} returned {len(results)} results for {len(batch)} inputs"
+                )
+        except Exception as e:
+            logger.error(f"Batched inference failed for {self.name}: {e}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
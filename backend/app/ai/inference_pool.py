@@ -0,0 +1,173 @@
+import importlib
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import inference_pool_seconds, inference_pool_timeouts_total
+
+
+def cores() -> int:
+    """CPUs this process may run on (the container's cpuset, not the host's)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def configure_threads(threads: int):
+    """Cap torch and onnxruntime intra-op threads; call before models load"""
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    if not settings.ONNX_INTRA_OP_THREADS:
+        settings.ONNX_INTRA_OP_THREADS = threads
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _start_child(threads: int, modules: tuple):
+    from app.ai.loader import models, register_all
+
+    configure_threads(threads)
+    register_all()
+    models.preload()
+    models.warm_up()
+    models.start_heartbeat()
+    # Import what submitted functions live in now, not inside the first call
+    for module in modules:
+        importlib.import_module(module)
+
+
+def _ready() -> int:
+    time.sleep(0.01)  # let idle children take the other probes
+    return os.getpid()
+
+
+class InferencePool:
+    """
+    Runs an item's text, image and video inference side by side.
+
+    With ``INFERENCE_POOL_WORKERS`` set, ``submit`` hands work to a process
+    pool whose children load and warm the models once at start, each capped
+    at its share of the cores so the pool never oversubscribes them. Without
+    it, work runs inline in the caller and behaves exactly as a direct call.
+    ``result`` waits for a future until its modality's deadline
+    (``INFERENCE_TIMEOUTS``, counted from submission) and returns
+    ``fallback`` on timeout or if the pool broke; a timed-out call is
+    abandoned, not interrupted.
+
+    Children are spawned, not forked: a worker that has already run
+    inference holds thread pools that don't survive fork. Stage metrics
+    and spans recorded inside children are not exported;
+    ``inference_pool_seconds`` times each call as the caller sees it.
+    """
+
+    def __init__(
+        self,
+        workers: int = None,
+        threads: int = None,
+        start_method: str = None,
+        modules: tuple = ("app.services.moderation_service",),
+    ):
+        self._workers = workers
+        self._threads = threads
+        self._start_method = start_method
+        self.modules = modules
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def workers(self) -> int:
+        return settings.INFERENCE_POOL_WORKERS if self._workers is None else self._workers
+
+    @property
+    def threads(self) -> int:
+        threads = settings.INFERENCE_POOL_THREADS if self._threads is None else self._threads
+        return threads or max(1, cores() // max(self.workers, 1))
+
+    def start(self):
+        """Spawn the children and wait until each has warmed its models"""
+        if not self.workers:
+            return
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            start = time.perf_counter()
+            executor = ProcessPoolExecutor(
+                self.workers,
+                mp_context=multiprocessing.get_context(self._start_method or settings.INFERENCE_POOL_START_METHOD),
+                initializer=_start_child,
+                initargs=(self.threads, self.modules),
+            )
+            # Probe until every child has answered, i.e. finished its initializer
+            ready = set()
+            while len(ready) < self.workers:
+                ready.update(f.result() for f in [executor.submit(_ready) for _ in range(self.workers)])
+            self._executor = executor
+            self._pid = pid
+            logger.info(
+                f"Inference pool ready: {self.workers} processes x {self.threads} threads "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+
+    def submit(self, modality: str, fn, *args) -> Future:
+        if not self.workers:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        self.start()
+        submitted = time.perf_counter()
+        future = self._executor.submit(fn, *args)
+        future.submitted = submitted
+        future.add_done_callback(
+            lambda f: inference_pool_seconds.labels(modality=modality).observe(time.perf_counter() - submitted)
+        )
+        return future
+
+    def result(self, future: Future, modality: str, fallback=None):
+        timeout = None
+        if not future.done():
+            limit = settings.INFERENCE_TIMEOUTS.get(modality)
+            if limit is not None:
+                timeout = max(future.submitted + limit - time.perf_counter(), 0)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            inference_pool_timeouts_total.labels(modality=modality).inc()
+            logger.error(f"{modality} inference timed out after {settings.INFERENCE_TIMEOUTS[modality]}s")
+            return fallback
+        except BrokenProcessPool as e:
+            self._reset(e)
+            return fallback
+
+    def _reset(self, error):
+        logger.error(f"Inference pool broke, restarting it on next use: {error}")
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._pid = None
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            self._pid = None
+
+
+inference_pool = InferencePool()
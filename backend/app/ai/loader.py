@@ -0,0 +1,181 @@
+import gc
+import json
+import os
+import socket
+import threading
+import time
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import model_load_seconds, model_warmup_seconds
+
+
+class ModelLoader:
+    """
+    Loads each registered model once per process, on first use or up front.
+
+    Calling ``preload`` in a parent process before it forks (the Celery
+    master, or a preloading uvicorn/gunicorn master) means children inherit
+    the weights and share their pages copy-on-write instead of loading a
+    copy each; ``freeze`` keeps the garbage collector from dirtying them.
+    ``warm_up`` runs one inference per model so the first request doesn't
+    pay for lazy initialisation, and ``ready`` reports when that is done.
+    ``start_heartbeat`` publishes that state to Redis under a TTL so the
+    API, which holds no worker models, can report it from /health/ready.
+    """
+
+    def __init__(self):
+        self._specs = {}
+        self._models = {}
+        self._warm = set()
+        self._lock = threading.Lock()
+        self._heartbeat = None
+        self.errors = {}
+
+    def register(self, name: str, load, warmup=None):
+        self._specs[name] = (load, warmup)
+
+    def get(self, name: str):
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    model = self._load(name)
+        return model
+
+    def _load(self, name: str):
+        load, _ = self._specs[name]
+        start = time.perf_counter()
+        model = load()
+        elapsed = time.perf_counter() - start
+        model_load_seconds.labels(model=name).set(elapsed)
+        logger.info(f"Loaded model {name} in {elapsed:.2f}s")
+        self._models[name] = model
+        return model
+
+    def names(self, names=None) -> list[str]:
+        wanted = settings.MODEL_PRELOAD if names is None else names
+        return [n for n in wanted if n in self._specs]
+
+    def preload(self, names=None):
+        for name in self.names(names):
+            try:
+                self.get(name)
+            except Exception as e:
+                self.errors[name] = str(e)
+                logger.error(f"Preloading model {name} failed: {e}")
+
+    def warm_up(self, names=None):
+        for name in self.names(names):
+            _, warmup = self._specs[name]
+            try:
+                model = self.get(name)
+                start = time.perf_counter()
+                if warmup is not None:
+                    warmup(model)
+                model_warmup_seconds.labels(model=name).set(time.perf_counter() - start)
+                self._warm.add(name)
+                self.errors.pop(name, None)
+            except Exception as e:
+                self.errors[name] = str(e)
+                logger.error(f"Warming up model {name} failed: {e}")
+
+    @staticmethod
+    def freeze():
+        """Move everything loaded so far out of the GC's reach (call right before forking)"""
+        gc.collect()
+        gc.freeze()
+
+    def forget(self):
+        """Drop per-process warm-up state in a freshly forked child"""
+        self._warm = set()
+        self._lock = threading.Lock()
+        self._heartbeat = None
+
+    @property
+    def ready(self) -> bool:
+        return self.warmed()
+
+    def warmed(self, names=None) -> bool:
+        """Whether ``names`` (default MODEL_PRELOAD) are all warmed up"""
+        return all(name in self._warm for name in self.names(names))
+
+    def status(self, names=None) -> dict:
+        return {
+            name: "ready" if name in self._warm
+            else "error" if name in self.errors
+            else "loaded" if name in self._models
+            else "pending"
+            for name in self.names(names)
+        }
+
+    def heartbeat(self, redis_client, names=None):
+        """Publish this process's warm state, expiring unless it is published again"""
+        state = {"ready": self.warmed(names), "models": self.status(names)}
+        redis_client.set(heartbeat_key(), json.dumps(state), ex=settings.MODEL_HEARTBEAT_TTL_SECONDS)
+
+    def start_heartbeat(self, names=None, redis_client=None):
+        """Keep publishing warm state from a daemon thread until ``stop_heartbeat``"""
+        if redis_client is None:
+            import redis
+            redis_client = redis.Redis.from_url(settings.REDIS_URL)
+        stopped = threading.Event()
+        self._heartbeat = (redis_client, stopped)
+
+        def run():
+            while not stopped.is_set():
+                try:
+                    self.heartbeat(redis_client, names)
+                except Exception as e:
+                    logger.warning(f"Publishing model warm state failed: {e}")
+                stopped.wait(settings.MODEL_HEARTBEAT_SECONDS)
+        threading.Thread(target=run, name="model-heartbeat", daemon=True).start()
+
+    def stop_heartbeat(self):
+        """Stop publishing and withdraw this process's warm state"""
+        if self._heartbeat is None:
+            return
+        redis_client, stopped = self._heartbeat
+        self._heartbeat = None
+        stopped.set()
+        try:
+            redis_client.delete(heartbeat_key())
+        except Exception as e:
+            logger.warning(f"Withdrawing model warm state failed: {e}")
+
+    def start_background(self, names=None):
+        """Preload and warm up off the event loop; /health reports progress"""
+        def run():
+            register_all()
+            self.preload(names)
+            self.warm_up(names)
+        threading.Thread(target=run, name="model-loader", daemon=True).start()
+
+
+models = ModelLoader()
+
+HEARTBEAT_PREFIX = "models:warm:"
+
+
+def heartbeat_key() -> str:
+    return f"{HEARTBEAT_PREFIX}{socket.gethostname()}:{os.getpid()}"
+
+
+def worker_warm_state(redis_client) -> dict:
+    """Warm state of every process whose heartbeat hasn't expired, by host:pid"""
+    state = {}
+    for key in redis_client.scan_iter(match=f"{HEARTBEAT_PREFIX}*"):
+        raw = redis_client.get(key)
+        if raw is not None:
+            key = key.decode() if isinstance(key, bytes) else key
+            state[key[len(HEARTBEAT_PREFIX):]] = json.loads(raw)
+    return state
+
+
+def register_all():
+    """Import the modules that register models with ``models``"""
+    import app.ai.model_registry  # noqa: F401
+    import app.ai.nlp.language_detect  # noqa: F401
+    import app.ai.nlp.toxicity_multilingual  # noqa: F401
+    import app.ai.vision.nsfw  # noqa: F401
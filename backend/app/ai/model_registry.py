@@ -1,16 +1,274 @@
-try:
-	from transformers import pipeline
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
 
-	toxicity_model = pipeline("text-classification", model="unitary/toxic-bert")
-except Exception:
-	# Fallback stub used in test environments where transformers/torch
-	# are not installed or GPU is unavailable. The stub returns a
-	# non-toxic prediction so unit tests and lightweight runs succeed.
-	def toxicity_model(text):
-		return [{"label": "NOT_TOXIC", "score": 0.0}]
+from app.ai.backends import build_backend, TORCH, ONNX_INT8
+from app.ai.batching import MicroBatcher
+from app.ai.loader import models
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import (
+	model_routing_swaps_total,
+	model_shadow_comparisons_total,
+	model_shadow_dropped_total,
+	model_shadow_score_delta,
+)
 
 TOXICITY_MODEL_V1 = "toxicity_v1.1"
 TOXICITY_MODEL_V2 = "toxicity_v1.2"
 
-ACTIVE_TOXICITY_MODEL = TOXICITY_MODEL_V1
-CANARY_TOXICITY_MODEL = TOXICITY_MODEL_V2
+# Weights and inference backend behind each version.
+# settings.TOXICITY_BACKENDS overrides the backend per version.
+TOXICITY_MODELS = {
+	TOXICITY_MODEL_V1: {"model": "unitary/toxic-bert", "backend": TORCH},
+	TOXICITY_MODEL_V2: {"model": "unitary/toxic-bert", "backend": ONNX_INT8},
+}
+
+
+def _stub_toxicity_model(texts, **kwargs):
+	return [[{"label": "NOT_TOXIC", "score": 0.0}] for _ in texts]
+
+
+def backend_for(version: str) -> str:
+	return settings.TOXICITY_BACKENDS.get(version, TOXICITY_MODELS[version]["backend"])
+
+
+def _loader(version: str):
+	def load():
+		spec = TOXICITY_MODELS[version]
+		try:
+			return build_backend(spec["model"], backend_for(version))
+		except Exception as e:
+			# Fallback stub used in test environments where transformers/torch
+			# are not installed or GPU is unavailable. The stub returns a
+			# non-toxic prediction so unit tests and lightweight runs succeed.
+			logger.warning(f"Toxicity model {version} unavailable, using stub: {e}")
+			return _stub_toxicity_model
+	return load
+
+
+def _predictor(version: str):
+	def predict(texts):
+		return models.get(version)(texts)
+	return predict
+
+
+@dataclass(frozen=True)
+class Routing:
+	active: str
+	canary: str = None
+	canary_percent: int = 0
+	shadow: str = None
+
+	def versions(self) -> set:
+		return {v for v in (self.active, self.canary, self.shadow) if v}
+
+
+def bucket(key: str) -> int:
+	"""Stable 0-99 bucket for a routing key (content hash or text)"""
+	return int(hashlib.sha256(key.encode()).hexdigest()[:8], 16) % 100
+
+
+class ModelRegistry:
+	"""
+	Versioned toxicity classifiers behind an atomically swapped routing table.
+
+	The routing (active, canary share, shadow) is one immutable object that is
+	replaced in a single assignment, so a request sees either the old or the
+	new table, never a mix. The table lives in Redis so every API and worker
+	process picks up a change within ``MODEL_ROUTING_REFRESH_SECONDS``; a
+	process warms any new version in the background before switching to it.
+	Canary routing is sticky: the same key always lands on the same version.
+	"""
+
+	REDIS_KEY = "model_registry:routing"
+
+	def __init__(self, routing: Routing, redis_client=None):
+		self.routing = routing
+		self._redis = redis_client
+		self._batchers = {}
+		self._refreshed_at = 0.0
+		self._swapping = None
+		self._lock = threading.Lock()
+		self._shadow_pool = None
+		self._shadow_pending = 0
+		self._pid = None
+		for version in TOXICITY_MODELS:
+			self._add(version)
+
+	@property
+	def redis(self):
+		if self._redis is None:
+			import redis
+			self._redis = redis.Redis.from_url(
+				settings.REDIS_URL, socket_timeout=0.05, socket_connect_timeout=0.05
+			)
+		return self._redis
+
+	def _add(self, version: str):
+		models.register(version, _loader(version), warmup=lambda backend: backend(["warm up"]))
+		self._batchers[version] = MicroBatcher(_predictor(version), name=version)
+
+	def register(self, version: str, model: str, backend: str = TORCH):
+		TOXICITY_MODELS[version] = {"model": model, "backend": backend}
+		self._add(version)
+
+	@property
+	def versions(self) -> list[str]:
+		return list(self._batchers)
+
+	@property
+	def active(self) -> str:
+		self.refresh()
+		return self.routing.active
+
+	def route(self, key: str) -> str:
+		self.refresh()
+		routing = self.routing
+		if routing.canary and bucket(key) < routing.canary_percent:
+			return routing.canary
+		return routing.active
+
+	def classify(self, texts, version: str = None):
+		return self._batchers[version or self.active].map(texts)
+
+	def classify_one(self, text: str, version: str = None):
+		return self._batchers[version or self.active](text)
+
+	# Routing changes
+
+	def validate(self, routing: Routing):
+		unknown = routing.versions() - set(self._batchers)
+		if unknown:
+			raise ValueError(f"Unknown model versions: {sorted(unknown)}")
+		if not 0 <= routing.canary_percent <= 100:
+			raise ValueError("canary_percent must be between 0 and 100")
+
+	def publish(self, routing: Routing, warm: bool = True):
+		"""
+		Store a new routing table for every process and switch this one to it.
+
+		With ``warm`` the versions it needs are loaded and warmed here first.
+		The API passes False: it runs no inference, and each worker warms the
+		new versions itself before following the change.
+		"""
+		self.validate(routing)
+		self.redis.set(self.REDIS_KEY, json.dumps(asdict(routing)))
+		if warm:
+			self.swap(routing, wait=True)
+			return
+		with self._lock:
+			self.routing = routing
+			self._swapping = None
+
+	def swap(self, routing: Routing, wait: bool = False):
+		"""Warm the versions ``routing`` needs, then make it current"""
+		if routing == self.routing or routing == self._swapping:
+			return
+		self._swapping = routing
+
+		def run():
+			new = list(routing.versions() - self.routing.versions())
+			models.preload(new)
+			models.warm_up(new)
+			with self._lock:
+				if self._swapping == routing:
+					self.routing = routing
+					self._swapping = None
+			model_routing_swaps_total.inc()
+			logger.info(f"Model routing switched to {routing}")
+
+		if wait:
+			run()
+		else:
+			threading.Thread(target=run, name="model-swap", daemon=True).start()
+
+	def refresh(self, force: bool = False):
+		now = time.monotonic()
+		if not force and now - self._refreshed_at < settings.MODEL_ROUTING_REFRESH_SECONDS:
+			return
+		self._refreshed_at = now
+		try:
+			raw = self.redis.get(self.REDIS_KEY)
+		except Exception as e:
+			logger.warning(f"Model routing unavailable, keeping {self.routing}: {e}")
+			return
+		if raw is None:
+			return
+		try:
+			routing = Routing(**json.loads(raw))
+			self.validate(routing)
+		except (TypeError, ValueError) as e:
+			logger.error(f"Ignoring invalid model routing {raw!r}: {e}")
+			return
+		self.swap(routing)
+
+	# Shadow scoring
+
+	def shadow(self, texts, results, versions):
+		"""Score ``texts`` with the shadow version off the request path and record disagreement"""
+		candidate = self.routing.shadow
+		if not candidate or not texts:
+			return
+		pool = self._ensure_shadow_pool()
+		with self._lock:
+			if self._shadow_pending >= settings.MODEL_SHADOW_MAX_PENDING:
+				model_shadow_dropped_total.inc(len(texts))
+				return
+			self._shadow_pending += 1
+		pool.submit(self._compare, candidate, list(texts), results, versions)
+
+	def _ensure_shadow_pool(self):
+		# Threads don't survive fork; one pool per process
+		pid = os.getpid()
+		if self._pid != pid:
+			with self._lock:
+				if self._pid != pid:
+					self._shadow_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+					self._shadow_pending = 0
+					self._pid = pid
+		return self._shadow_pool
+
+	def _compare(self, candidate, texts, results, versions):
+		from app.ai.pipelines.decision_engine import decide_text
+		try:
+			shadow_results = self.classify(texts, candidate)
+			for primary, shadow, version in zip(results, shadow_results, versions):
+				if version == candidate:
+					continue
+				agree = decide_text(primary)[0] == decide_text(shadow)[0]
+				model_shadow_comparisons_total.labels(
+					candidate=candidate, outcome="agree" if agree else "disagree"
+				).inc()
+				model_shadow_score_delta.labels(candidate=candidate).observe(
+					abs(_top_score(primary) - _top_score(shadow))
+				)
+		except Exception as e:
+			logger.error(f"Shadow scoring with {candidate} failed: {e}")
+		finally:
+			with self._lock:
+				self._shadow_pending -= 1
+
+
+def _top_score(results) -> float:
+	return max((r["score"] for r in results), default=0.0)
+
+
+registry = ModelRegistry(Routing(
+	active=settings.MODEL_ACTIVE,
+	canary=settings.MODEL_CANARY,
+	canary_percent=settings.MODEL_CANARY_PERCENT,
+	shadow=settings.MODEL_SHADOW,
+))
+
+
+def classify_toxicity(text: str, version: str = None):
+	return registry.classify_one(text, version)
+
+
+def classify_toxicity_batch(texts, version: str = None):
+	return registry.classify(texts, version)
@@ -0,0 +1,101 @@
+from collections import deque
+
+
+class KeywordAutomaton:
+    """
+    Aho–Corasick automaton over a list of literal keywords.
+
+    Finds every occurrence of every keyword in one left-to-right pass, so
+    the cost depends on the text length, not on how many keywords there
+    are. Matching is case-insensitive; with ``whole_words`` a match must
+    not start or end inside a longer word. Each keyword maps to a value
+    (its kind, list name, ...) returned with the match.
+    """
+
+    def __init__(self, keywords=(), whole_words: bool = True):
+        self.whole_words = whole_words
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self.size = 0
+
+        if isinstance(keywords, dict):
+            keywords = keywords.items()
+        else:
+            keywords = ((k, k) for k in keywords)
+        for keyword, value in keywords:
+            self._add(keyword.lower(), value)
+        self._link()
+
+    def _add(self, keyword: str, value):
+        if not keyword:
+            return
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._out[state] = self._out[state] + ((len(keyword), value),)
+        self.size += 1
+
+    def _link(self):
+        # Breadth-first: a state's failure link is the longest proper suffix
+        # that is also a prefix, and it inherits that state's outputs.
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                if self._fail[nxt] == nxt:
+                    self._fail[nxt] = 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def __len__(self):
+        return self.size
+
+    def finditer(self, text: str):
+        """Yield ``(start, end, value)`` for every keyword occurrence"""
+        if not self.size:
+            return
+        goto, fail, out = self._goto, self._fail, self._out
+        lowered = text.lower()
+        # str.lower() can change the length (e.g. "İ"); offsets must index ``text``
+        if len(lowered) != len(text):
+            lowered = "".join(ch.lower()[:1] or ch for ch in text)
+        whole_words = self.whole_words
+        end = len(text)
+
+        state = 0
+        for i, ch in enumerate(lowered):
+            nxt = goto[state].get(ch)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto[state].get(ch)
+            state = nxt or 0
+            if not out[state]:
+                continue
+            for length, value in out[state]:
+                start = i + 1 - length
+                if whole_words and (
+                    (start > 0 and _is_word(text[start - 1]) and _is_word(text[start]))
+                    or (i + 1 < end and _is_word(text[i + 1]) and _is_word(text[i]))
+                ):
+                    continue
+                yield start, i + 1, value
+
+    def search(self, text: str):
+        """First match or None"""
+        return next(self.finditer(text), None)
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
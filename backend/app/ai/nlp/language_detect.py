@@ -1,12 +1,243 @@
-try:
-    from langdetect import detect
-
-    def detect_language(text: str) -> str:
-        try:
-            return detect(text)
-        except Exception:
-            return "unknown"
-except Exception:
-    # Fallback stub for environments without langdetect
-    def detect_language(text: str) -> str:
-        return "unknown"
+"""
+Character n-gram language identification.
+
+A naive Bayes model over the 1-3 character n-grams of each word, built
+from langdetect's Wikipedia language profiles (Apache-2.0) by
+``python -m app.ai.nlp.language_detect build <langdetect/profiles>``.
+Unlike langdetect it does not sample, so the same text always gets the
+same answer, and a batch is scored with one numpy reduction.
+Chinese, Japanese and Korean are recognised by their scripts.
+"""
+import argparse
+import gzip
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+
+import numpy as np
+
+from app.ai.loader import models
+from app.core.config import settings
+from app.services.verdict_cache import LRUCache, content_hash
+
+PROFILES = os.path.join(os.path.dirname(__file__), "data", "langid_profiles.json.gz")
+UNKNOWN = "unknown"
+
+_kana = re.compile(r"[\u3040-\u30ff]")
+_cjk = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+_han_or_hangul = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+_hangul = re.compile(r"[\uac00-\ud7af]")
+
+
+def _translation_table() -> dict:
+    """Map every non-letter in the BMP to a space and fold the same characters langdetect does"""
+    table = {}
+    for code in range(0x10000):
+        ch = chr(code)
+        if not (ch.isalpha() or unicodedata.category(ch).startswith("M")):
+            table[code] = " "
+    table.update({
+        0x0219: "\u015f",  # Romanian s/t with comma -> cedilla
+        0x021b: "\u0163",
+        0x06cc: "\u064a",  # Farsi yeh -> Arabic yeh
+    })
+    # Vietnamese letters with tone marks share one symbol in the profiles
+    table.update({code: "\u1ec3" for code in range(0x1ea0, 0x1f00)})
+    return table
+
+
+def word_ngrams(word: str) -> list[str]:
+    padded = f" {word} "
+    return (
+        list(word)
+        + [padded[i:i + 2] for i in range(len(padded) - 1)]
+        + [padded[i:i + 3] for i in range(len(padded) - 2)]
+    )
+
+
+class LanguageIdentifier:
+    """
+    Scores texts against every language at once.
+
+    ``identify`` returns ``(language, confidence)`` per text, where the
+    confidence is the top language's posterior probability. Per-word
+    score vectors are memoised, since comment vocabulary repeats heavily.
+    """
+
+    # Every character contributes to about three n-grams; tempering by this
+    # keeps correlated n-grams from making the posterior overconfident.
+    TEMPERATURE = 3.0
+    MAX_CACHED_WORDS = 200_000
+
+    def __init__(self, path: str = PROFILES):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        self.languages = data["languages"]
+        grams = data["ngrams"]
+        self.index = {gram: i for i, gram in enumerate(grams)}
+
+        # log P(n-gram | language); n-grams a language's profile pruned away
+        # get half of that profile's smallest probability for their length
+        weights = np.empty((len(grams), len(self.languages)), dtype=np.float32)
+        floors = np.array(data["floors"], dtype=np.float32)  # [language, n]
+        lengths = np.array([len(g) - 1 for g in grams])
+        weights[:] = floors[:, lengths].T
+        for i, gram in enumerate(grams):
+            for lang, logp in data["ngrams"][gram]:
+                weights[i, lang] = logp
+        self.weights = weights
+
+        self.table = _translation_table()
+        self._words = {}
+        self._lock = threading.Lock()
+
+    def normalize(self, text: str) -> str:
+        return unicodedata.normalize("NFC", text).lower().translate(self.table)
+
+    def _word_scores(self, word: str) -> np.ndarray:
+        scores = self._words.get(word)
+        if scores is None:
+            ids = [i for i in map(self.index.get, word_ngrams(word)) if i is not None]
+            scores = self.weights[ids].sum(axis=0) if ids else np.zeros(len(self.languages), np.float32)
+            if len(self._words) >= self.MAX_CACHED_WORDS:
+                with self._lock:
+                    self._words = {}
+            self._words[word] = scores
+        return scores
+
+    def scores(self, texts) -> np.ndarray:
+        """Log-likelihood of each text under each language, shape (len(texts), languages)"""
+        words = {}
+        positions = []
+        offsets = []
+        for text in texts:
+            offsets.append(len(positions))
+            for word in self.normalize(text).split():
+                i = words.get(word)
+                if i is None:
+                    i = words[word] = len(words)
+                positions.append(i)
+
+        totals = np.zeros((len(offsets), len(self.languages)), dtype=np.float32)
+        if not positions:
+            return totals
+        per_word = np.stack([self._word_scores(w) for w in words])
+        ends = offsets[1:] + [len(positions)]
+        nonempty = [i for i, (start, end) in enumerate(zip(offsets, ends)) if end > start]
+        totals[nonempty] = np.add.reduceat(per_word[positions], [offsets[i] for i in nonempty])
+        return totals
+
+    def identify(self, texts) -> list[tuple[str, float]]:
+        texts = list(texts)
+        results = [None] * len(texts)
+        scored = []
+        for i, text in enumerate(texts):
+            script = _by_script(text)
+            if script is not None:
+                results[i] = (script, 1.0)
+            else:
+                scored.append(i)
+
+        if scored:
+            totals = self.scores([texts[i] for i in scored]) / self.TEMPERATURE
+            totals -= totals.max(axis=1, keepdims=True)
+            posterior = np.exp(totals)
+            posterior /= posterior.sum(axis=1, keepdims=True)
+            best = posterior.argmax(axis=1)
+            for i, lang, confidence, row in zip(scored, best, posterior.max(axis=1), totals):
+                # No known n-gram at all: every language scored the same
+                if not row.any():
+                    results[i] = (UNKNOWN, 0.0)
+                else:
+                    results[i] = (self.languages[lang], float(confidence))
+        return results
+
+
+def _by_script(text: str):
+    """ja/ko/zh when most letters are CJK, else None"""
+    if not _cjk.search(text):
+        return None
+    letters = sum(1 for ch in text if ch.isalpha())
+    if len(_cjk.findall(text)) * 2 < letters:
+        return None
+    if _kana.search(text):
+        return "ja"
+    if len(_hangul.findall(text)) * 2 >= len(_han_or_hangul.findall(text)):
+        return "ko"
+    return "zh"
+
+
+models.register("langid", LanguageIdentifier, warmup=lambda model: model.identify(["warm up"]))
+
+_cache = LRUCache(max_size=settings.LANGID_CACHE_SIZE, ttl=settings.LANGID_CACHE_TTL_SECONDS)
+
+
+def detect_languages(texts, min_confidence: float = None) -> list[str]:
+    """
+    Language code per text; ``"unknown"`` when the top language's posterior
+    is below ``min_confidence`` (LANGID_MIN_CONFIDENCE by default), so
+    ambiguous short texts go to the multilingual model.
+    """
+    threshold = settings.LANGID_MIN_CONFIDENCE if min_confidence is None else min_confidence
+    keys = [content_hash(text) for text in texts]
+    found = {}
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key in found or key in missing:
+            continue
+        cached = _cache.get(key)
+        if cached is None:
+            missing[key] = text
+        else:
+            found[key] = cached
+
+    if missing:
+        identified = models.get("langid").identify(missing.values())
+        for key, result in zip(missing, identified):
+            _cache.set(key, result)
+            found[key] = result
+
+    return [lang if confidence >= threshold else UNKNOWN for lang, confidence in (found[k] for k in keys)]
+
+
+def detect_language(text: str) -> str:
+    return detect_languages([text])[0]
+
+
+def build_profiles(profile_dir: str, out: str = PROFILES, min_count: int = 0):
+    """Fold langdetect's case-sensitive profiles into this module's format"""
+    languages, floors, counts = [], [], {}
+    for name in sorted(os.listdir(profile_dir)):
+        if name.startswith(("ja", "ko", "zh")):
+            continue  # recognised by script
+        with open(os.path.join(profile_dir, name), encoding="utf-8") as f:
+            profile = json.load(f)
+        lang = len(languages)
+        languages.append(profile["name"])
+        folded = {}
+        for gram, count in profile["freq"].items():
+            gram = gram.lower()
+            if gram.strip() and len(gram) <= 3 and count > min_count:
+                folded[gram] = folded.get(gram, 0) + count
+        totals = profile["n_words"]
+        smallest = [min((c for g, c in folded.items() if len(g) == n), default=1) for n in (1, 2, 3)]
+        floors.append([round(math.log(smallest[n] / 2 / totals[n]), 3) for n in range(3)])
+        for gram, count in folded.items():
+            counts.setdefault(gram, []).append([lang, round(math.log(count / totals[len(gram) - 1]), 3)])
+
+    table = {"languages": languages, "floors": floors, "ngrams": counts}
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with gzip.open(out, "wt", encoding="utf-8") as f:
+        json.dump(table, f, ensure_ascii=False, separators=(",", ":"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the language identification profiles")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("profile_dir", help="langdetect's profiles directory")
+    parser.add_argument("--min-count", type=int, default=0, help="drop rarer n-grams to shrink the model")
+    args = parser.parse_args()
+    build_profiles(args.profile_dir, min_count=args.min_count)
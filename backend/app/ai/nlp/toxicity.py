@@ -15,17 +15,36 @@
 #                 'score': item['score']})
 #
 #     return flagged
-from app.ai.model_registry import ACTIVE_TOXICITY_MODEL
+from app.ai.model_registry import registry
+from app.ai.pipelines.canary_router import select_model_for
+from app.core.tracing import stage
 
-def analyze_text(text: str):
-    model_version = select_model()
 
-    if model_version == "toxicity_v1.2":
-        results = new_classifier(text)
-    else:
-        results = old_classifier(text)
+def analyze_text(text: str, version: str = None):
+    """Score one text; pass ``version`` for items with media, whose route covers it too"""
+    model_version = version or select_model_for(text)
+    results = registry.classify_one(text, model_version)
+    registry.shadow([text], [results], [model_version])
 
     return {
         "results": results,
         "model_version": model_version
-    }
\ No newline at end of file
+    }
+
+def analyze_texts(texts: list[str], versions: list[str] = None):
+    """Score texts with their routed versions, one batched pass per version"""
+    versions = versions or [select_model_for(t) for t in texts]
+
+    results = [None] * len(texts)
+    for version in set(versions):
+        positions = [i for i, v in enumerate(versions) if v == version]
+        with stage("text_model", modality="text", model_version=version):
+            scored = registry.classify([texts[i] for i in positions], version)
+        for i, r in zip(positions, scored):
+            results[i] = r
+    registry.shadow(texts, results, versions)
+
+    return {
+        "results": results,
+        "model_versions": versions
+    }
@@ -1,23 +1,39 @@
+from app.ai.backends import build_backend, TORCH
+from app.ai.batching import MicroBatcher
+from app.ai.loader import models
+from app.core.config import settings
+
+MODEL_NAME = "xlm-roberta-base"
+# Recorded as model_version on verdicts scored by this model
+MODEL_VERSION = "xlm-roberta-base-toxic-v1"
+
 try:
-    from transformers import pipeline
+    import transformers  # noqa: F401
+
+    def _load():
+        # top_k=None keeps every label's score, like return_all_scores=True
+        return build_backend(MODEL_NAME, settings.TOXICITY_BACKENDS.get(MODEL_NAME, TORCH), top_k=None)
 
-    _model = None
+    models.register(MODEL_NAME, _load, warmup=lambda backend: backend(["warm up"]))
 
     def get_model():
-        global _model
-        if _model is None:
-            _model = pipeline(
-                "text-classification",
-                model="xlm-roberta-base",
-                return_all_scores=True,
-            )
-        return _model
-
-
-    def analyze_text_multilingual(text: str):
-        model = get_model()
-        return model(text)
+        return models.get(MODEL_NAME)
+
+
+    def _predict(texts):
+        return get_model()(texts)
 except Exception:
     # Fallback stub for environments without transformers
-    def analyze_text_multilingual(text: str):
-        return [{"label": "NOT_TOXIC", "score": 0.0}]
+    def _predict(texts):
+        return [[{"label": "NOT_TOXIC", "score": 0.0}] for _ in texts]
+
+
+_batcher = MicroBatcher(_predict, name=MODEL_NAME)
+
+
+def analyze_text_multilingual(text: str):
+    return _batcher(text)
+
+
+def analyze_texts_multilingual(texts):
+    return _batcher.map(texts)
@@ -1,12 +1,12 @@
-import random
-from app.ai.model_registry import (
-    ACTIVE_TOXICITY_MODEL,
-    CANARY_TOXICITY_MODEL
-)
-
-CANARY_PERCENTAGE = 10  # 10%
-
-def select_model():
-    if random.randint(1, 100) <= CANARY_PERCENTAGE:
-        return CANARY_TOXICITY_MODEL
-    return ACTIVE_TOXICITY_MODEL
+from app.ai.model_registry import registry
+from app.services.verdict_cache import content_hash
+
+
+def select_model(key: str) -> str:
+    """Version for ``key``; the same key always gets the same version"""
+    return registry.route(key)
+
+
+def select_model_for(text: str = None, image_url: str = None, video_url: str = None) -> str:
+    """Version for a content item, routed by the content hash its verdict is cached under"""
+    return registry.route(content_hash(text, image_url, video_url))
@@ -1,10 +1,11 @@
-def decide_text(results):
-    model_version = "xlm-roberta-base-toxic-v1"
+from app.services.policy_service import DEFAULT, policy_engine
 
-    decision = (
-        "blocked"
-        if any(r["score"] > 0.85 for r in results)
-        else "approved"
+
+def decide_text(results, model_version=None, source_app=None):
+    """Decide text-model results alone under ``source_app``'s policy (the default one if None)"""
+    decision = policy_engine.decide(
+        source_app or DEFAULT,
+        [{"modality": "text", "results": results, "failed": False}],
     )
 
     return decision, model_version
@@ -1,16 +1,159 @@
+import numpy as np
+
+from app.ai.loader import models
+from app.core.config import settings
+from app.core.tracing import stage
+
+
+def decode_image(image) -> np.ndarray:
+    """Return an RGB uint8 array for an array, encoded bytes or a file path"""
+    if isinstance(image, np.ndarray):
+        mat = image
+    else:
+        import cv2
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            mat = cv2.imdecode(np.frombuffer(image, np.uint8), cv2.IMREAD_COLOR)
+        else:
+            mat = cv2.imread(str(image), cv2.IMREAD_COLOR)
+        if mat is None:
+            raise ValueError("Could not decode image")
+        mat = mat[..., ::-1]  # OpenCV decodes to BGR
+
+    if mat.ndim == 2:
+        mat = np.repeat(mat[..., None], 3, axis=2)
+    return mat[..., :3]
+
+
+def letterbox_batch(images, size: int) -> np.ndarray:
+    """
+    Pad each image bottom/right to a square, resize to ``size`` and stack.
+
+    Resizing is a nearest-neighbour gather over precomputed indices, so the
+    only per-pixel work happens inside NumPy. Returns float32 NCHW in [0, 1].
+    """
+    batch = np.zeros((len(images), size, size, 3), dtype=np.float32)
+    for i, image in enumerate(images):
+        height, width = image.shape[:2]
+        side = max(height, width)
+        index = (np.arange(size) * side / size).astype(np.intp)
+        n_rows = np.searchsorted(index, height)
+        n_cols = np.searchsorted(index, width)
+        batch[i, :n_rows, :n_cols] = image[index[:n_rows, None], index[:n_cols]]
+    batch *= 1 / 255.0
+    return batch.transpose(0, 3, 1, 2)
+
+
+class BatchedDetector:
+    """
+    Runs the NudeNet ONNX graph on stacked batches and keeps per-class maxima.
+
+    Exports with a dynamic batch dimension take NSFW_BATCH_SIZE images per
+    run. Exports with a fixed one are fed exactly that many images per run
+    (one at a time for a batch of 1), zero-padding the last run.
+    """
+
+    def __init__(self, session, class_names: list[str], input_size: int = 320):
+        self.session = session
+        model_input = session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Dynamic dimensions are reported as names or None
+        batch = model_input.shape[0]
+        self.fixed_batch = batch if isinstance(batch, int) and batch > 0 else None
+        self.class_names = class_names
+        self.input_size = input_size
+
+    def class_scores(self, images) -> np.ndarray:
+        """(N, len(labels)) max confidence per configured label"""
+        labels = settings.NSFW_LABELS
+        columns = [self.class_names.index(l) for l in labels if l in self.class_names]
+        positions = [i for i, l in enumerate(labels) if l in self.class_names]
+        scores = np.zeros((len(images), len(labels)), dtype=np.float32)
+
+        batch_size = self.fixed_batch or settings.NSFW_BATCH_SIZE
+        for start in range(0, len(images), batch_size):
+            chunk = images[start:start + batch_size]
+            batch = letterbox_batch(chunk, self.input_size)
+            if self.fixed_batch and len(chunk) < self.fixed_batch:
+                padding = np.zeros((self.fixed_batch - len(chunk),) + batch.shape[1:], dtype=batch.dtype)
+                batch = np.concatenate([batch, padding])
+            # YOLOv8 head: (N, 4 + classes, anchors)
+            output = self.session.run(None, {self.input_name: batch})[0]
+            per_class = output[:len(chunk), 4:, :].max(axis=2)
+            scores[start:start + len(chunk), positions] = per_class[:, columns]
+        return scores
+
+
 try:
     from nudenet import NudeDetector
+    from nudenet import nudenet as _nudenet
+
+    def _load():
+        detector = NudeDetector()
+        batched = None
+        if hasattr(detector, "onnx_session") and getattr(_nudenet, "__labels", None):
+            batched = BatchedDetector(
+                detector.onnx_session,
+                list(_nudenet.__labels),
+                getattr(detector, "input_width", 320),
+            )
+        return detector, batched
+
+    def _scores(loaded, images) -> np.ndarray:
+        detector, batched = loaded
+        if batched is not None:
+            return batched.class_scores(images)
+
+        labels = settings.NSFW_LABELS
+        scores = np.zeros((len(images), len(labels)), dtype=np.float32)
+        for i, image in enumerate(images):
+            for item in detector.detect(image):
+                if item.get("class") in labels:
+                    j = labels.index(item["class"])
+                    scores[i, j] = max(scores[i, j], item.get("score", 0))
+        return scores
 
-    _detector = NudeDetector()
+    models.register(
+        "nudenet",
+        _load,
+        warmup=lambda loaded: _scores(loaded, [np.zeros((64, 64, 3), dtype=np.uint8)]),
+    )
 
-    def analyze_image(image_path: str):
-        result = _detector.detect(image_path)
-        # Normalize and return first detection if above threshold
-        for item in result:
-            if item.get("score", 0) > 0.7 and item.get("class") in ["EXPOSED_GENITALIA", "EXPOSED_BREAST_F"]:
-                return {"label": "nsfw", "score": item.get("score")}
-        return None
+    def class_scores(images) -> np.ndarray:
+        with stage("nsfw_model", model_version="nudenet"):
+            return _scores(models.get("nudenet"), [decode_image(i) for i in images])
 except Exception:
     # Fallback stub for test/dev environments without nudenet
-    def analyze_image(image_path: str):
-        return None
+    def class_scores(images) -> np.ndarray:
+        return np.zeros((len(images), len(settings.NSFW_LABELS)), dtype=np.float32)
+
+
+def nsfw_scores(images) -> np.ndarray:
+    """Highest NSFW-label score per image"""
+    if not len(images) or not settings.NSFW_LABELS:
+        return np.zeros(len(images), dtype=np.float32)
+    return class_scores(images).max(axis=1)
+
+
+def nsfw_score(image) -> float:
+    return float(nsfw_scores([image])[0])
+
+
+def analyze_images(images) -> list:
+    """Score arrays, encoded bytes or paths in batches; one result (or None) per image"""
+    if not len(images):
+        return []
+    labels = settings.NSFW_LABELS
+    scores = class_scores(images)
+
+    results = []
+    for row in scores:
+        best = int(row.argmax())
+        if row[best] > settings.NSFW_THRESHOLD:
+            results.append({"label": "nsfw", "score": float(row[best]), "class": labels[best]})
+        else:
+            results.append(None)
+    return results
+
+
+def analyze_image(image):
+    return analyze_images([image])[0]
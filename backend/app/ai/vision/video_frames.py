@@ -1,18 +1,111 @@
-try:
-    from moviepy import VideoFileClip
+import numpy as np
+
+from app.core.tracing import stage
+
+
+def downscale(frame, max_side: int = None):
+    """Nearest-neighbour resize so the longest side is at most ``max_side``"""
+    if not max_side:
+        return frame
+    height, width = frame.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1:
+        return frame
+    rows = (np.arange(max(1, int(height * scale))) / scale).astype(np.intp)
+    cols = (np.arange(max(1, int(width * scale))) / scale).astype(np.intp)
+    return frame[rows[:, None], cols]
+
+
+def sample_times(start: float, end: float, interval: float):
+    t = start
+    while t < end:
+        yield round(t, 3)
+        t += interval
+
+
+class VideoSource:
+    """Random-access, lazily decoded frames of one video"""
+
+    def __init__(self, clip):
+        self._clip = clip
+        self.duration = clip.duration if clip is not None else 0.0
+
+    def frame_at(self, t: float, max_side: int = None):
+        with stage("frame_decode", modality="video"):
+            return downscale(self._clip.get_frame(t), max_side)
+
+    def frames(self, timestamps, max_side: int = None):
+        for t in timestamps:
+            yield t, self.frame_at(t, max_side)
+
+    def close(self):
+        if self._clip is not None:
+            self._clip.close()
+
+    def __enter__(self):
+        return self
 
-    def extract_frames(video_path: str, interval: int = 2):
-        clip = VideoFileClip(video_path)
-        frames = []
+    def __exit__(self, *exc):
+        self.close()
 
-        for t in range(0, int(clip.duration), interval):
-            frame = clip.get_frame(t)
-            frames.append(frame)
 
-        clip.close()
-        return frames
+try:
+    from moviepy import VideoFileClip
+
+    def open_video(video_path: str) -> VideoSource:
+        return VideoSource(VideoFileClip(video_path, audio=False))
 except Exception:
     # Fallback stub for environments without moviepy
-    def extract_frames(video_path: str, interval: int = 2):
-        return []
+    def open_video(video_path: str) -> VideoSource:
+        return VideoSource(None)
+
+
+try:
+    import av
+
+    class StreamClip:
+        """A clip decoded by PyAV from a seekable file object, reading only what it seeks to"""
+
+        def __init__(self, fileobj):
+            self._container = av.open(fileobj)
+            self._stream = self._container.streams.video[0]
+            self._stream.thread_type = "AUTO"
+            time_base = self._stream.time_base
+            self._start = float(self._stream.start_time * time_base) if self._stream.start_time else 0.0
+            if self._container.duration:
+                self.duration = self._container.duration / av.time_base
+            elif self._stream.duration:
+                self.duration = float(self._stream.duration * time_base)
+            else:
+                self.duration = 0.0
+
+        def get_frame(self, t: float):
+            # Seek to the keyframe at or before t, then decode up to t
+            target = self._start + t
+            self._container.seek(int(target / self._stream.time_base), stream=self._stream)
+            frame = None
+            for frame in self._container.decode(self._stream):
+                if frame.time is not None and frame.time >= target:
+                    break
+            if frame is None:
+                raise ValueError(f"No frame at {t}s")
+            return frame.to_ndarray(format="rgb24")
+
+        def close(self):
+            self._container.close()
+
+    def open_video_stream(fileobj) -> VideoSource:
+        return VideoSource(StreamClip(fileobj))
+except ImportError:
+    # Without PyAV remote videos are fetched whole and decoded by moviepy
+    open_video_stream = None
+
+
+def iter_frames(video_path: str, interval: float = 2, max_side: int = None):
+    """Yield (timestamp, frame) pairs, decoding one frame at a time"""
+    with open_video(video_path) as source:
+        yield from source.frames(sample_times(0, source.duration, interval), max_side)
+
 
+def extract_frames(video_path: str, interval: int = 2):
+    return [frame for _, frame in iter_frames(video_path, interval)]
@@ -1,41 +1,54 @@
-from fastapi import APIRouter,Depends
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.core.datase import get_db
-from app.models.moderation_result import ModerationResult
+from app.core.database import get_db
+from app.core.roles import require_role
+from app.services.rollup_service import query_counts
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
+
+def time_range(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    granularity: Optional[str] = Query(None, pattern="^(minute|hour|day)$"),
+):
+    """Default to the last 24 hours; naive timestamps are taken as UTC"""
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(days=1)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    return start, end, granularity
+
+
 @router.get(
     "/summary",
     dependencies=[Depends(require_role("admin"))]
 )
+def summary(window=Depends(time_range), db: Session = Depends(get_db)):
+    rows = query_counts(db, ["category"], *window)
+    return [{"category": r.category, "count": r.count} for r in rows]
 
-@router.get("/model-performance")
-def model_performance(db: Session = Depends(get_db)):
-    return db.query(
-        ModerationResult.model_version,
-        func.count().label("count")
-    ).group_by(ModerationResult.model_version).all()
 
-def admin_analytics():
-    return {"message": "Admin-only analytics data"}
+@router.get("/model-performance")
+def model_performance(window=Depends(time_range), db: Session = Depends(get_db)):
+    rows = query_counts(db, ["model_version", "decision"], *window, items=True)
+    return [
+        {"model_version": r.model_version, "decision": r.decision, "count": r.count}
+        for r in rows
+    ]
 
-def summary(db: Session = Depends(get_db)):
-    return db.query(
-        ModerationResult.category,
-        func.count().label("count")
-    ).group_by(ModerationResult.category).all()
 
 @router.get("/overview")
-def analytics_overview(db=Depends(get_db)):
+def analytics_overview(window=Depends(time_range), db: Session = Depends(get_db)):
+    decisions = {r.decision: r.count for r in query_counts(db, ["decision"], *window, items=True)}
+    categories = {r.category: r.count for r in query_counts(db, ["category"], *window)}
     return {
-        "flagged": 1240,
-        "approved": 860,
-        "rejected": 380,
-        "categories": {
-            "hate": 320,
-            "nsfw": 450,
-            "spam": 210
-        }
-    }
\ No newline at end of file
+        "flagged": decisions.get("flagged", 0),
+        "approved": decisions.get("approved", 0),
+        "rejected": decisions.get("blocked", 0),
+        "categories": categories,
+    }
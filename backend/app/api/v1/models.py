@@ -0,0 +1,33 @@
+from dataclasses import asdict
+from fastapi import APIRouter, Depends, HTTPException
+from starlette.concurrency import run_in_threadpool
+from app.ai.loader import models
+from app.ai.model_registry import registry, Routing
+from app.core.roles import require_role
+from app.schemas.models import ModelRouting
+
+router = APIRouter(
+    prefix="/models",
+    tags=["Models"],
+    dependencies=[Depends(require_role("admin"))]
+)
+
+
+@router.get("/")
+def list_models():
+    return {
+        "routing": asdict(registry.routing),
+        "versions": registry.versions,
+        "status": models.status(),
+    }
+
+
+@router.put("/routing")
+async def update_routing(payload: ModelRouting):
+    """Switch versions live; workers warm new versions and follow within MODEL_ROUTING_REFRESH_SECONDS"""
+    routing = Routing(**payload.model_dump())
+    try:
+        await run_in_threadpool(registry.publish, routing, warm=False)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return asdict(registry.routing)
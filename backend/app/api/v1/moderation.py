@@ -1,10 +1,14 @@
 from fastapi import APIRouter, Depends, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from app.schemas.content import ContentCreate, ContentResponse
 from app.models.content import Content
-from app.core.database import get_db
+from app.core.database import get_async_db, get_async_session_factory
 from app.core.security import verify_api_key
-from app.core.rate_limit import limiter
+from app.core.rate_limit import rate_limit
+from app.core.queues import priority_for
+from app.core.tracing import stage
+from app.services.ingest_service import ingest_ndjson, NDJSONStreamingResponse
 
 router = APIRouter(prefix="/moderation", tags=["Moderation"])
 
@@ -12,25 +16,44 @@ router = APIRouter(prefix="/moderation", tags=["Moderation"])
 @router.post(
     "/analyse",
     response_model=ContentResponse,
-    dependencies=[Depends(verify_api_key)]
+    dependencies=[Depends(verify_api_key), Depends(rate_limit)]
 )
-@limiter.limit("30/minute")
 async def analyse_content(
-    request: Request,
     payload: ContentCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    content = Content(**payload.model_dump())
-    db.add(content)
-    db.commit()
-    db.refresh(content)
+    with stage("ingest"):
+        content = Content(**payload.model_dump())
+        db.add(content)
+        # id and the client-side status default are populated by the flush,
+        # so no refresh round trip is needed
+        await db.commit()
 
     # Queue async moderation task (gracefully skip if Redis/Celery unavailable)
     try:
         from app.workers.moderation_worker import moderate_content_task
-        moderate_content_task.delay(content.id)
+        with stage("enqueue"):
+            await run_in_threadpool(
+                moderate_content_task.apply_async,
+                (content.id,),
+                priority=priority_for(content.source_app),
+            )
     except Exception:
         # Redis/Celery connection errors are non-fatal in testing
         pass
 
     return content
+
+
+@router.post(
+    "/analyse/bulk",
+    dependencies=[Depends(verify_api_key), Depends(rate_limit)]
+)
+async def analyse_content_bulk(
+    request: Request,
+    session_factory=Depends(get_async_session_factory)
+):
+    """Accept newline-delimited ContentCreate objects and stream back per-item ids"""
+    return NDJSONStreamingResponse(
+        ingest_ndjson(request.stream(), session_factory)
+    )
@@ -0,0 +1,64 @@
+import json
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.core.roles import require_role
+from app.models.policy import Policy
+from app.schemas.policy import ModerationPolicy, PolicyResponse
+from app.services.policy_service import DEFAULT, policy_engine
+
+router = APIRouter(
+    prefix="/policies",
+    tags=["Policies"],
+    dependencies=[Depends(require_role("admin"))]
+)
+
+
+def _response(row: Policy) -> PolicyResponse:
+    return PolicyResponse(
+        source_app=row.source_app,
+        version=row.version,
+        policy=ModerationPolicy.model_validate(json.loads(row.document)),
+    )
+
+
+@router.get("/", response_model=list[PolicyResponse])
+def list_policies(db: Session = Depends(get_db)):
+    return [_response(row) for row in db.query(Policy).order_by(Policy.source_app)]
+
+
+@router.get("/{source_app}", response_model=PolicyResponse)
+def get_policy(source_app: str, db: Session = Depends(get_db)):
+    """The policy ``source_app`` is decided with: its own, else the "*" one, else the built-in default"""
+    for name in (source_app, DEFAULT):
+        row = db.query(Policy).filter(Policy.source_app == name).first()
+        if row is not None:
+            return _response(row)
+    return PolicyResponse(source_app=DEFAULT, version=0, policy=ModerationPolicy())
+
+
+@router.put("/{source_app}", response_model=PolicyResponse)
+def put_policy(source_app: str, payload: ModerationPolicy, db: Session = Depends(get_db)):
+    """Other processes pick the change up within POLICY_REFRESH_SECONDS"""
+    document = payload.model_dump_json()
+    row = db.query(Policy).filter(Policy.source_app == source_app).first()
+    if row is None:
+        row = Policy(source_app=source_app, document=document, version=1)
+        db.add(row)
+    else:
+        row.document = document
+        row.version += 1
+    db.commit()
+    db.refresh(row)
+    policy_engine.refresh(force=True)
+    return _response(row)
+
+
+@router.delete("/{source_app}", status_code=204)
+def delete_policy(source_app: str, db: Session = Depends(get_db)):
+    row = db.query(Policy).filter(Policy.source_app == source_app).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Policy not found")
+    db.delete(row)
+    db.commit()
+    policy_engine.refresh(force=True)
@@ -0,0 +1,50 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.core.roles import require_role
+from app.models.prefilter import PrefilterEntry
+from app.schemas.prefilter import PrefilterEntryCreate, PrefilterEntryResponse
+from app.services.prefilter_service import normalize_entry
+
+router = APIRouter(
+    prefix="/prefilter",
+    tags=["Prefilter"],
+    dependencies=[Depends(require_role("admin"))]
+)
+
+
+@router.get("/entries", response_model=list[PrefilterEntryResponse])
+def list_entries(list: Optional[str] = None, db: Session = Depends(get_db)):
+    query = db.query(PrefilterEntry).order_by(PrefilterEntry.id)
+    if list:
+        query = query.filter(PrefilterEntry.list == list)
+    return query.all()
+
+
+@router.post("/entries", response_model=PrefilterEntryResponse, status_code=201)
+def add_entry(payload: PrefilterEntryCreate, db: Session = Depends(get_db)):
+    """Every process picks the change up within PREFILTER_REFRESH_SECONDS"""
+    entry = PrefilterEntry(
+        list=payload.list,
+        value=normalize_entry(payload.list, payload.value),
+        note=payload.note,
+    )
+    db.add(entry)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Entry already exists")
+    db.refresh(entry)
+    return entry
+
+
+@router.delete("/entries/{entry_id}", status_code=204)
+def delete_entry(entry_id: int, db: Session = Depends(get_db)):
+    entry = db.get(PrefilterEntry, entry_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Entry not found")
+    db.delete(entry)
+    db.commit()
@@ -1,19 +1,54 @@
-from fastapi import APIRouter, Depends
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.core.models.review import Review
-
-
-router = APIRouter(prefix="/review", tags=["Human Review"])
-
-@router.post("/")
-def review_content(content_id: int, decision: str, db: Session = Depends(get_db)):
-    review = Review(
-        content_id=content_id,
-        reviewer = "admin",
-        decision = decision
-    )
-    db.add(review)
-    db.commit()
-    db.refresh(review)
-    return {"status":"review saved"}
+from app.core.roles import require_role
+from app.models.content import Content
+from app.schemas.review import ClaimRequest, ReleaseRequest, ReviewCreate, ReviewItem, ReviewPage, ReviewResponse
+from app.services.review_service import ClaimConflict, claim, list_queue, record_review, release
+
+
+router = APIRouter(
+    prefix="/review",
+    tags=["Human Review"],
+    dependencies=[Depends(require_role("admin"))]
+)
+
+QueueStatus = Literal["flagged", "pending"]
+
+
+@router.get("/queue", response_model=ReviewPage)
+def get_queue(
+    status: QueueStatus = "flagged",
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Browse the queue, claimed items included; claim to get work"""
+    try:
+        items, next_cursor = list_queue(db, status=status, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return ReviewPage(items=items, next_cursor=next_cursor)
+
+
+@router.post("/claim", response_model=list[ReviewItem])
+def claim_items(payload: ClaimRequest, status: QueueStatus = "flagged", db: Session = Depends(get_db)):
+    """Lease the next unclaimed items for REVIEW_LEASE_SECONDS"""
+    return claim(db, payload.reviewer, limit=payload.limit, status=status)
+
+
+@router.post("/release")
+def release_items(payload: ReleaseRequest, db: Session = Depends(get_db)):
+    return {"released": release(db, payload.reviewer, payload.content_ids)}
+
+
+@router.post("/{content_id}", response_model=ReviewResponse)
+def review_content(content_id: int, payload: ReviewCreate, db: Session = Depends(get_db)):
+    content = db.get(Content, content_id)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Content not found")
+    try:
+        return record_review(db, content, payload.reviewer, payload.decision, payload.note)
+    except ClaimConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
@@ -1,12 +1,176 @@
+import time
+
 from celery import Celery
+from celery.schedules import crontab
+from celery.signals import (
+    before_task_publish,
+    celeryd_init,
+    task_postrun,
+    task_prerun,
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
+)
 from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import celery_queue_latency_seconds, celery_task_duration_seconds
+from app.core.queues import TASK_ROUTES, PRIORITY_STEPS, PRIORITY_SEP, prefetch_for
+from app.core import tracing
 
 celery_app = Celery("moderator",
                     broker=settings.REDIS_URL,
-                    backend = settings.REDIS_URL)
+                    backend = settings.REDIS_URL,
+                    include=["app.workers.moderation_worker",
+                             "app.workers.maintenance_worker"])
 
 celery_app.conf.update( task_serializers='json',
                         accept_content=['json'],
                         result_serializer='json',
                         timezone ='UTC',
                         enable_utc=True )
+
+# Run one worker pool per queue so each can be sized and scaled on its own:
+#   celery -A app.core.celery worker -Q moderation.text -c 8
+#   celery -A app.core.celery worker -Q moderation.image -c 4
+#   celery -A app.core.celery worker -Q moderation.video -c 2
+# With INFERENCE_POOL_WORKERS set, a worker scores all of an item's
+# modalities concurrently in its own process pool instead:
+#   INFERENCE_POOL_WORKERS=3 celery -A app.core.celery worker -Q moderation.text -P threads -c 4
+celery_app.conf.update( task_routes=TASK_ROUTES,
+                        task_default_priority=settings.MODERATION_DEFAULT_PRIORITY,
+                        broker_transport_options={
+                            "queue_order_strategy": "priority",
+                            "priority_steps": PRIORITY_STEPS,
+                            "sep": PRIORITY_SEP,
+                        } )
+
+# Run with `celery -A app.core.celery beat`
+celery_app.conf.beat_schedule = {
+    "retention-cleanup": {
+        "task": "app.workers.maintenance_worker.cleanup_old_content_task",
+        "schedule": crontab(hour=3, minute=0),
+    },
+}
+
+
+@celeryd_init.connect
+def tune_prefetch(conf=None, options=None, **kwargs):
+    """Apply CELERY_PREFETCH_MULTIPLIERS for the queues passed with -Q"""
+    options = options or {}
+    if options.get("prefetch_multiplier"):
+        return
+    queues = options.get("queues") or []
+    if isinstance(queues, str):
+        queues = queues.split(",")
+    prefetch = prefetch_for(queues)
+    if prefetch is not None:
+        conf.worker_prefetch_multiplier = prefetch
+
+
+@before_task_publish.connect
+def stamp_publish_time(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault("published_at", time.time())
+        tracing.inject(headers)
+
+
+def _queue_of(task) -> str:
+    return (task.request.delivery_info or {}).get("routing_key") or "celery"
+
+
+@task_prerun.connect
+def observe_queue_latency(task=None, **kwargs):
+    published_at = getattr(task.request, "published_at", None)
+    if published_at:
+        celery_queue_latency_seconds.labels(queue=_queue_of(task)).observe(max(time.time() - published_at, 0))
+    task.request.started_at = time.perf_counter()
+    # One span per task, continuing the trace of whoever enqueued it
+    task.request.trace_token = tracing.attach_from(task.request)
+    task.request.trace_stage = tracing.stage(task.name.rsplit(".", 1)[-1]).__enter__()
+
+
+@task_postrun.connect
+def observe_task_duration(task=None, **kwargs):
+    started_at = getattr(task.request, "started_at", None)
+    if started_at:
+        celery_task_duration_seconds.labels(queue=_queue_of(task)).observe(time.perf_counter() - started_at)
+    trace_stage = getattr(task.request, "trace_stage", None)
+    if trace_stage is not None:
+        trace_stage.__exit__(None, None, None)
+        tracing.detach(task.request.trace_token)
+
+
+@worker_init.connect
+def preload_models(**kwargs):
+    """Load weights in the master so forked children share them copy-on-write"""
+    if settings.INFERENCE_POOL_WORKERS:
+        return  # inference runs in the pool, whose processes load their own
+    from app.ai.loader import models, register_all
+    register_all()
+    models.preload()
+    models.freeze()
+
+
+@worker_init.connect
+def init_tracing(**kwargs):
+    tracing.configure_tracing()
+
+
+@worker_process_init.connect
+def init_worker_db(**kwargs):
+    from app.core.database import configure_worker_engine
+    configure_worker_engine()
+
+
+@worker_process_init.connect
+def warm_up_models(**kwargs):
+    # Warm-up runs in each child: inference state (thread pools, caches)
+    # must not be created before fork
+    from app.ai.loader import models
+    if settings.INFERENCE_POOL_WORKERS:
+        return
+    models.forget()
+    models.warm_up()
+    models.start_heartbeat()
+
+
+@worker_process_init.connect
+def start_inference_pool(**kwargs):
+    # Solo and thread pools don't send worker_process_init; their inference
+    # pool starts on first use instead
+    from app.ai.inference_pool import inference_pool
+    inference_pool.start()
+
+
+@worker_process_shutdown.connect
+def stop_inference_pool(**kwargs):
+    from app.ai.inference_pool import inference_pool
+    inference_pool.shutdown()
+
+
+@worker_process_shutdown.connect
+def stop_model_heartbeat(**kwargs):
+    from app.ai.loader import models
+    models.stop_heartbeat()
+
+
+@worker_process_shutdown.connect
+def flush_worker_spans(**kwargs):
+    tracing.flush()
+
+
+@worker_process_shutdown.connect
+def flush_worker_results(**kwargs):
+    from app.services.result_writer import result_writer
+    try:
+        result_writer.flush()
+    except Exception as e:
+        # Unflushed verdicts stay journaled for the next worker
+        logger.error(f"Result flush on shutdown failed: {e}")
+
+
+@worker_process_shutdown.connect
+def close_webhook_dispatcher(**kwargs):
+    # atexit never runs in prefork children; deliver what is still buffered
+    from app.services.webhook_services import webhook_dispatcher
+    webhook_dispatcher.close()
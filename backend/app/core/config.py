@@ -3,9 +3,20 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     APP_NAME: str = "AI Moderator"
     DELETE_AFTER_DAYS: int = 90
+    RETENTION_CHUNK_SIZE: int = 1000
+    RETENTION_ROWS_PER_SECOND: float = 5000
+    ROLLUP_MINUTE_RETENTION_DAYS: int = 7
+    ROLLUP_HOUR_RETENTION_DAYS: int = 90
+    ROLLUP_BACKFILL_CHUNK_SIZE: int = 5000
     ENV:str
 
     DATABASE_URL:str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_WORKER_POOL_SIZE: int = 2
 
     SECRET_KEY:str
     ALGORITHM:str
@@ -13,6 +24,164 @@ class Settings(BaseSettings):
     REDIS_URL:str
     API_KEY_HEADER:str
 
+    # Models loaded at boot by the Celery master and warmed up in each child
+    MODEL_PRELOAD: list[str] = ["toxicity_v1.1", "toxicity_v1.2", "xlm-roberta-base", "nudenet", "langid"]
+    # The API only enqueues work, so by default it loads no models
+    API_MODEL_PRELOAD: list[str] = []
+    # Workers publish their warm state this often, expiring after the TTL;
+    # /health/ready wants at least HEALTH_MIN_WARM_WORKERS warm processes
+    MODEL_HEARTBEAT_SECONDS: float = 10.0
+    MODEL_HEARTBEAT_TTL_SECONDS: int = 30
+    HEALTH_MIN_WARM_WORKERS: int = 1
+
+    # Initial toxicity model routing; PUT /api/v1/models/routing changes it live
+    MODEL_ACTIVE: str = "toxicity_v1.1"
+    MODEL_CANARY: str | None = "toxicity_v1.2"
+    MODEL_CANARY_PERCENT: int = 10
+    MODEL_SHADOW: str | None = None
+    MODEL_ROUTING_REFRESH_SECONDS: float = 5.0
+    MODEL_SHADOW_MAX_PENDING: int = 100
+
+    # Texts identified as English below this confidence go to the multilingual model
+    LANGID_MIN_CONFIDENCE: float = 0.9
+    LANGID_CACHE_SIZE: int = 50_000
+    LANGID_CACHE_TTL_SECONDS: int = 86_400
+
+    # Inference backend per toxicity model version: torch | onnx | onnx-int8
+    TOXICITY_BACKENDS: dict[str, str] = {}
+    ONNX_CACHE_DIR: str = "./model_cache/onnx"
+    ONNX_INTRA_OP_THREADS: int = 0  # 0 = onnxruntime default
+
+    INFERENCE_MAX_BATCH_SIZE: int = 32
+    INFERENCE_MAX_WAIT_MS: int = 10
+
+    # Score an item's text, image and video concurrently in this many
+    # processes per worker (0 = one after another in the task's process).
+    # Each pool process holds its own copy of the models, so run such
+    # workers with -P threads or a low -c rather than many prefork children.
+    INFERENCE_POOL_WORKERS: int = 0
+    # torch/onnxruntime intra-op threads per pool process (0 = cores / processes)
+    INFERENCE_POOL_THREADS: int = 0
+    INFERENCE_POOL_START_METHOD: str = "spawn"
+    # Seconds a modality may take in the pool before its signal counts as failed
+    INFERENCE_TIMEOUTS: dict[str, float] = {"text": 30.0, "image": 30.0, "video": 300.0}
+
+    BULK_INSERT_CHUNK_SIZE: int = 500
+    BULK_TASK_CHUNK_SIZE: int = 50
+    BULK_MAX_LINE_BYTES: int = 1_048_576
+
+    VERDICT_CACHE_SIZE: int = 10_000
+    VERDICT_CACHE_TTL_SECONDS: int = 3600
+    VERDICT_CACHE_REDIS: bool = True
+
+    RESULT_FLUSH_SIZE: int = 500
+    RESULT_FLUSH_INTERVAL_MS: int = 1000
+    # How long written journal ids are kept to make replayed flushes no-ops
+    RESULT_JOURNAL_RETENTION_HOURS: int = 24
+
+    WEBHOOKS_ENABLED: bool = False
+    WEBHOOK_TIMEOUT_SECONDS: float = 5.0
+    WEBHOOK_MAX_CONNECTIONS: int = 100
+    WEBHOOK_MAX_KEEPALIVE: int = 20
+    WEBHOOK_BATCH_SIZE: int = 100
+    WEBHOOK_FLUSH_INTERVAL_MS: int = 200
+    WEBHOOK_MAX_ATTEMPTS: int = 5
+    WEBHOOK_BACKOFF_BASE_SECONDS: float = 0.5
+    WEBHOOK_BACKOFF_MAX_SECONDS: float = 30.0
+    WEBHOOK_CALLBACK_TTL_SECONDS: int = 60
+
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_DEFAULT_TIER: str = "standard"
+    # Tokens refilled per second and bucket size, per API key
+    RATE_LIMIT_TIERS: dict[str, dict[str, float]] = {
+        "standard": {"rate": 0.5, "burst": 30},
+        "bulk": {"rate": 200, "burst": 2000},
+        "internal": {"rate": 100, "burst": 1000},
+    }
+    RATE_LIMIT_LEASE_FRACTION: float = 0.1
+
+    # Route image/video work to their own queues and merge verdicts in a chord
+    MODERATION_SPLIT_MODALITIES: bool = True
+    # Celery priority per source_app; 0 is served first
+    MODERATION_PRIORITIES: dict[str, int] = {}
+    MODERATION_DEFAULT_PRIORITY: int = 5
+    CELERY_PREFETCH_MULTIPLIERS: dict[str, int] = {
+        "moderation.text": 16,
+        "moderation.image": 2,
+        "moderation.video": 1,
+    }
+
+    BROADCAST_ENABLED: bool = True
+    BROADCAST_CHANNEL: str = "moderation:decisions"
+    BROADCAST_QUEUE_SIZE: int = 256
+
+    # Emails, URLs, IPs, cards, phones and handles are replaced by [KIND]
+    # placeholders before text reaches the models; keywords are extra literals
+    PII_REDACTION_ENABLED: bool = True
+    PII_KEYWORDS: list[str] = []
+
+    # Decides obvious items (block lists, known-bad hashes, emoji-only or
+    # very short text) before any model runs; lists live in the database
+    PREFILTER_ENABLED: bool = True
+    PREFILTER_REFRESH_SECONDS: float = 30.0
+    PREFILTER_SHORT_TEXT_LENGTH: int = 3
+
+    # Defaults for source apps without a stored policy (PUT /api/v1/policies/*
+    # replaces them); NSFW_THRESHOLD is the image and video block default
+    MODERATION_POLICY_TEXT_BLOCK: float = 0.85
+    MODERATION_POLICY_TEXT_REVIEW: float | None = 0.7
+    POLICY_REFRESH_SECONDS: float = 10.0
+
+    # Per-stage latency always goes to moderation_stage_seconds; set an
+    # exporter (otlp | file) to also emit OpenTelemetry spans
+    TRACING_EXPORTER: str = ""
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_FILE: str = "./traces.jsonl"
+    TRACING_SAMPLE_RATIO: float = 1.0
+
+    # Claimed review items return to the queue when the lease runs out
+    REVIEW_LEASE_SECONDS: int = 600
+    REVIEW_CLAIM_MAX: int = 50
+    REVIEW_PAGE_SIZE: int = 50
+
+    NSFW_THRESHOLD: float = 0.7
+    NSFW_LABELS: list[str] = [
+        "FEMALE_GENITALIA_EXPOSED",
+        "MALE_GENITALIA_EXPOSED",
+        "FEMALE_BREAST_EXPOSED",
+        # NudeNet 2.x class names
+        "EXPOSED_GENITALIA",
+        "EXPOSED_BREAST_F",
+    ]
+    NSFW_BATCH_SIZE: int = 16
+
+    # Remote (http/https) image and video URLs are fetched into a local
+    # content-addressed cache shared by the workers on a host
+    MEDIA_CACHE_DIR: str = "./media_cache"
+    MEDIA_CACHE_MAX_BYTES: int = 2 * 1024 ** 3
+    # Most bytes one asset may cost, whether fetched whole or by range
+    MEDIA_MAX_BYTES: int = 100 * 1024 ** 2
+    # Bigger videos are sampled with range requests (needs PyAV)
+    MEDIA_VIDEO_FULL_FETCH_BYTES: int = 32 * 1024 ** 2
+    MEDIA_RANGE_BLOCK_BYTES: int = 1024 ** 2
+    MEDIA_FETCH_TIMEOUT_SECONDS: float = 30.0
+    MEDIA_MAX_CONNECTIONS: int = 50
+    # Downloads in flight per process; the temp area holds at most this many MEDIA_MAX_BYTES
+    MEDIA_MAX_CONCURRENT_FETCHES: int = 8
+    # Media URLs come from clients: every hop must resolve to a public
+    # address, and to one of these hosts (or their subdomains) if any are set
+    MEDIA_ALLOWED_HOSTS: list[str] = []
+    MEDIA_ALLOW_PRIVATE_ADDRESSES: bool = False
+    MEDIA_MAX_REDIRECTS: int = 5
+
+    VIDEO_SAMPLE_INTERVAL_SECONDS: float = 2.0
+    VIDEO_MAX_SIDE: int = 640
+    VIDEO_WORKERS: int = 4
+    VIDEO_ADAPTIVE_SAMPLING: bool = False
+    VIDEO_COARSE_INTERVAL_SECONDS: float = 8.0
+    VIDEO_FINE_INTERVAL_SECONDS: float = 1.0
+    VIDEO_SUSPECT_SCORE: float = 0.3
+
     class Config:
         env_file = ".env"
 
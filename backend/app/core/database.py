@@ -1,16 +1,143 @@
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import String, create_engine, event, type_coerce
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.metrics import db_pool_checkout_seconds, db_pool_in_use, db_pool_saturation
 
-engine = create_engine(settings.DATABASE_URL, future = True)
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def instrumented_pool(base, name: str):
+    """Pool subclass that times how long callers wait for a connection"""
+
+    class InstrumentedPool(base):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                db_pool_checkout_seconds.labels(pool=name).observe(time.perf_counter() - start)
+
+    return InstrumentedPool
+
+
+def _pool_options(url: str, base, name: str, pool_size: int = None) -> dict:
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "poolclass": instrumented_pool(base, name),
+        "pool_size": pool_size or settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _observe_pool(sync_engine, name: str):
+    def update(in_use: int):
+        db_pool_in_use.labels(pool=name).set(in_use)
+        capacity = sync_engine.pool.size() + settings.DB_MAX_OVERFLOW
+        db_pool_saturation.labels(pool=name).set(in_use / capacity)
+
+    def on_checkout(*args):
+        if isinstance(sync_engine.pool, QueuePool):
+            update(sync_engine.pool.checkedout())
+
+    def on_checkin(*args):
+        # Fired before the pool takes the connection back
+        if isinstance(sync_engine.pool, QueuePool):
+            update(max(sync_engine.pool.checkedout() - 1, 0))
+
+    event.listen(sync_engine, "checkout", on_checkout)
+    event.listen(sync_engine, "checkin", on_checkin)
+
+
+def build_engine(url: str = None, name: str = "api", pool_size: int = None):
+    url = url or settings.DATABASE_URL
+    engine = create_engine(url, future=True, **_pool_options(url, QueuePool, name, pool_size))
+    _observe_pool(engine, name)
+    return engine
+
+
+def async_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def build_async_engine(url: str = None, name: str = "api_async"):
+    url = async_url(url or settings.DATABASE_URL)
+    engine = create_async_engine(url, **_pool_options(url, AsyncAdaptedQueuePool, name))
+    _observe_pool(engine.sync_engine, name)
+    return engine
+
+
+engine = build_engine()
 
 SessionLocal = sessionmaker(autocommit = False, autoflush = False, bind = engine)
 
 Base = declarative_base()
 
+_async_session_factory = None
+
+
+def configure_worker_engine():
+    """
+    Give a forked Celery worker process its own long-lived engine.
+
+    Connections inherited from the parent are discarded without being
+    closed (they belong to the parent) and SessionLocal is rebound.
+    """
+    global engine
+    engine.dispose(close=False)
+    engine = build_engine(name="worker", pool_size=settings.DB_WORKER_POOL_SIZE)
+    SessionLocal.configure(bind=engine)
+    return engine
+
+
+def keyset_column(db, column):
+    """
+    ``column`` as the database stores it, for keyset cursors.
+
+    SQLite keeps DateTime as text, and ``server_default=func.now()`` writes
+    it without the microseconds SQLAlchemy adds to bound datetimes, so a
+    cursor bound as a datetime sorts after every row of its own second.
+    Reading and comparing the raw text keeps cursors exact and still uses
+    the column's index.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return type_coerce(column, String)
+    return column
+
+
+def get_session_factory():
+    return SessionLocal
+
+def get_async_session_factory():
+    # Built lazily so importing the app doesn't require the async driver
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(
+            build_async_engine(), class_=AsyncSession, expire_on_commit=False
+        )
+    return _async_session_factory
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with get_async_session_factory()() as db:
+        yield db
@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Histogram, Gauge
 
 moderation_requests_total = Counter(
     'moderation_requests_total',
@@ -14,4 +14,232 @@ moderation_decisions_total = Counter(
 moderation_duration_seconds = Histogram(
     'moderation_duration_seconds',
     'Time spent moderating content'
-)
\ No newline at end of file
+)
+
+moderation_stage_seconds = Histogram(
+    'moderation_stage_seconds',
+    'Time spent in one stage of the moderation path',
+    ['stage', 'modality', 'model_version'],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+
+moderation_end_to_end_seconds = Histogram(
+    'moderation_end_to_end_seconds',
+    'Time from content creation to its recorded decision',
+    ['modality'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+)
+
+inference_batch_size = Histogram(
+    'inference_batch_size',
+    'Number of texts scored in one model forward pass',
+    ['model'],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+inference_queue_wait_seconds = Histogram(
+    'inference_queue_wait_seconds',
+    'Time a text waited in the batcher before its forward pass',
+    ['model'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+verdict_cache_hits_total = Counter(
+    'verdict_cache_hits_total',
+    'Moderation verdicts served from cache',
+    ['tier']
+)
+
+verdict_cache_misses_total = Counter(
+    'verdict_cache_misses_total',
+    'Moderation verdict cache misses',
+)
+
+webhook_deliveries_total = Counter(
+    'webhook_deliveries_total',
+    'Webhook batch delivery attempts',
+    ['outcome']
+)
+
+webhook_batch_size = Histogram(
+    'webhook_batch_size',
+    'Decisions coalesced into one webhook request',
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250)
+)
+
+video_frames_scanned = Histogram(
+    'video_frames_scanned',
+    'Frames decoded and scored per video',
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000)
+)
+
+video_frame_buffer_peak_bytes = Histogram(
+    'video_frame_buffer_peak_bytes',
+    'Peak bytes of decoded frames held in memory while scanning one video',
+    buckets=(1e5, 1e6, 5e6, 1e7, 2.5e7, 5e7, 1e8, 2.5e8)
+)
+
+db_pool_checkout_seconds = Histogram(
+    'db_pool_checkout_seconds',
+    'Time spent waiting for a pooled database connection',
+    ['pool'],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+
+db_pool_in_use = Gauge(
+    'db_pool_in_use',
+    'Database connections currently checked out',
+    ['pool']
+)
+
+db_pool_saturation = Gauge(
+    'db_pool_saturation',
+    'Checked-out connections as a fraction of pool_size + max_overflow',
+    ['pool']
+)
+
+result_writer_rows_total = Counter(
+    'result_writer_rows_total',
+    'Rows written by the bulk result writer',
+    ['table']
+)
+
+result_writer_flush_seconds = Histogram(
+    'result_writer_flush_seconds',
+    'Time to persist one batch of moderation verdicts'
+)
+
+retention_rows_deleted_total = Counter(
+    'retention_rows_deleted_total',
+    'Rows removed by the retention job',
+    ['table']
+)
+
+retention_cursor_timestamp = Gauge(
+    'retention_cursor_timestamp_seconds',
+    'create_at of the last content row deleted by the retention job'
+)
+
+retention_last_success = Gauge(
+    'retention_last_success_timestamp_seconds',
+    'Unix time the retention job last completed'
+)
+
+websocket_connections = Gauge(
+    'websocket_connections',
+    'Moderator sockets connected to this API process'
+)
+
+websocket_send_lag_seconds = Histogram(
+    'websocket_send_lag_seconds',
+    'Time from a decision being published to it being sent on a socket',
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+websocket_slow_consumers_total = Counter(
+    'websocket_slow_consumers_total',
+    'Sockets disconnected because their send queue overflowed'
+)
+
+rate_limit_decisions_total = Counter(
+    'rate_limit_decisions_total',
+    'Rate limiter decisions per quota tier',
+    ['tier', 'allowed']
+)
+
+celery_queue_latency_seconds = Histogram(
+    'celery_queue_latency_seconds',
+    'Time a task waited in its queue before a worker started it',
+    ['queue'],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900)
+)
+
+celery_task_duration_seconds = Histogram(
+    'celery_task_duration_seconds',
+    'Task run time per queue',
+    ['queue'],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900)
+)
+
+model_load_seconds = Gauge(
+    'model_load_seconds',
+    'Time this process spent loading a model',
+    ['model']
+)
+
+model_warmup_seconds = Gauge(
+    'model_warmup_seconds',
+    'Time this process spent on a model\'s warm-up inference',
+    ['model']
+)
+
+model_routing_swaps_total = Counter(
+    'model_routing_swaps_total',
+    'Toxicity model routing changes applied by this process'
+)
+
+model_shadow_comparisons_total = Counter(
+    'model_shadow_comparisons_total',
+    'Shadow model decisions compared against the served decision',
+    ['candidate', 'outcome']
+)
+
+model_shadow_score_delta = Histogram(
+    'model_shadow_score_delta',
+    'Absolute difference of the top score between served and shadow model',
+    ['candidate'],
+    buckets=(0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0)
+)
+
+model_shadow_dropped_total = Counter(
+    'model_shadow_dropped_total',
+    'Texts not shadow-scored because the shadow queue was full'
+)
+
+pii_spans_total = Counter(
+    'pii_spans_total',
+    'PII spans redacted from text before scoring',
+    ['kind']
+)
+
+prefilter_items_total = Counter(
+    'prefilter_items_total',
+    'Items seen by the prefilter; outcome "passed" went on to the models',
+    ['outcome', 'reason']
+)
+
+review_items_claimed_total = Counter(
+    'review_items_claimed_total',
+    'Review queue items leased to reviewers'
+)
+
+review_decisions_total = Counter(
+    'review_decisions_total',
+    'Human review decisions recorded',
+    ['decision']
+)
+
+inference_pool_seconds = Histogram(
+    'inference_pool_seconds',
+    'Time from submitting a modality to the inference pool to its result',
+    ['modality'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+)
+
+inference_pool_timeouts_total = Counter(
+    'inference_pool_timeouts_total',
+    'Modalities marked failed because the inference pool missed their deadline',
+    ['modality']
+)
+
+media_fetched_bytes_total = Counter(
+    'media_fetched_bytes_total',
+    'Bytes of remote media downloaded, whole or by range request',
+    ['mode']
+)
+
+media_cache_lookups_total = Counter(
+    'media_cache_lookups_total',
+    'Media blob cache lookups by URL',
+    ['outcome']
+)
@@ -0,0 +1,80 @@
+from prometheus_client.core import GaugeMetricFamily
+
+from app.core.config import settings
+
+TEXT_QUEUE = "moderation.text"
+IMAGE_QUEUE = "moderation.image"
+VIDEO_QUEUE = "moderation.video"
+MODERATION_QUEUES = (TEXT_QUEUE, IMAGE_QUEUE, VIDEO_QUEUE)
+
+# Text workers also route media items and merge their partial verdicts:
+# both are cheap and must not wait behind a long video.
+TASK_ROUTES = {
+    "app.workers.moderation_worker.moderate_content_task": {"queue": TEXT_QUEUE},
+    "app.workers.moderation_worker.moderate_content_batch_task": {"queue": TEXT_QUEUE},
+    "app.workers.moderation_worker.merge_verdicts_task": {"queue": TEXT_QUEUE},
+    "app.workers.moderation_worker.moderate_image_task": {"queue": IMAGE_QUEUE},
+    "app.workers.moderation_worker.moderate_video_task": {"queue": VIDEO_QUEUE},
+}
+
+# The Redis transport keeps one list per priority step: "<queue>" for 0,
+# "<queue><sep><n>" for the others. 0 is consumed first.
+PRIORITY_STEPS = list(range(10))
+PRIORITY_SEP = ":"
+
+
+def priority_for(source_app: str) -> int:
+    return settings.MODERATION_PRIORITIES.get(source_app, settings.MODERATION_DEFAULT_PRIORITY)
+
+
+def prefetch_for(queues) -> int:
+    """Smallest configured prefetch among ``queues``, so a video pool never hoards tasks"""
+    configured = [settings.CELERY_PREFETCH_MULTIPLIERS[q] for q in queues if q in settings.CELERY_PREFETCH_MULTIPLIERS]
+    return min(configured) if configured else None
+
+
+def queue_depths(client, queues=MODERATION_QUEUES) -> dict:
+    pipe = client.pipeline(transaction=False)
+    for queue in queues:
+        for step in PRIORITY_STEPS:
+            pipe.llen(queue if step == 0 else f"{queue}{PRIORITY_SEP}{step}")
+    lengths = pipe.execute()
+
+    n = len(PRIORITY_STEPS)
+    return {queue: sum(lengths[i * n:(i + 1) * n]) for i, queue in enumerate(queues)}
+
+
+class QueueDepthCollector:
+    """Reads broker queue lengths at scrape time so each worker pool can be autoscaled"""
+
+    def __init__(self, redis_client=None, queues=MODERATION_QUEUES):
+        self._redis = redis_client
+        self.queues = queues
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(
+                settings.REDIS_URL, socket_timeout=0.25, socket_connect_timeout=0.25
+            )
+        return self._redis
+
+    def _family(self):
+        return GaugeMetricFamily(
+            "celery_queue_depth", "Messages waiting in each Celery queue", labels=["queue"]
+        )
+
+    def describe(self):
+        # Lets the registry validate names without touching Redis
+        return [self._family()]
+
+    def collect(self):
+        try:
+            depths = queue_depths(self.redis, self.queues)
+        except Exception:
+            return
+        family = self._family()
+        for queue, depth in depths.items():
+            family.add_metric([queue], depth)
+        yield family
@@ -1,4 +1,151 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+import hashlib
+import math
+import threading
+import time
+from dataclasses import dataclass
 
-limiter = Limiter(key_func=get_remote_address)
+from fastapi import Depends, HTTPException, Security, status
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import rate_limit_decisions_total
+from app.core.security import api_key_header, verify_api_key
+
+# Refill from Redis' own clock so every API process agrees on elapsed time.
+# Grants up to ARGV[3] whole tokens and returns {granted, retry_after_ms}.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local wanted = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+
+local granted = math.min(wanted, math.floor(tokens))
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+
+local retry_after = 0
+if granted == 0 then
+    retry_after = math.ceil((1 - tokens) / rate * 1000)
+end
+return {granted, retry_after}
+"""
+
+
+@dataclass
+class Decision:
+    allowed: bool
+    retry_after: float = 0.0
+
+
+class _Lease:
+    __slots__ = ("tokens", "blocked_until")
+
+    def __init__(self):
+        self.tokens = 0
+        self.blocked_until = 0.0
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets per API key, shared by every process through one Redis hash.
+
+    Each process leases a slice of a bucket (``lease_fraction`` of the burst)
+    and spends it locally, so most requests never touch Redis; a key that was
+    refused is refused locally until its retry time. Leased tokens were taken
+    from the shared bucket, so processes together never exceed the quota.
+    If Redis is unreachable requests are allowed and Redis is skipped for
+    ``REDIS_RETRY_SECONDS``.
+    """
+
+    REDIS_RETRY_SECONDS = 30
+
+    def __init__(self, redis_client=None, tiers: dict = None, lease_fraction: float = None):
+        self._redis = redis_client
+        self.tiers = tiers or settings.RATE_LIMIT_TIERS
+        self.lease_fraction = settings.RATE_LIMIT_LEASE_FRACTION if lease_fraction is None else lease_fraction
+        self._leases: dict[str, _Lease] = {}
+        self._lock = threading.Lock()
+        self._script = None
+        self._redis_down_until = 0.0
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(
+                settings.REDIS_URL, socket_timeout=0.05, socket_connect_timeout=0.05
+            )
+        if self._redis_down_until > time.monotonic():
+            return None
+        return self._redis
+
+    def acquire(self, identity: str, tier: str) -> Decision:
+        now = time.monotonic()
+        with self._lock:
+            lease = self._leases.get(identity)
+            if lease is None:
+                lease = self._leases[identity] = _Lease()
+            if lease.tokens >= 1:
+                lease.tokens -= 1
+                return Decision(True)
+            if lease.blocked_until > now:
+                return Decision(False, lease.blocked_until - now)
+
+        limits = self.tiers.get(tier) or self.tiers[settings.RATE_LIMIT_DEFAULT_TIER]
+        rate, burst = limits["rate"], limits["burst"]
+        wanted = max(1, int(burst * self.lease_fraction))
+
+        client = self.redis
+        if client is None:
+            return Decision(True)
+        try:
+            if self._script is None:
+                self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+            granted, retry_after_ms = self._script(
+                keys=[f"ratelimit:{identity}"], args=[rate, burst, wanted]
+            )
+        except Exception as e:
+            logger.warning(f"Rate limiter Redis unavailable, allowing requests: {e}")
+            self._redis_down_until = time.monotonic() + self.REDIS_RETRY_SECONDS
+            return Decision(True)
+
+        with self._lock:
+            if granted:
+                lease.tokens += granted - 1
+                return Decision(True)
+            retry_after = retry_after_ms / 1000
+            lease.blocked_until = time.monotonic() + retry_after
+            return Decision(False, retry_after)
+
+
+def identity_for(api_key: str) -> str:
+    # Never put raw keys into Redis
+    return hashlib.sha256(api_key.encode()).hexdigest()[:32]
+
+
+rate_limiter = TokenBucketLimiter()
+
+
+def rate_limit(
+    api_key: str = Security(api_key_header),
+    identity: dict = Depends(verify_api_key),
+):
+    """Route dependency enforcing the caller's quota tier"""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    tier = identity.get("tier", settings.RATE_LIMIT_DEFAULT_TIER)
+    decision = rate_limiter.acquire(identity_for(api_key), tier)
+    rate_limit_decisions_total.labels(tier=tier, allowed=str(decision.allowed).lower()).inc()
+    if not decision.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(math.ceil(decision.retry_after))},
+        )
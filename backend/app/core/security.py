@@ -4,11 +4,13 @@ from fastapi.security import APIKeyHeader
 
 
 API_KEYS = {
-    "test-key-123": {"role": "client"},
-    "admin-key-456": {"role": "admin"},
+    "test-key-123": {"role": "client", "tier": "standard"},
+    "admin-key-456": {"role": "admin", "tier": "internal"},
 }
 
-def verify_api_key(api_key: str = Security(APIKeyHeader(name="X-API-KEY"))):
+api_key_header = APIKeyHeader(name="X-API-KEY")
+
+def verify_api_key(api_key: str = Security(api_key_header)):
     if api_key not in API_KEYS:
         raise HTTPException(status_code=403, detail="Invalid API key")
     return API_KEYS[api_key]
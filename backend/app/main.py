@@ -1,66 +1,159 @@
-from fastapi import FastAPI, WebSocket
+from fastapi import FastAPI, WebSocket, Query, Depends
 from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.core.database import get_db
 from app.api.v1.moderation import router as moderation_router
-from slowapi.errors import RateLimitExceeded
-from app.core.rate_limit import limiter
+from app.api.v1.analytics import router as analytics_router
+from app.api.v1.models import router as models_router
+from app.api.v1.prefilter import router as prefilter_router
+from app.api.v1.policies import router as policies_router
+from app.api.v1.review import router as review_router
 from prometheus_fastapi_instrumentator import Instrumentator
+from prometheus_client import REGISTRY
 from app.core.logging import logger
+from app.services.broadcaster import broadcaster, Subscription
+from app.core.queues import QueueDepthCollector
+from app.ai.loader import models, worker_warm_state
+from app.core.tracing import configure_tracing
 
 app = FastAPI(title=settings.APP_NAME)
 
 Instrumentator().instrument(app).expose(app)
+REGISTRY.register(QueueDepthCollector())
 
-app.state.limiter = limiter
+app.include_router(
+    moderation_router,
+    prefix="/api/v1",
+)
 
-connections: list[WebSocket] = []
+app.include_router(
+    analytics_router,
+    prefix="/api/v1",
+)
 
-app.add_exception_handler(
-    RateLimitExceeded,
-    lambda request, exc: JSONResponse(
-        status_code=429,
-        content={"detail": "Rate limit exceeded"},
-    )
+app.include_router(
+    models_router,
+    prefix="/api/v1",
 )
 
 app.include_router(
-    moderation_router,
+    prefilter_router,
+    prefix="/api/v1",
+)
+
+app.include_router(
+    policies_router,
     prefix="/api/v1",
 )
 
-# Scheduler disabled on Windows (APScheduler has issues with billiard on Windows)
-# Enable in production with proper deployment setup
-# from apscheduler.schedulers.background import BackgroundScheduler
-# from app.services.cleanup_service import cleanup_old_content
-# scheduler = BackgroundScheduler()
-# scheduler.add_job(cleanup_old_content, "interval", days=1)
-# scheduler.start()
+app.include_router(
+    review_router,
+    prefix="/api/v1",
+)
+
+# Retention cleanup runs from Celery beat (see app/core/celery.py) or as
+# `python -m app.services.cleanup_service` from cron, not inside the API.
 
 @app.get("/")
 def root():
     return {"status": "Ok", "Service": settings.APP_NAME}
 
+@app.on_event("startup")
+def load_models():
+    # Inference runs in the workers, which preload MODEL_PRELOAD themselves
+    if settings.API_MODEL_PRELOAD:
+        models.start_background(settings.API_MODEL_PRELOAD)
+
+@app.on_event("startup")
+def start_tracing():
+    configure_tracing()
+
+_redis = None
+
+def redis_client():
+    global _redis
+    if _redis is None:
+        import redis
+        _redis = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+    return _redis
+
+def ping_redis():
+    redis_client().ping()
+
+def dependencies(db: Session) -> dict:
+    """What the API needs to accept work: its database and the Redis broker"""
+    checks = {}
+    for name, probe in (("database", lambda: db.execute(text("SELECT 1"))), ("redis", ping_redis)):
+        try:
+            probe()
+            checks[name] = "ok"
+        except Exception as e:
+            logger.warning(f"Readiness check {name} failed: {e}")
+            checks[name] = "error"
+    return checks
+
+def worker_models() -> dict:
+    """Warm state the worker processes last published; empty if Redis is unreachable"""
+    try:
+        return worker_warm_state(redis_client())
+    except Exception as e:
+        logger.warning(f"Reading worker warm state failed: {e}")
+        return {}
+
+def warm(workers: dict) -> bool:
+    """API_MODEL_PRELOAD is warm here and enough worker processes report theirs warm"""
+    warm_workers = sum(1 for state in workers.values() if state.get("ready"))
+    return models.warmed(settings.API_MODEL_PRELOAD) and warm_workers >= settings.HEALTH_MIN_WARM_WORKERS
+
 @app.get("/health")
 def health():
+    workers = worker_models()
     return {
         "api": "ok",
-        "env": settings.ENV
+        "env": settings.ENV,
+        "ready": warm(workers),
+        "models": models.status(settings.API_MODEL_PRELOAD),
+        "workers": workers,
     }
 
+@app.get("/health/ready")
+def ready(db: Session = Depends(get_db)):
+    """503 until the database and Redis answer and the models, here and in the workers, are warm"""
+    checks = dependencies(db)
+    workers = worker_models()
+    is_ready = warm(workers) and all(v == "ok" for v in checks.values())
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={
+            "ready": is_ready,
+            "checks": checks,
+            "models": models.status(settings.API_MODEL_PRELOAD),
+            "workers": workers,
+        },
+    )
+
 @app.websocket("/ws/moderation")
-async def moderation_ws(ws: WebSocket):
+async def moderation_ws(
+    ws: WebSocket,
+    source_app: list[str] = Query(None),
+    decision: list[str] = Query(None),
+):
+    """Live decisions, optionally filtered by ?source_app=...&decision=..."""
     await ws.accept()
-    connections.append(ws)
+    subscription = Subscription(source_apps=source_app, decisions=decision)
+    broadcaster.register(subscription)
     logger.info("WebSocket connected")
 
     try:
-        while True:
-            await ws.receive_text()
-    except Exception:
+        await broadcaster.serve(ws, subscription)
+    finally:
+        broadcaster.unregister(subscription)
         logger.info("WebSocket disconnected")
-        connections.remove(ws)
 
 
 @app.on_event("shutdown")
-def shutdown():
-    logger.info("Shutting down cleanly")
\ No newline at end of file
+async def shutdown():
+    await broadcaster.close()
+    logger.info("Shutting down cleanly")
@@ -1,7 +1,10 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
 from sqlalchemy.sql import func
 from app.core.database import Base
 
+# Statuses a human may need to look at; the review queue index covers only these
+REVIEW_STATUSES = ("flagged", "pending")
+
 class Content(Base):
     __tablename__ = 'content'
 
@@ -16,6 +19,23 @@ class Content(Base):
 
     status = Column(String, default='pending')
 
+    # Review queue order (0 first, like the Celery priorities) and lease
+    review_priority = Column(Integer, nullable=False, default=0, server_default="0")
+    claimed_by = Column(String, nullable=True)
+    lease_until = Column(DateTime(timezone=True), nullable=True)
+
     create_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    
\ No newline at end of file
+    __table_args__ = (
+        # Keyset order for retention cleanup
+        Index("ix_content_create_at_id", "create_at", "id"),
+    )
+
+
+# Keyset order of the review queue; partial, so decided content costs nothing
+Index(
+    "ix_content_review_queue",
+    Content.status, Content.review_priority, Content.create_at, Content.id,
+    postgresql_where=Content.status.in_(REVIEW_STATUSES),
+    sqlite_where=Content.status.in_(REVIEW_STATUSES),
+)
@@ -6,10 +6,21 @@ class ModerationResult(Base):
     __tablename__ = "moderation_result"
 
     id = Column(Integer, primary_key=True, index=True)
-    content_id = Column(Integer, ForeignKey("content.id"))
+    # Indexed for the retention job's per-chunk deletes
+    content_id = Column(Integer, ForeignKey("content.id"), index=True)
     category = Column(String, index=True)
     score = Column(Float)
     decision = Column(String)
     model_version = Column(String)
+    # Why the prefilter decided without a model, e.g. "term_block:12"
+    reason = Column(String)
 
     created_at = Column(DateTime(timezone = True), server_default=func.now())
+
+
+class ResultJournalEntry(Base):
+    """Ids of result journal entries already written, so a replayed flush writes them once"""
+    __tablename__ = "result_journal_entry"
+
+    id = Column(String, primary_key=True)
+    written_at = Column(DateTime(timezone = True), server_default=func.now(), index=True)
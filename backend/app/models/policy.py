@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class Policy(Base):
+    __tablename__ = "moderation_policies"
+
+    id = Column(Integer, primary_key=True)
+    # "*" replaces the built-in default for every source app without its own row
+    source_app = Column(String, unique=True, nullable=False)
+    document = Column(Text, nullable=False)  # ModerationPolicy JSON
+    version = Column(Integer, nullable=False, default=1)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
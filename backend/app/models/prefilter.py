@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class PrefilterEntry(Base):
+    __tablename__ = "prefilter_entries"
+
+    id = Column(Integer, primary_key=True)
+    # term_block | term_allow | domain_block | hash_block
+    list = Column(String, nullable=False, index=True)
+    value = Column(String, nullable=False)
+    note = Column(String)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("list", "value", name="uq_prefilter_entries_list_value"),
+    )
@@ -5,7 +5,7 @@ class Review(Base):
     __tablename__ = 'review'
 
     id = Column(Integer, primary_key=True)
-    content_id = Column(Integer, ForeignKey('content.id'))
+    content_id = Column(Integer, ForeignKey('content.id'), index=True)
     reviewer = Column(String)
     decision = Column(String)
     note = Column(String)
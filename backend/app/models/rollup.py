@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index, UniqueConstraint
+from app.core.database import Base
+
+class ModerationRollup(Base):
+    __tablename__ = "moderation_rollup"
+
+    id = Column(Integer, primary_key=True)
+    granularity = Column(String, nullable=False)  # minute | hour | day
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    # "*" rows count content items; other rows count per-label results
+    category = Column(String, nullable=False)
+    decision = Column(String, nullable=False)
+    model_version = Column(String, nullable=False, default="")
+    source_app = Column(String, nullable=False, default="")
+
+    count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "granularity", "bucket_start", "category", "decision", "model_version", "source_app",
+            name="uq_moderation_rollup_key",
+        ),
+        Index("ix_moderation_rollup_range", "granularity", "bucket_start"),
+    )
+
+
+class RollupBackfill(Base):
+    """Progress rolling up moderation_result rows written before rollups were kept"""
+    __tablename__ = "rollup_backfill"
+
+    id = Column(Integer, primary_key=True)  # one row
+    # First result id the result writer rolled up itself; backfill stops below it
+    until_id = Column(Integer, nullable=False)
+    # Results with lower ids are rolled up
+    done_id = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
 from app.core.database import Base
 
 class Webhook(Base):
@@ -7,3 +8,16 @@ class Webhook(Base):
     id = Column(Integer, primary_key=True)
     source_app = Column(String, unique=True)
     callback_url = Column(String)
+
+
+class WebhookDeadLetter(Base):
+    __tablename__ = "webhook_dead_letters"
+
+    id = Column(Integer, primary_key=True)
+    source_app = Column(String, index=True)
+    callback_url = Column(String)
+    payload = Column(Text)
+    error = Column(String)
+    attempts = Column(Integer)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class ModelRouting(BaseModel):
+    active: str
+    canary: Optional[str] = None
+    canary_percent: int = Field(0, ge=0, le=100)
+    shadow: Optional[str] = None
@@ -0,0 +1,39 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional
+from app.core.config import settings
+
+class Band(BaseModel):
+    """Scores above ``block`` block; scores above ``review`` (if set) need human review"""
+    block: float = Field(ge=0, le=1)
+    review: Optional[float] = Field(None, ge=0, le=1)
+
+    @model_validator(mode="after")
+    def review_below_block(self):
+        if self.review is not None and self.review > self.block:
+            if "review" in self.model_fields_set:
+                raise ValueError("review threshold must not exceed block threshold")
+            # A default review band above a lowered block threshold has no room
+            self.review = None
+        return self
+
+class TextPolicy(Band):
+    block: float = Field(default_factory=lambda: settings.MODERATION_POLICY_TEXT_BLOCK, ge=0, le=1)
+    review: Optional[float] = Field(default_factory=lambda: settings.MODERATION_POLICY_TEXT_REVIEW, ge=0, le=1)
+    # Per-label overrides, e.g. {"threat": {"block": 0.5}}
+    categories: dict[str, Band] = {}
+
+class MediaPolicy(Band):
+    block: float = Field(default_factory=lambda: settings.NSFW_THRESHOLD, ge=0, le=1)
+
+class ModerationPolicy(BaseModel):
+    text: TextPolicy = Field(default_factory=TextPolicy)
+    image: MediaPolicy = Field(default_factory=MediaPolicy)
+    video: MediaPolicy = Field(default_factory=MediaPolicy)
+    # Blocking modalities needed to block; fewer send the item to review
+    min_block_signals: int = Field(1, ge=1, le=3)
+
+class PolicyResponse(BaseModel):
+    source_app: str
+    # 0 when no policy is stored and the default applies
+    version: int
+    policy: ModerationPolicy
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+
+class PrefilterEntryCreate(BaseModel):
+    list: Literal["term_block", "term_allow", "domain_block", "hash_block"]
+    # For hash_block, the offending text itself; only its hash is stored
+    value: str
+    note: Optional[str] = None
+
+class PrefilterEntryResponse(BaseModel):
+    id: int
+    list: str
+    value: str
+    note: Optional[str] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,47 @@
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+
+class ReviewItem(BaseModel):
+    id: int
+    text: Optional[str] = None
+    image_url: Optional[str] = None
+    video_url: Optional[str] = None
+    content_type: Optional[str] = None
+    source_app: Optional[str] = None
+    status: str
+    review_priority: int
+    create_at: Optional[datetime] = None
+    claimed_by: Optional[str] = None
+    lease_until: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ReviewPage(BaseModel):
+    items: list[ReviewItem]
+    # Pass back as ?cursor= for the next page; None on the last one
+    next_cursor: Optional[str] = None
+
+class ClaimRequest(BaseModel):
+    reviewer: str = Field(min_length=1)
+    limit: Optional[int] = Field(None, ge=1)
+
+class ReleaseRequest(BaseModel):
+    reviewer: str = Field(min_length=1)
+    content_ids: list[int]
+
+class ReviewCreate(BaseModel):
+    reviewer: str = Field(min_length=1)
+    decision: Literal["approved", "blocked"]
+    note: Optional[str] = None
+
+class ReviewResponse(BaseModel):
+    id: int
+    content_id: int
+    reviewer: str
+    decision: str
+    note: Optional[str] = None
+
+    class Config:
+        from_attributes = True
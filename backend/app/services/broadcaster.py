@@ -0,0 +1,203 @@
+import asyncio
+import json
+import time
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import (
+    websocket_connections,
+    websocket_send_lag_seconds,
+    websocket_slow_consumers_total,
+)
+
+# WebSocket close code for "try again later"
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class DecisionPublisher:
+    """
+    Publishes moderation decisions from workers to the broadcast channel.
+
+    Publishing is best effort: Redis errors are logged and the publisher is
+    skipped for ``REDIS_RETRY_SECONDS`` so an outage never slows moderation.
+    """
+
+    REDIS_RETRY_SECONDS = 30
+
+    def __init__(self, redis_client=None, channel: str = None):
+        self._redis = redis_client
+        self.channel = channel or settings.BROADCAST_CHANNEL
+        self._redis_down_until = 0.0
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(
+                settings.REDIS_URL, socket_timeout=0.05, socket_connect_timeout=0.05
+            )
+        if self._redis_down_until > time.monotonic():
+            return None
+        return self._redis
+
+    def publish_many(self, events: list[dict]):
+        if not events or not settings.BROADCAST_ENABLED:
+            return
+        client = self.redis
+        if client is None:
+            return
+
+        published_at = time.time()
+        try:
+            pipe = client.pipeline(transaction=False)
+            for event in events:
+                pipe.publish(self.channel, json.dumps({**event, "published_at": published_at}))
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Decision broadcast unavailable: {e}")
+            self._redis_down_until = time.monotonic() + self.REDIS_RETRY_SECONDS
+
+
+class Subscription:
+    """One connected socket: its filters and its bounded send queue"""
+
+    def __init__(self, source_apps=None, decisions=None, queue_size: int = None):
+        self.source_apps = frozenset(source_apps or ())
+        self.decisions = frozenset(decisions or ())
+        self.queue = asyncio.Queue(queue_size or settings.BROADCAST_QUEUE_SIZE)
+        self.dropped = asyncio.Event()
+
+    def matches(self, event: dict) -> bool:
+        if self.source_apps and event.get("source_app") not in self.source_apps:
+            return False
+        if self.decisions and event.get("decision") not in self.decisions:
+            return False
+        return True
+
+    def offer(self, message: str, published_at: float = None) -> bool:
+        """Queue without waiting; a full queue marks the client as too slow"""
+        if self.dropped.is_set():
+            return False
+        try:
+            self.queue.put_nowait((message, published_at))
+        except asyncio.QueueFull:
+            self.dropped.set()
+            websocket_slow_consumers_total.inc()
+            return False
+        return True
+
+
+class Broadcaster:
+    """
+    Fans decisions published on the Redis channel out to this process's sockets.
+
+    Each API process holds one pub/sub subscription. Every event is decoded
+    once, matched against each socket's filters and put on that socket's
+    bounded queue, so a slow reader is disconnected instead of delaying
+    everyone else.
+    """
+
+    def __init__(self, redis_factory=None, channel: str = None):
+        self._redis_factory = redis_factory
+        self.channel = channel or settings.BROADCAST_CHANNEL
+        self.subscriptions: set[Subscription] = set()
+        self._task = None
+        self._loop = None
+
+    def _connect(self):
+        if self._redis_factory is not None:
+            return self._redis_factory()
+        import redis.asyncio as aioredis
+        return aioredis.Redis.from_url(settings.REDIS_URL)
+
+    def register(self, subscription: Subscription):
+        self.subscriptions.add(subscription)
+        websocket_connections.set(len(self.subscriptions))
+        self._ensure_listener()
+
+    def unregister(self, subscription: Subscription):
+        self.subscriptions.discard(subscription)
+        websocket_connections.set(len(self.subscriptions))
+
+    def dispatch(self, raw) -> int:
+        """Fan one published event out to matching sockets; returns how many got it"""
+        message = raw.decode() if isinstance(raw, bytes) else raw
+        event = json.loads(message)
+        published_at = event.get("published_at")
+
+        delivered = 0
+        for subscription in tuple(self.subscriptions):
+            if subscription.matches(event) and subscription.offer(message, published_at):
+                delivered += 1
+        return delivered
+
+    def _ensure_listener(self):
+        # One listener per event loop; restarted if it died or the loop changed
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._task = loop.create_task(self._listen())
+
+    async def _listen(self):
+        while True:
+            client = self._connect()
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.dispatch(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Decision broadcast subscription lost, retrying: {e}")
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.aclose()
+                    await client.aclose()
+                except Exception:
+                    pass
+
+    async def serve(self, ws, subscription: Subscription):
+        """Pump ``subscription`` into ``ws`` until the client leaves or falls behind"""
+        sender = asyncio.create_task(self._send(ws, subscription))
+        receiver = asyncio.create_task(self._receive(ws))
+        dropped = asyncio.create_task(subscription.dropped.wait())
+        try:
+            done, _ = await asyncio.wait({sender, receiver, dropped}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (sender, receiver, dropped):
+                task.cancel()
+        for task in done:
+            task.exception()  # disconnects surface here; nothing to do with them
+
+        if subscription.dropped.is_set():
+            logger.info("WebSocket dropped: send queue overflowed")
+            try:
+                await ws.close(code=SLOW_CONSUMER_CLOSE_CODE)
+            except Exception:
+                pass
+
+    @staticmethod
+    async def _send(ws, subscription: Subscription):
+        while True:
+            message, published_at = await subscription.queue.get()
+            await ws.send_text(message)
+            if published_at:
+                websocket_send_lag_seconds.observe(max(time.time() - published_at, 0))
+
+    @staticmethod
+    async def _receive(ws):
+        # Clients don't send anything meaningful; this only notices disconnects
+        while True:
+            await ws.receive_text()
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+decision_publisher = DecisionPublisher()
+broadcaster = Broadcaster()
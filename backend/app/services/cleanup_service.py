@@ -1,20 +1,100 @@
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, delete, tuple_
 from sqlalchemy.orm import Session
 from app.models.content import Content
-from app.core.database import SessionLocal
+from app.models.moderation_result import ModerationResult
+from app.models.review import Review
+from app.core.database import SessionLocal, keyset_column
 from app.core.config import settings
+from app.core.metrics import retention_rows_deleted_total, retention_cursor_timestamp, retention_last_success
+from app.services.result_writer import prune_journal
+from app.services.rollup_service import prune_rollups
 import logging
 
 logger = logging.getLogger("moderator_cleanup")
 
-def cleanup_old_content():
-    db: Session = SessionLocal()
-    cutoff_date = datetime.utcnow() - timedelta(days=DELETE_AFTER_DAYS)
-    old_contents = db.query(Content).filter(Content.created_at < cutoff_date).all()
 
-    for content in old_contents:
-        logger.info(f"Deleting content id = {content.id} created at {content.created_at}")
-        db.delete(content)
+def delete_chunk(db: Session, ids: list[int]) -> int:
+    """Delete content rows and everything that references them, set-based"""
+    for model in (ModerationResult, Review):
+        deleted = db.execute(delete(model).where(model.content_id.in_(ids))).rowcount
+        retention_rows_deleted_total.labels(table=model.__tablename__).inc(deleted)
 
-    db.commit()
-    db.close()
+    deleted = db.execute(delete(Content).where(Content.id.in_(ids))).rowcount
+    retention_rows_deleted_total.labels(table=Content.__tablename__).inc(deleted)
+    return deleted
+
+
+def cleanup_old_content(
+    cutoff: datetime = None,
+    chunk_size: int = None,
+    rows_per_second: float = None,
+    session_factory=None,
+) -> int:
+    """
+    Delete content older than ``cutoff`` in short keyset-paginated transactions.
+
+    Each chunk walks (create_at, id) forward from the previous one, so every
+    SELECT is an index range scan and no transaction holds locks for longer
+    than one chunk. Chunks are paced to stay under ``rows_per_second``.
+    """
+    cutoff = cutoff or datetime.now(timezone.utc) - timedelta(days=settings.DELETE_AFTER_DAYS)
+    chunk_size = chunk_size or settings.RETENTION_CHUNK_SIZE
+    rows_per_second = rows_per_second or settings.RETENTION_ROWS_PER_SECOND
+    session_factory = session_factory or SessionLocal
+
+    cursor = None
+    total = 0
+
+    while True:
+        started = time.monotonic()
+        db: Session = session_factory()
+        try:
+            created = keyset_column(db, Content.create_at)
+            query = (
+                select(Content.id, Content.create_at, created.label("cursor_at"))
+                .where(Content.create_at < cutoff)
+                .order_by(Content.create_at, Content.id)
+                .limit(chunk_size)
+            )
+            if cursor is not None:
+                query = query.where(tuple_(created, Content.id) > cursor)
+
+            rows = db.execute(query).all()
+            if not rows:
+                break
+
+            total += delete_chunk(db, [row.id for row in rows])
+            db.commit()
+        finally:
+            db.close()
+
+        last = rows[-1]
+        cursor = (last.cursor_at, last.id)
+        retention_cursor_timestamp.set(last.create_at.timestamp())
+        logger.info(f"Retention deleted {total} rows so far (cursor id={last.id})")
+
+        # Pace chunks so the job never exceeds its rows/sec budget
+        pause = len(rows) / rows_per_second - (time.monotonic() - started)
+        if pause > 0:
+            time.sleep(pause)
+
+    db = session_factory()
+    try:
+        pruned = prune_rollups(db)
+        forgotten = prune_journal(db)
+        db.commit()
+    finally:
+        db.close()
+    retention_rows_deleted_total.labels(table="moderation_rollup").inc(pruned)
+    retention_rows_deleted_total.labels(table="result_journal_entry").inc(forgotten)
+
+    retention_last_success.set_to_current_time()
+    logger.info(f"Retention cleanup finished: {total} content rows older than {cutoff} deleted")
+    return total
+
+
+if __name__ == "__main__":
+    # Entry point for cron / Kubernetes CronJob deployments
+    cleanup_old_content()
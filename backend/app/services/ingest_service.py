@@ -0,0 +1,128 @@
+import json
+from pydantic import ValidationError
+from sqlalchemy import insert
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.queues import priority_for
+from app.core.tracing import stage, timed
+from app.models.content import Content
+from app.schemas.content import ContentCreate
+
+
+class LineTooLong(ValueError):
+    pass
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streams the response while the request body is still being read.
+
+    StreamingResponse normally listens for client disconnects on
+    ``receive`` concurrently, which would steal the request body chunks
+    our generator is consuming.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_ndjson_lines(stream, max_line_bytes: int = None):
+    """Yield (line_number, raw_line) from an async byte stream without buffering the body"""
+    max_line_bytes = max_line_bytes or settings.BULK_MAX_LINE_BYTES
+    buffer = b""
+    line_no = 0
+
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield line_no, line
+        if len(buffer) > max_line_bytes:
+            raise LineTooLong(f"line {line_no + 1} exceeds {max_line_bytes} bytes")
+
+    if buffer.strip():
+        yield line_no + 1, buffer
+
+
+async def insert_contents(session_factory, rows: list[dict]) -> list[int]:
+    """Insert a chunk of rows with a single multi-row INSERT and return their ids in order"""
+    with stage("ingest"):
+        async with session_factory() as db:
+            result = await db.execute(
+                insert(Content).returning(Content.id, sort_by_parameter_order=True),
+                rows,
+            )
+            ids = result.scalars().all()
+            await db.commit()
+            return ids
+
+
+@timed("enqueue")
+def enqueue_moderation(content_ids: list[int], source_apps: list[str]):
+    """Queue batch tasks, grouping ids so each task carries one priority"""
+    chunk_size = settings.BULK_TASK_CHUNK_SIZE
+    by_priority: dict[int, list[int]] = {}
+    for content_id, source_app in zip(content_ids, source_apps):
+        by_priority.setdefault(priority_for(source_app), []).append(content_id)
+    try:
+        from app.workers.moderation_worker import moderate_content_batch_task
+        for priority, ids in by_priority.items():
+            for i in range(0, len(ids), chunk_size):
+                moderate_content_batch_task.apply_async((ids[i:i + chunk_size],), priority=priority)
+    except Exception as e:
+        # Rows stay 'pending' and can be re-queued; ingestion must not fail
+        logger.error(f"Failed to enqueue bulk moderation: {e}")
+
+
+async def ingest_ndjson(stream, session_factory):
+    """
+    Parse NDJSON content items from ``stream`` and persist them in chunks.
+
+    Yields one NDJSON line per input item: ``{"line", "external_id", "id"}``
+    for accepted items, ``{"line", "error"}`` for rejected ones.
+    """
+    chunk_size = settings.BULK_INSERT_CHUNK_SIZE
+    pending: list[tuple[int, dict]] = []
+
+    async def flush():
+        rows = [row for _, row in pending]
+        ids = await insert_contents(session_factory, rows)
+        await run_in_threadpool(enqueue_moderation, ids, [row["source_app"] for row in rows])
+        out = "".join(
+            json.dumps({"line": line_no, "external_id": row["external_id"], "id": content_id}) + "\n"
+            for (line_no, row), content_id in zip(pending, ids)
+        )
+        pending.clear()
+        return out
+
+    try:
+        async for line_no, raw in iter_ndjson_lines(stream):
+            try:
+                item = ContentCreate.model_validate_json(raw)
+            except ValidationError as e:
+                yield json.dumps({"line": line_no, "error": e.errors(include_url=False)}, default=str) + "\n"
+                continue
+
+            pending.append((line_no, item.model_dump()))
+            if len(pending) >= chunk_size:
+                yield await flush()
+    except LineTooLong as e:
+        if pending:
+            yield await flush()
+        yield json.dumps({"error": str(e)}) + "\n"
+        return
+
+    if pending:
+        yield await flush()
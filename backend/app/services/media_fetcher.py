@@ -0,0 +1,462 @@
+import asyncio
+import contextlib
+import hashlib
+import io
+import ipaddress
+import os
+import socket
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import httpx
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import media_cache_lookups_total, media_fetched_bytes_total
+from app.core.tracing import stage
+
+CHUNK = 64 * 1024
+
+
+class MediaFetchError(Exception):
+    """A remote asset could not be fetched"""
+
+
+class MediaTooLarge(MediaFetchError):
+    """A remote asset is bigger than MEDIA_MAX_BYTES"""
+
+
+class MediaBlocked(MediaFetchError):
+    """A remote asset, or a redirect to it, points at a host media may not come from"""
+
+
+def is_remote(location) -> bool:
+    return isinstance(location, str) and location.startswith(("http://", "https://"))
+
+
+def _digest(data: str) -> str:
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class BlobCache:
+    """
+    Fetched media on local disk, content-addressed and evicted least recently used.
+
+    Blobs live at ``blobs/<sha256[:2]>/<sha256>`` and each fetched URL has a
+    symlink ``refs/<sha256(url)>`` to its blob, so an asset is downloaded
+    once per host however many tasks ask for it, and stored once however
+    many URLs serve it. Everything is written under ``tmp/`` and renamed
+    into place, so concurrent processes never see a partial file. A hit
+    touches the blob; once the cache passes ``max_bytes`` the least recently
+    used blobs are deleted down to 90% and dangling refs are dropped.
+    """
+
+    def __init__(self, directory: str = None, max_bytes: int = None):
+        self.directory = Path(directory or settings.MEDIA_CACHE_DIR)
+        self.max_bytes = max_bytes or settings.MEDIA_CACHE_MAX_BYTES
+        self.tmp = self.directory / "tmp"
+        for sub in ("blobs", "refs", "tmp"):
+            (self.directory / sub).mkdir(parents=True, exist_ok=True)
+        self._size = None
+        self._lock = threading.Lock()
+
+    def _ref(self, url: str) -> Path:
+        return self.directory / "refs" / _digest(url)
+
+    def _blob(self, digest: str) -> Path:
+        return self.directory / "blobs" / digest[:2] / digest
+
+    def get(self, url: str):
+        """Path of ``url``'s cached blob, or None"""
+        ref = self._ref(url)
+        try:
+            blob = ref.resolve(strict=True)
+            os.utime(blob)
+        except (FileNotFoundError, RuntimeError):
+            media_cache_lookups_total.labels(outcome="miss").inc()
+            return None
+        media_cache_lookups_total.labels(outcome="hit").inc()
+        return blob
+
+    def put(self, url: str, temp_path: Path, digest: str) -> Path:
+        """Move a fetched file from ``tmp/`` into the cache under ``url``"""
+        blob = self._blob(digest)
+        blob.parent.mkdir(exist_ok=True)
+        size = temp_path.stat().st_size
+        if blob.exists():
+            temp_path.unlink()  # same bytes under another URL
+            os.utime(blob)
+            size = 0
+        else:
+            os.replace(temp_path, blob)
+
+        link = self.tmp / f"{_digest(url)}.{os.getpid()}.{threading.get_ident()}"
+        link.symlink_to(os.path.relpath(blob, self._ref(url).parent))
+        os.replace(link, self._ref(url))
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += size
+            if self._size > self.max_bytes:
+                self._evict()
+        return blob
+
+    def _blobs(self):
+        for shard in os.scandir(self.directory / "blobs"):
+            for entry in os.scandir(shard.path):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # evicted by another process
+                yield stat.st_mtime, stat.st_size, entry.path
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._blobs())
+
+    def _evict(self):
+        # Other processes write to the same cache, so size it from disk
+        blobs = sorted(self._blobs())
+        total = sum(size for _, size, _ in blobs)
+        target = self.max_bytes * 0.9
+        for _, size, path in blobs:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        for entry in os.scandir(self.directory / "refs"):
+            if not os.path.exists(entry.path):
+                os.remove(entry.path)
+        self._size = total
+
+
+class MediaFetcher:
+    """
+    Downloads remote images and videos for the models, off the worker thread.
+
+    Requests go through one pooled keep-alive ``httpx.AsyncClient`` on a
+    background event loop (one per process, like the webhook dispatcher);
+    the synchronous ``fetch`` and ``fetch_range`` wait for them. ``fetch``
+    streams an asset to the cache's temp area, hashing as it goes, and
+    gives up as soon as it passes MEDIA_MAX_BYTES; at most
+    MEDIA_MAX_CONCURRENT_FETCHES downloads run at once per process, which
+    bounds the temp area, and concurrent fetches of one URL share a single
+    download.
+
+    URLs come from clients, so every request, including each redirect hop,
+    is checked before it is sent: the host must be allowed
+    (MEDIA_ALLOWED_HOSTS) and resolve only to public addresses.
+    """
+
+    def __init__(self, cache: BlobCache = None):
+        self._cache = cache
+        self._lock = threading.Lock()
+        self._pid = None
+        self._loop = None
+
+    @property
+    def cache(self) -> BlobCache:
+        if self._cache is None:
+            self._cache = BlobCache()
+        return self._cache
+
+    def fetch(self, url: str) -> Path:
+        """Local path of ``url``'s bytes, downloading them unless cached"""
+        cached = self.cache.get(url)
+        if cached is not None:
+            return cached
+        with stage("media_fetch"):
+            return self._run(self._fetch_shared(url))
+
+    def fetch_range(self, url: str, start: int, end: int) -> tuple[bytes, int]:
+        """Bytes ``start``..``end`` (inclusive) of ``url`` and its total size"""
+        return self._run(self._fetch_range(url, start, end))
+
+    def size(self, url: str):
+        """Total size of ``url`` from a one-byte range request, or None if not reported"""
+        return self.fetch_range(url, 0, 0)[1]
+
+    def close(self, timeout: float = 10):
+        if self._loop is None or self._pid != os.getpid():
+            return
+        asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result(timeout)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+        self._pid = None
+
+    def _run(self, coro):
+        timeout = settings.MEDIA_FETCH_TIMEOUT_SECONDS
+        future = asyncio.run_coroutine_threadsafe(asyncio.wait_for(coro, timeout), self._ensure_started())
+        try:
+            return future.result()
+        except asyncio.TimeoutError as e:
+            raise MediaFetchError(f"Fetch took longer than {timeout}s") from e
+
+    def _ensure_started(self):
+        # Each forked worker process needs its own loop thread and client
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    loop = asyncio.new_event_loop()
+                    self._inflight = {}
+                    self._slots = asyncio.Semaphore(settings.MEDIA_MAX_CONCURRENT_FETCHES)
+                    # Redirects are followed by _get, which checks every hop
+                    self._client = httpx.AsyncClient(
+                        timeout=settings.MEDIA_FETCH_TIMEOUT_SECONDS,
+                        limits=httpx.Limits(
+                            max_connections=settings.MEDIA_MAX_CONNECTIONS,
+                            max_keepalive_connections=settings.MEDIA_MAX_CONNECTIONS,
+                        ),
+                    )
+                    threading.Thread(target=loop.run_forever, name="media-fetcher", daemon=True).start()
+                    self._loop = loop
+                    self._pid = pid
+        return self._loop
+
+    # Event loop side
+
+    @contextlib.asynccontextmanager
+    async def _get(self, url: str, headers: dict = None):
+        """Stream a GET of ``url``, following redirects to allowed hosts only"""
+        for _ in range(settings.MEDIA_MAX_REDIRECTS + 1):
+            current = httpx.URL(url)
+            request = self._client.build_request(
+                "GET", await _checked(current), headers={**(headers or {}), "Host": current.netloc.decode()}
+            )
+            response = await self._client.send(request, stream=True)
+            if not response.is_redirect:
+                break
+            await response.aclose()
+            url = str(httpx.URL(url).join(response.headers["location"]))
+        else:
+            raise MediaFetchError(f"{url}: more than {settings.MEDIA_MAX_REDIRECTS} redirects")
+        try:
+            yield response
+        finally:
+            await response.aclose()
+
+    async def _fetch_shared(self, url: str) -> Path:
+        download = self._inflight.get(url)
+        if download is None:
+            download = self._inflight[url] = asyncio.ensure_future(self._fetch(url))
+            download.add_done_callback(lambda _: self._inflight.pop(url, None))
+        return await asyncio.shield(download)
+
+    async def _fetch(self, url: str) -> Path:
+        limit = settings.MEDIA_MAX_BYTES
+        async with self._slots:
+            fd, name = tempfile.mkstemp(dir=self.cache.tmp)
+            temp_path = Path(name)
+            try:
+                sha = hashlib.sha256()
+                received = 0
+                with os.fdopen(fd, "wb") as out:
+                    async with self._get(url) as response:
+                        _check(response, url)
+                        length = response.headers.get("content-length")
+                        if length is not None and int(length) > limit:
+                            raise MediaTooLarge(f"{url} is {int(length)} bytes, limit {limit}")
+                        async for chunk in response.aiter_bytes(CHUNK):
+                            received += len(chunk)
+                            if received > limit:
+                                raise MediaTooLarge(f"{url} is over {limit} bytes")
+                            sha.update(chunk)
+                            out.write(chunk)
+                media_fetched_bytes_total.labels(mode="full").inc(received)
+                return self.cache.put(url, temp_path, sha.hexdigest())
+            except httpx.HTTPError as e:
+                raise MediaFetchError(f"Fetching {url} failed: {e}") from e
+            finally:
+                temp_path.unlink(missing_ok=True)
+
+    async def _fetch_range(self, url: str, start: int, end: int) -> tuple[bytes, int]:
+        limit = end - start + 1
+        data = bytearray()
+        try:
+            async with self._get(url, headers={"Range": f"bytes={start}-{end}"}) as response:
+                _check(response, url)
+                if response.status_code != 206:
+                    raise MediaFetchError(f"{url} does not support range requests")
+                async for chunk in response.aiter_bytes(CHUNK):
+                    data += chunk
+                    if len(data) > limit:
+                        raise MediaTooLarge(f"{url} sent over {limit} bytes for range {start}-{end}")
+        except httpx.HTTPError as e:
+            raise MediaFetchError(f"Fetching {url} bytes {start}-{end} failed: {e}") from e
+        data = bytes(data)
+        media_fetched_bytes_total.labels(mode="range").inc(len(data))
+        total = response.headers.get("content-range", "").rpartition("/")[2]
+        return data, int(total) if total.isdigit() else None
+
+
+def _allowed_host(host: str) -> bool:
+    allowed = settings.MEDIA_ALLOWED_HOSTS
+    return not allowed or any(host == h or host.endswith(f".{h}") for h in allowed)
+
+
+def _public(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global
+
+
+async def _checked(url: httpx.URL) -> httpx.URL:
+    """
+    The URL to request for ``url`` once its host passes the checks.
+
+    Plain http is pinned to the address that was checked, so a second DNS
+    lookup can't point the connection elsewhere. https keeps the name:
+    certificate verification already fails on any other server.
+    """
+    if url.scheme not in ("http", "https"):
+        raise MediaBlocked(f"{url}: only http and https media can be fetched")
+    if not _allowed_host(url.host):
+        raise MediaBlocked(f"{url}: {url.host} is not in MEDIA_ALLOWED_HOSTS")
+    port = url.port or (443 if url.scheme == "https" else 80)
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(url.host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        raise MediaFetchError(f"{url}: cannot resolve {url.host}: {e}") from e
+    addresses = [info[4][0] for info in infos]
+    if not settings.MEDIA_ALLOW_PRIVATE_ADDRESSES:
+        private = [a for a in addresses if not _public(a)]
+        if private:
+            raise MediaBlocked(f"{url}: {url.host} resolves to non-public address {private[0]}")
+    return url if url.scheme == "https" else url.copy_with(host=addresses[0])
+
+
+def _check(response, url):
+    if response.status_code >= 400:
+        raise MediaFetchError(f"Fetching {url} returned HTTP {response.status_code}")
+
+
+class RemoteFile(io.RawIOBase):
+    """
+    A seekable, read-only remote file that downloads only what is read.
+
+    Reads are served from ``block_size`` blocks fetched with range
+    requests (adjacent missing blocks in one request) and kept in a small
+    LRU. Fetching more than MEDIA_MAX_BYTES in total raises MediaTooLarge.
+    Without ``size``, it is asked for with a one-byte range request.
+    """
+
+    def __init__(
+        self, fetcher: MediaFetcher, url: str, block_size: int = None, max_blocks: int = 16, size: int = None
+    ):
+        self.fetcher = fetcher
+        self.url = url
+        self.block_size = block_size or settings.MEDIA_RANGE_BLOCK_BYTES
+        self.max_blocks = max_blocks
+        self.fetched = 0
+        self._blocks = OrderedDict()
+        self._position = 0
+        self.size = size if size is not None else fetcher.size(url)
+        if self.size is None:
+            raise MediaFetchError(f"{url} did not report its size")
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: self.size}[whence]
+        self._position = max(base + offset, 0)
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        end = min(self._position + len(buffer), self.size)
+        if end <= self._position:
+            return 0
+        first, last = self._position // self.block_size, (end - 1) // self.block_size
+        self._load(first, last)
+
+        view = memoryview(buffer)
+        written = 0
+        for index in range(first, last + 1):
+            block = self._blocks[index]
+            begin = max(self._position - index * self.block_size, 0)
+            stop = min(end - index * self.block_size, len(block))
+            view[written:written + stop - begin] = block[begin:stop]
+            written += stop - begin
+        self._position = end
+        return written
+
+    def _load(self, first: int, last: int):
+        missing = [i for i in range(first, last + 1) if i not in self._blocks]
+        for i in range(first, last + 1):
+            if i in self._blocks:
+                self._blocks.move_to_end(i)
+        # Consecutive missing blocks come in one request
+        runs = []
+        for index in missing:
+            if runs and runs[-1][1] == index - 1:
+                runs[-1][1] = index
+            else:
+                runs.append([index, index])
+        for start, stop in runs:
+            begin = start * self.block_size
+            end = min((stop + 1) * self.block_size, self.size) - 1
+            if self.fetched + end - begin + 1 > settings.MEDIA_MAX_BYTES:
+                raise MediaTooLarge(f"Reading {self.url} would fetch over {settings.MEDIA_MAX_BYTES} bytes")
+            data, _ = self.fetcher.fetch_range(self.url, begin, end)
+            for index in range(start, stop + 1):
+                offset = (index - start) * self.block_size
+                self._keep(index, data[offset:offset + self.block_size])
+        # Blocks of this read must survive the trim even past max_blocks
+        while len(self._blocks) > max(self.max_blocks, last - first + 1):
+            self._blocks.popitem(last=False)
+
+    def _keep(self, index: int, data: bytes):
+        self.fetched += len(data)
+        self._blocks[index] = data
+        self._blocks.move_to_end(index)
+
+
+media_fetcher = MediaFetcher()
+
+
+def local_media(location):
+    """A local path for ``location``: remote URLs are fetched (or taken from the cache)"""
+    if not is_remote(location):
+        return location
+    return str(media_fetcher.fetch(location))
+
+
+def open_remote_video(url: str):
+    """
+    A VideoSource for a remote video.
+
+    The size comes from a one-byte range request. Videos up to
+    MEDIA_VIDEO_FULL_FETCH_BYTES are fetched whole, so the cache can serve
+    them to later tasks; bigger ones are decoded from a
+    RemoteFile when PyAV is installed, so only the container index and the
+    frames sampled are downloaded. Without PyAV, or if the server ignores
+    range requests, the video is fetched whole up to MEDIA_MAX_BYTES.
+    """
+    from app.ai.vision.video_frames import open_video, open_video_stream
+
+    cached = media_fetcher.cache.get(url)
+    if cached is not None:
+        return open_video(str(cached))
+    if open_video_stream is not None:
+        try:
+            size = media_fetcher.size(url)
+        except MediaFetchError as e:
+            logger.info(f"Sampling {url} by range unavailable, fetching it whole: {e}")
+        else:
+            if size is not None and size > settings.MEDIA_VIDEO_FULL_FETCH_BYTES:
+                return open_video_stream(RemoteFile(media_fetcher, url, size=size))
+    return open_video(str(media_fetcher.fetch(url)))
@@ -1,108 +1,411 @@
 from sqlalchemy.orm import Session
 from app.core.database import SessionLocal
 from app.models.content import Content
-from app.ai.nlp.toxicity import analyze_text
-from app.ai.pipelines.decision_engine import decide_text
-from app.ai.vision.nsfw import analyze_image
-from app.models.moderation_result import ModerationResult
-#from app.services.webhook_service import send_webhook
+from app.ai.nlp.toxicity import analyze_texts
+from app.ai.vision.nsfw import nsfw_score
+from app.services.webhook_services import webhook_dispatcher
+from app.services.broadcaster import decision_publisher
+from app.core.config import settings
 from app.core.logging import logger
-from app.ai.nlp.toxicity_multilingual import analyze_text_multilingual
-from app.ai.nlp.language_detect import detect_language
+from app.ai.nlp.toxicity_multilingual import analyze_texts_multilingual, MODEL_VERSION as MULTILINGUAL_MODEL_VERSION
+from app.ai.pipelines.canary_router import select_model_for
+from app.ai.nlp.language_detect import detect_languages
 from app.services.video_moderation_service import moderate_video
-from app.services.pii_service import mask_email, hash_username
+from app.services.verdict_cache import verdict_cache
+from app.services.result_writer import result_writer
+from app.services.pii_service import pii_engine
+from app.services.prefilter_service import prefilter
+from app.services.policy_service import policy_engine
+from app.services.media_fetcher import local_media
+from app.ai.inference_pool import inference_pool
 import time
+from types import SimpleNamespace
+from datetime import datetime, timezone
 from app.core.metrics import (
     moderation_requests_total,
     moderation_decisions_total,
-    moderation_duration_seconds
+    moderation_duration_seconds,
+    moderation_end_to_end_seconds,
 )
+from app.core.tracing import stage
 
 
-def save_results(db, content_id, results, decision, model_version):
-    for r in results:
-        db.add(
-            ModerationResult(
-                content_id=content_id,
-                category=r["label"],
-                score=r["score"],
-                decision=decision,
-                model_version=model_version
-            )
-        )
-def run_moderation(content_id:int):
-    db: Session = SessionLocal()
-    content = db.query(Content).get(content_id)
-    start_time = time.time()
-    moderation_requests_total.inc()
+def score_texts(contents):
+    """
+    Score every text in one batched pass per model version.
 
-    if not content:
-        db.close()
-        return
-    decision = "approved"
+    Returns ``{"results", "model_version"}`` keyed by content id. English
+    texts use the version the registry routes their content hash to, so
+    canary assignment matches the verdict cache key. PII is redacted first,
+    so the models (and any shadow model) never see it.
+    """
+    contents = [content for content in contents if content.text]
+    texts = [content.text for content in contents]
+    if settings.PII_REDACTION_ENABLED:
+        with stage("pii", modality="text"):
+            texts = pii_engine.redact_many(texts)
 
-    if content.text:
-        clean_text = mask_email(content.text)
-        lang = detect_language(content.text)
+    with stage("langid", modality="text"):
+        languages = detect_languages(texts)
+    english, other = [], []
+    # Unconfident ("unknown") texts go to the multilingual model
+    for content, text, language in zip(contents, texts, languages):
+        if language == "en":
+            english.append((content, text))
+        else:
+            other.append((content, text))
 
-        try:
-            if lang == "en":
-                text_results = analyze_text(content.text)
-            else:
-                text_results = analyze_text_multilingual(content.text)
-
-            decision, model_version = decide_text(text_results)
-
-            save_results(
-                db=db,
-                content_id=content.id,
-                results=text_results,
-                decision=decision,
-                model_version=model_version
-            )
-        except Exception as e:
-            logger.error(f"AI text model failed: {e}")
-            decision = "approved"  # safe default
-            model_version = "error"
+    scores = {}
+    try:
+        if english:
+            versions = [select_model_for(c.text, c.image_url, c.video_url) for c, _ in english]
+            analysis = analyze_texts([text for _, text in english], versions)
+            for (content, _), results, version in zip(english, analysis["results"], analysis["model_versions"]):
+                scores[content.id] = {"results": results, "model_version": version}
+        if other:
+            with stage("text_model", modality="text", model_version=MULTILINGUAL_MODEL_VERSION):
+                results = analyze_texts_multilingual([text for _, text in other])
+            for (content, _), result in zip(other, results):
+                scores[content.id] = {"results": result, "model_version": MULTILINGUAL_MODEL_VERSION}
+    except Exception as e:
+        logger.error(f"AI text model failed: {e}")
+
+    return scores
+
+
+def text_signal(content, scored) -> dict:
+    if scored is None:
+        # no text signal when the text model failed
+        return {"modality": "text", "model_version": "error", "results": [], "failed": True}
+    return {
+        "modality": "text",
+        "model_version": scored["model_version"],
+        "results": scored["results"],
+        "failed": False,
+    }
+
+
+def image_signal(content) -> dict:
+    try:
+        image = local_media(content.image_url)
+        with stage("image_model", modality="image"):
+            score = nsfw_score(image)
+    except Exception as e:
+        logger.error(f"AI image model failed: {e}")
+        return {"modality": "image", "score": 0.0, "failed": True}
+    return {"modality": "image", "score": score, "failed": False}
+
+
+def video_signal(content, threshold: float = None) -> dict:
+    try:
+        # Scanning can stop at the first frame this source app would block on
+        if threshold is None:
+            threshold = policy_engine.block_threshold(content.source_app, "video")
+        with stage("video_scan", modality="video"):
+            report = moderate_video(content.video_url, threshold=threshold)
+    except Exception as e:
+        logger.error(f"Video moderation failed: {e}")
+        return {"modality": "video", "score": 0.0, "failed": True}
+    return {"modality": "video", "score": report.score, "failed": False}
+
+
+def merge_verdicts(items):
+    """
+    Decide ``(source_app, partials)`` items with one policy evaluation.
+
+    Returns ``(verdict, failed)`` per item; any failed partial marks the
+    verdict failed, so it is not cached.
+    """
+    with stage("policy"):
+        decisions = policy_engine.decide_many(items)
+    merged = []
+    for (_, partials), decision in zip(items, decisions):
+        verdict = {"decision": decision, "model_version": None, "results": []}
+        failed = False
+        for partial in partials:
+            if "model_version" in partial:
+                verdict["model_version"] = partial["model_version"]
+                verdict["results"] = partial["results"]
+            if partial.get("reason"):
+                verdict["reason"] = partial["reason"]
+            failed = failed or partial["failed"]
+        merged.append((verdict, failed))
+    return merged
+
+
+def failed_signal(modality: str) -> dict:
+    return {"modality": modality, "score": 0.0, "failed": True}
 
+
+def analyze(contents, media):
+    """
+    Text scores for ``contents`` and image/video signals for ``media``.
+
+    Everything is submitted to the inference pool before anything is
+    awaited, so with INFERENCE_POOL_WORKERS set a multi-modal item takes
+    about as long as its slowest modality. A modality that misses its
+    INFERENCE_TIMEOUTS deadline comes back failed. Returns text scores by
+    content id and ``{content id: {modality: signal}}``.
+    """
+    # Plain records: the pool pickles its arguments
+    records = {
+        c.id: SimpleNamespace(id=c.id, text=c.text, image_url=c.image_url, video_url=c.video_url, source_app=c.source_app)
+        for c in contents
+    }
+    text = inference_pool.submit("text", score_texts, list(records.values())) if records else None
+    pending = []
+    for content in media:
+        record = records[content.id]
+        if content.image_url:
+            pending.append((content.id, "image", inference_pool.submit("image", image_signal, record)))
+        if content.video_url:
+            threshold = policy_engine.block_threshold(content.source_app, "video")
+            pending.append((content.id, "video", inference_pool.submit("video", video_signal, record, threshold)))
+
+    text_scores = inference_pool.result(text, "text", fallback={}) if text is not None else {}
+    signals = {}
+    for content_id, modality, future in pending:
+        signals.setdefault(content_id, {})[modality] = inference_pool.result(
+            future, modality, fallback=failed_signal(modality)
+        )
+    return text_scores, signals
+
+
+def evaluate(content, scored=None, media=None) -> list[dict]:
+    """An item's signals: its text scores and the image/video signals in ``media``"""
+    media = media or {}
+    partials = []
+    if content.text:
+        partials.append(text_signal(content, scored))
     if content.image_url:
-        try:
-            image_results = analyze_image(content.image_url)
-            if image_results:
-                decision = "blocked"
-        except Exception as e:
-            logger.error(f"AI image model failed: {e}")
-            decision = "approved"
+        partials.append(media.get("image") or failed_signal("image"))
+    if content.video_url:
+        partials.append(media.get("video") or failed_signal("video"))
+    return partials
+
 
+def modality_of(content) -> str:
+    """The slowest modality an item carries"""
     if content.video_url:
-        try:
-            safe = moderate_video(content.video_url)
-            if not safe:
-                decision = "blocked"
-        except Exception as e:
-            logger.error(f"Video moderation failed: {e}")
-            decision = "approved"
+        return "video"
+    return "image" if content.image_url else "text"
 
-    moderation_decisions_total.labels(decision=decision).inc()
-    content.username_hashed = hash_username(content.username)
 
-    content.status = decision
-    db.commit()
+def apply_verdict(content, verdict, task_id: str = None) -> dict:
+    """
+    Account for a verdict and build its journal entry for the result writer.
+
+    With ``task_id`` the entry's id is derived from the task and the content,
+    so a retried task journals the same ids and the writer skips them.
+    """
+    moderation_decisions_total.labels(decision=verdict["decision"]).inc()
+    created = getattr(content, "create_at", None)
+    if created is not None:
+        if created.tzinfo is None:
+            created = created.replace(tzinfo=timezone.utc)  # SQLite drops the zone
+        moderation_end_to_end_seconds.labels(modality=modality_of(content)).observe(
+            max((datetime.now(timezone.utc) - created).total_seconds(), 0)
+        )
 
     logger.info(
-        f"Content {content.id} | Decision: {decision} | Source: {content.source_app}"
-    )
-    logger.info(
-        f"Moderation took {time.time() - start_time:.2f}s"
+        f"Content {content.id} | Decision: {verdict['decision']} | Source: {content.source_app}"
     )
+    entry = {
+        "content_id": content.id,
+        "source_app": content.source_app,
+        "decision": verdict["decision"],
+        "model_version": verdict["model_version"],
+        "results": verdict["results"],
+        "reason": verdict.get("reason"),
+    }
+    if task_id is not None:
+        entry["id"] = f"{task_id}:{content.id}"
+    return entry
+
+
+def moderate_contents(contents, defer=None, task_id: str = None):
+    """
+    Moderate ``contents`` and hand their verdicts to the result writer.
+
+    The prefilter decides obvious items first: a block finishes the item
+    outright, an approval finishes it unless it has media to score. Cached
+    model signals short-circuit inference, and identical items within the
+    batch are only scored once; the rest have their text, image and video
+    scored concurrently (see ``analyze``). Every item is then decided under
+    its source app's policy in one batch. Returns verdicts keyed by content id.
+
+    With ``defer``, uncached items carrying an image or video are not
+    finished here: ``defer(content, text_partial)`` is called for each so the
+    media can be scored elsewhere, and they are left out of the result.
+    ``task_id`` makes the journal entries safe to replay (see ``apply_verdict``).
+    """
+    keys = {content.id: verdict_cache.key_for(content) for content in contents}
+    with stage("prefilter"):
+        early = prefilter.check_many(contents) if settings.PREFILTER_ENABLED else {}
+    signals = {}
+    prefiltered = {}
+    misses = {}
+
+    with stage("verdict_cache"):
+        for content in contents:
+            partial = early.get(content.id)
+            # An approval only vouches for the text; media is still scored,
+            # and the prefilter partial is dropped for the models' verdict
+            if partial is not None and (
+                partial["decision"] == "blocked" or not (content.image_url or content.video_url)
+            ):
+                # Not cached: list edits must apply to the very next item
+                prefiltered[content.id] = [partial]
+                continue
+            key = keys[content.id]
+            if key in signals or key in misses:
+                continue
+            cached = verdict_cache.get(key)
+            if cached is not None:
+                signals[key] = cached
+            else:
+                misses[key] = content
+
+    media = [
+        content for content in misses.values()
+        if (content.image_url or content.video_url) and defer is None
+    ]
+    text_scores, media_signals = analyze(list(misses.values()), media)
+    deferred = {}
+    for key, content in misses.items():
+        if defer is not None and (content.image_url or content.video_url):
+            deferred[key] = text_signal(content, text_scores.get(content.id)) if content.text else None
+            continue
+        partials = evaluate(content, text_scores.get(content.id), media_signals.get(content.id))
+        # Signals, not decisions, are cached: sources sharing an item may decide it differently
+        if not any(partial["failed"] for partial in partials):
+            verdict_cache.set(key, partials)
+        signals[key] = partials
+
+    for content in contents:
+        if content.id not in prefiltered and keys[content.id] in deferred:
+            defer(content, deferred[keys[content.id]])
+
+    finished = [
+        content for content in contents
+        if content.id in prefiltered or keys[content.id] in signals
+    ]
+    verdicts = {
+        content.id: verdict
+        for content, (verdict, _) in zip(finished, merge_verdicts([
+            (content.source_app, prefiltered.get(content.id) or signals[keys[content.id]])
+            for content in finished
+        ]))
+    }
+    with stage("journal"):
+        result_writer.record_many([apply_verdict(content, verdicts[content.id], task_id) for content in finished])
+
+    return verdicts
+
+
+def notify(content, verdict):
+    """Hand the journaled decision to the webhook dispatcher (non-blocking)"""
+    if not settings.WEBHOOKS_ENABLED:
+        return
 
     payload = {
-        "content_id": content_id,
-        "decision": decision,
-        "status": content.status,
-        "model_version": model_version
+        "content_id": content.id,
+        "decision": verdict["decision"],
+        "status": verdict["decision"],
+        "model_version": verdict["model_version"]
     }
+    webhook_dispatcher.submit(content.source_app, payload)
+
+
+def broadcast(contents, verdicts):
+    """Publish decisions to moderators watching /ws/moderation (best effort)"""
+    decision_publisher.publish_many([
+        {
+            "content_id": content.id,
+            "source_app": content.source_app,
+            "decision": verdicts[content.id]["decision"],
+            "model_version": verdicts[content.id]["model_version"],
+        }
+        for content in contents
+    ])
+
+
+def load_contents(content_ids: list[int]):
+    """Load content rows and release the connection before inference starts"""
+    db: Session = SessionLocal()
+    try:
+        with stage("load"):
+            return db.query(Content).filter(Content.id.in_(content_ids)).all()
+    finally:
+        db.close()
+
+
+def finalize_verdict(content_id: int, partials: list[dict], task_id: str = None):
+    """Decide a deferred item from its per-modality signals and record the result"""
+    contents = load_contents([content_id])
+    if not contents:
+        return None
+    content = contents[0]
+
+    verdict, failed = merge_verdicts([(content.source_app, partials)])[0]
+    if not failed:
+        verdict_cache.set(verdict_cache.key_for(content), partials)
+    result_writer.record_many([apply_verdict(content, verdict, task_id)])
+
+    notify(content, verdict)
+    broadcast(contents, {content.id: verdict})
+    return verdict
+
 
-    #send_webhook("https://client-app/webhook",payload)
+def run_image_stage(content_id: int):
+    contents = load_contents([content_id])
+    return image_signal(contents[0]) if contents else None
 
-    db.close()
\ No newline at end of file
+
+def run_video_stage(content_id: int):
+    contents = load_contents([content_id])
+    return video_signal(contents[0]) if contents else None
+
+
+def run_moderation(content_id:int, defer=None, task_id: str = None):
+    start_time = time.perf_counter()
+    moderation_requests_total.inc()
+
+    contents = load_contents([content_id])
+    if not contents:
+        return
+    content = contents[0]
+
+    verdict = moderate_contents([content], defer=defer, task_id=task_id).get(content.id)
+    if verdict is None:
+        return  # finished by finalize_verdict once the media is scored
+
+    notify(content, verdict)
+    broadcast(contents, {content.id: verdict})
+
+    elapsed = time.perf_counter() - start_time
+    moderation_duration_seconds.observe(elapsed)
+    logger.info(
+        f"Moderation took {elapsed:.2f}s"
+    )
+
+
+def run_moderation_batch(content_ids: list[int], defer=None, task_id: str = None):
+    """Moderate a chunk of content with one query and batched inference"""
+    start_time = time.perf_counter()
+
+    contents = load_contents(content_ids)
+    moderation_requests_total.inc(len(contents))
+
+    verdicts = moderate_contents(contents, defer=defer, task_id=task_id)
+
+    finished = [content for content in contents if content.id in verdicts]
+    for content in finished:
+        notify(content, verdicts[content.id])
+    broadcast(finished, verdicts)
+
+    elapsed = time.perf_counter() - start_time
+    moderation_duration_seconds.observe(elapsed)
+    logger.info(
+        f"Moderated {len(contents)} items in {elapsed:.2f}s"
+    )
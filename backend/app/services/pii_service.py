@@ -1,9 +1,176 @@
 import re
 import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
+
+from app.ai.nlp.keywords import KeywordAutomaton
+from app.core.config import settings
+from app.core.metrics import pii_spans_total
+
+EMAIL = "email"
+URL = "url"
+IP = "ip"
+CARD = "card"
+PHONE = "phone"
+HANDLE = "handle"
+KEYWORD = "keyword"
+
+_EMAIL = r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b"
+_OCTET = r"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+_HEX = r"[0-9A-Fa-f]{1,4}"
+_PHONE = (
+    r"(?<![\w+])(?:\+\d{7,15}"
+    r"|(?:\+\d{1,3}[ .-]?)?(?:\(\d{2,4}\)[ .-]?|\d{2,4}[ .-])\d{3,4}[ .-]?\d{3,4})(?!\w)"
+)
+
+# Each kind can only occur in a text containing certain characters. A text
+# is scanned once, with one alternation of just the kinds it could contain
+# (most comments contain none and are not scanned at all). At any position
+# the first branch that matches wins, so more specific shapes come first:
+# an IP before a phone number, an email before the @handle inside it.
+AT, COLON, DOT, DIGIT, LINK = (1 << i for i in range(5))
+_BRANCHES = [
+    (URL, LINK, r"\b(?:https?://|www\.)[^\s<>\"'\x00]*[^\s<>\"'.,;:!?)\]\x00]"),
+    (EMAIL, AT | DOT, _EMAIL),
+    (IP, DIGIT | DOT, rf"(?<![\w.])(?:{_OCTET}\.){{3}}{_OCTET}(?!\.?\w)"),
+    (IP, COLON, rf"(?<![\w:])(?:(?:{_HEX}:){{7}}{_HEX}|(?:{_HEX}:){{1,6}}:(?:{_HEX}(?::{_HEX}){{0,5}})?)(?![\w:])"),
+    (CARD, DIGIT, r"\b\d(?:[ -]?\d){12,18}\b"),
+    (PHONE, DIGIT, _PHONE),
+    (HANDLE, AT, r"(?<![\w@.])@[A-Za-z0-9_]{2,30}\b"),
+]
+_DIGIT = re.compile(r"\d")
+
+
+def features(text: str) -> int:
+    """Bit set of the characters that PII kinds are anchored on"""
+    return (
+        (AT if "@" in text else 0)
+        | (COLON if ":" in text else 0)
+        | (DOT if "." in text else 0)
+        | (DIGIT if _DIGIT.search(text) else 0)
+        | (LINK if "://" in text or "www." in text else 0)
+    )
+
+
+@lru_cache(maxsize=None)
+def pattern_for(present: int):
+    """Combined pattern of the kinds possible given ``features``; None if none are"""
+    branches = [
+        f"(?P<{kind}{i}>{regex})"
+        for i, (kind, needs, regex) in enumerate(_BRANCHES)
+        if present & needs == needs
+    ]
+    return re.compile("|".join(branches)) if branches else None
+
+
+EMAIL_PATTERN = re.compile(_EMAIL)
+PHONE_PATTERN = re.compile(_PHONE)
+
+
+def luhn_valid(number: str) -> bool:
+    digits = [int(ch) for ch in number if ch.isdigit()]
+    checksum = 0
+    for i, digit in enumerate(reversed(digits)):
+        if i % 2:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        checksum += digit
+    return checksum % 10 == 0
+
+
+@dataclass(frozen=True)
+class PiiSpan:
+    kind: str
+    start: int
+    end: int
+
+
+class PiiEngine:
+    """
+    Finds emails, URLs, IPs, card numbers, phone numbers, @handles and
+    configured literal keywords in one pass per text.
+
+    The regular kinds share one precompiled alternation; literals (staff
+    names, internal hostnames, ...) go through an Aho–Corasick automaton so
+    a long list costs no more than a short one. Digit runs that look like
+    a card but fail the Luhn check are kept only if they are also shaped
+    like a phone number. Overlapping spans resolve to the earliest, then
+    longest.
+    """
+
+    def __init__(self, keywords=None, kinds=None):
+        keywords = settings.PII_KEYWORDS if keywords is None else keywords
+        self.keywords = KeywordAutomaton({k: KEYWORD for k in keywords})
+        self.kinds = frozenset(kinds or (EMAIL, URL, IP, CARD, PHONE, HANDLE, KEYWORD))
+
+    def scan(self, text: str) -> list[PiiSpan]:
+        spans = []
+        pattern = pattern_for(features(text))
+        for match in pattern.finditer(text) if pattern is not None else ():
+            kind = match.lastgroup.rstrip("0123456789")
+            if kind == CARD and not luhn_valid(match.group()):
+                if not PHONE_PATTERN.fullmatch(match.group()):
+                    continue
+                kind = PHONE
+            if kind in self.kinds:
+                spans.append(PiiSpan(kind, match.start(), match.end()))
+
+        if KEYWORD in self.kinds and len(self.keywords):
+            spans.extend(PiiSpan(kind, start, end) for start, end, kind in self.keywords.finditer(text))
+            spans = _resolve(spans)
+        return spans
+
+    def redact(self, text: str) -> str:
+        return self._redact(text, self.scan(text))
+
+    def scan_many(self, texts) -> list[list[PiiSpan]]:
+        return [self.scan(text) if text else [] for text in texts]
+
+    def redact_many(self, texts) -> list[str]:
+        """Redact a batch; spans are counted per kind once for the whole batch"""
+        counts = {}
+        redacted = []
+        for text in texts:
+            spans = self.scan(text) if text else None
+            if not spans:
+                redacted.append(text)
+                continue
+            for span in spans:
+                counts[span.kind] = counts.get(span.kind, 0) + 1
+            redacted.append(self._redact(text, spans))
+        for kind, count in counts.items():
+            pii_spans_total.labels(kind=kind).inc(count)
+        return redacted
+
+    @staticmethod
+    def _redact(text: str, spans: list[PiiSpan]) -> str:
+        if not spans:
+            return text
+        parts = []
+        last = 0
+        for span in spans:
+            parts.append(text[last:span.start])
+            parts.append(f"[{span.kind.upper()}]")
+            last = span.end
+        parts.append(text[last:])
+        return "".join(parts)
+
+
+def _resolve(spans: list[PiiSpan]) -> list[PiiSpan]:
+    resolved = []
+    for span in sorted(spans, key=lambda s: (s.start, -s.end)):
+        if not resolved or span.start >= resolved[-1].end:
+            resolved.append(span)
+    return resolved
+
+
+pii_engine = PiiEngine()
+
 
 def mask_email(text: str) -> str:
     """Replace emails with [REDACTED]"""
-    return re.sub(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b", "[REDACTED]", text)
+    return EMAIL_PATTERN.sub("[REDACTED]", text)
 
 def hash_username(username: str) -> str:
     """Return a SHA256 hash of the username"""
@@ -0,0 +1,198 @@
+import json
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.logging import logger
+from app.models.policy import Policy
+from app.schemas.policy import ModerationPolicy
+
+DEFAULT = "*"
+APPROVED, FLAGGED, BLOCKED = "approved", "flagged", "blocked"
+DECISIONS = np.array([APPROVED, FLAGGED, BLOCKED])
+LEVELS = {APPROVED: 0, FLAGGED: 1, BLOCKED: 2}
+MEDIA = ("image", "video")
+
+
+class CompiledPolicies:
+    """
+    Every tenant's policy as rows of threshold arrays.
+
+    Row 0 is the default policy. Text thresholds have one column per label
+    named in any policy plus a last column for all other labels, which
+    holds each tenant's general text thresholds. A missing review band is
+    stored as the block threshold, so it can never fire on its own.
+    """
+
+    def __init__(self, policies: dict, default: ModerationPolicy):
+        self.tenants = {DEFAULT: 0}
+        rows = [default]
+        for source_app, policy in policies.items():
+            self.tenants[source_app] = len(rows)
+            rows.append(policy)
+
+        labels = sorted({label for policy in rows for label in policy.text.categories})
+        self.columns = {label: j for j, label in enumerate(labels)}
+        other = len(labels)
+
+        shape = (len(rows), other + 1)
+        self.text_block = np.empty(shape, dtype=np.float64)
+        self.text_review = np.empty(shape, dtype=np.float64)
+        self.media_block = np.empty((len(rows), len(MEDIA)), dtype=np.float64)
+        self.media_review = np.empty((len(rows), len(MEDIA)), dtype=np.float64)
+        self.min_block = np.empty(len(rows), dtype=np.int8)
+
+        for i, policy in enumerate(rows):
+            text = policy.text
+            self.text_block[i] = text.block
+            self.text_review[i] = _review(text)
+            for label, band in text.categories.items():
+                self.text_block[i, self.columns[label]] = band.block
+                self.text_review[i, self.columns[label]] = _review(band)
+            for k, name in enumerate(MEDIA):
+                band = getattr(policy, name)
+                self.media_block[i, k] = band.block
+                self.media_review[i, k] = _review(band)
+            self.min_block[i] = policy.min_block_signals
+
+    def row(self, source_app: str) -> int:
+        return self.tenants.get(source_app, 0)
+
+    def decide_many(self, items) -> list[str]:
+        """
+        Decide ``(source_app, partials)`` items in one pass.
+
+        Text partials carry ``results``, image/video partials a ``score``.
+        A partial with only a ``decision`` (a prefilter list match, say) sets
+        a floor on the outcome that no threshold can lower. Failed partials
+        are ignored.
+        """
+        n = len(items)
+        if not n:
+            return []
+        rows = np.fromiter((self.row(app) for app, _ in items), dtype=np.intp, count=n)
+        other = len(self.columns)
+        columns = self.columns
+        # Flat (item, column, score) triples, scattered into the matrices at once
+        text_at, text_col, text_score = [], [], []
+        media_at, media_col, media_score = [], [], []
+        explicit = np.zeros(n, dtype=np.int8)
+
+        for i, (_, partials) in enumerate(items):
+            for partial in partials:
+                if partial.get("failed"):
+                    continue
+                modality = partial.get("modality")
+                if modality == "text":
+                    results = partial["results"]
+                    text_at += [i] * len(results)
+                    text_col += [columns.get(r["label"], other) for r in results]
+                    text_score += [r["score"] for r in results]
+                elif modality in MEDIA:
+                    media_at.append(i)
+                    media_col.append(MEDIA.index(modality))
+                    media_score.append(partial["score"])
+                elif "decision" in partial:
+                    explicit[i] = max(explicit[i], LEVELS[partial["decision"]])
+
+        text = np.full((n, other + 1), -1.0)
+        np.maximum.at(text, (text_at, text_col), text_score)
+        media = np.full((n, len(MEDIA)), -1.0)
+        media[media_at, media_col] = media_score
+
+        text_blocks = (text > self.text_block[rows]).any(axis=1)
+        text_reviews = (text > self.text_review[rows]).any(axis=1)
+        media_blocks = media > self.media_block[rows]
+        media_reviews = media > self.media_review[rows]
+
+        blocks = text_blocks + media_blocks.sum(axis=1)
+        reviews = text_reviews | media_reviews.any(axis=1)
+        # Blocking signals short of min_block_signals still need a human
+        levels = np.where(
+            blocks >= self.min_block[rows], 2, np.where((blocks > 0) | reviews, 1, 0)
+        )
+        return DECISIONS[np.maximum(levels, explicit)].tolist()
+
+
+def _review(band) -> float:
+    return band.block if band.review is None else band.review
+
+
+class PolicyEngine:
+    """
+    Per-source-app moderation policies, compiled once and cached.
+
+    Policies live in the ``moderation_policies`` table. Every process checks
+    its row count, ids and versions at most every ``POLICY_REFRESH_SECONDS``
+    and recompiles when they changed; writes through the API recompile the
+    writing process immediately. If the database is unavailable the current
+    policies are kept.
+    """
+
+    def __init__(self, session_factory=None, refresh_seconds: float = None):
+        self.session_factory = session_factory or SessionLocal
+        self.refresh_seconds = (
+            settings.POLICY_REFRESH_SECONDS if refresh_seconds is None else refresh_seconds
+        )
+        self.compiled = CompiledPolicies({}, ModerationPolicy())
+        self._signature = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False):
+        now = time.monotonic()
+        if not force and self._checked_at is not None and now - self._checked_at < self.refresh_seconds:
+            return
+        # One thread recompiles; the others keep deciding with the current policies
+        if not self._lock.acquire(blocking=force):
+            return
+        try:
+            self._checked_at = now
+            self._reload()
+        except Exception as e:
+            logger.warning(f"Policies unavailable, keeping {len(self.compiled.tenants)} compiled: {e}")
+        finally:
+            self._lock.release()
+
+    def _reload(self):
+        db = self.session_factory()
+        try:
+            signature = tuple(db.execute(
+                select(func.count(Policy.id), func.max(Policy.id), func.sum(Policy.version))
+            ).one())
+            if signature == self._signature:
+                return
+            stored = db.execute(select(Policy.source_app, Policy.document)).all()
+        finally:
+            db.close()
+
+        policies = {}
+        for source_app, document in stored:
+            try:
+                policies[source_app] = ModerationPolicy.model_validate(json.loads(document))
+            except ValueError as e:
+                logger.error(f"Ignoring invalid policy for {source_app}: {e}")
+        default = policies.pop(DEFAULT, None) or ModerationPolicy()
+        self.compiled = CompiledPolicies(policies, default)
+        self._signature = signature
+        logger.info(f"Compiled moderation policies for {len(policies)} source apps")
+
+    def decide_many(self, items) -> list[str]:
+        self.refresh()
+        return self.compiled.decide_many(items)
+
+    def decide(self, source_app: str, partials) -> str:
+        return self.decide_many([(source_app, partials)])[0]
+
+    def block_threshold(self, source_app: str, modality: str) -> float:
+        """Score above which ``modality`` blocks for ``source_app`` (lets scans stop early)"""
+        self.refresh()
+        compiled = self.compiled
+        return float(compiled.media_block[compiled.row(source_app), MEDIA.index(modality)])
+
+
+policy_engine = PolicyEngine()
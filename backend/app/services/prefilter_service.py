@@ -0,0 +1,165 @@
+import re
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import func, select
+
+from app.ai.nlp.keywords import KeywordAutomaton
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.logging import logger
+from app.core.metrics import prefilter_items_total
+from app.models.prefilter import PrefilterEntry
+from app.services.verdict_cache import content_hash
+
+TERM_BLOCK = "term_block"
+TERM_ALLOW = "term_allow"
+DOMAIN_BLOCK = "domain_block"
+HASH_BLOCK = "hash_block"
+LISTS = (TERM_BLOCK, TERM_ALLOW, DOMAIN_BLOCK, HASH_BLOCK)
+
+MODEL_VERSION = "prefilter"
+
+_word = re.compile(r"\w")
+
+
+class _Lists:
+    """An immutable snapshot of the lists, swapped in whole on reload"""
+
+    def __init__(self, entries=()):
+        keywords = {}
+        self.hashes = {}
+        for entry_id, name, value in entries:
+            if name == HASH_BLOCK:
+                self.hashes[value] = entry_id
+            elif name in (TERM_BLOCK, TERM_ALLOW, DOMAIN_BLOCK):
+                keywords[value.lower()] = (name, entry_id)
+        # Terms and domains share one automaton, so a text is scanned once
+        self.keywords = KeywordAutomaton(keywords)
+        self.size = len(self.hashes) + len(self.keywords)
+
+
+def blocking_match(lists: _Lists, text: str):
+    """First block-list match not covered by an allow-list match, or None"""
+    blocks, allows = [], []
+    for start, end, (name, entry_id) in lists.keywords.finditer(text):
+        (allows if name == TERM_ALLOW else blocks).append((start, end, name, entry_id))
+    for start, end, name, entry_id in blocks:
+        if not any(a_start < end and start < a_end for a_start, a_end, _, _ in allows):
+            return name, entry_id
+    return None
+
+
+class Prefilter:
+    """
+    Decides obvious items before they reach language detection or a model.
+
+    Blocks text whose normalized hash is known bad, or that contains a
+    blocked term or domain (unless an allow-listed phrase covers it).
+    Approves text with no letters or digits (emoji, punctuation) and very
+    short ASCII text. Everything else passes through to the models.
+
+    The lists live in the ``prefilter_entries`` table. Every process checks
+    its row count and newest row at most every ``PREFILTER_REFRESH_SECONDS``
+    and rebuilds its lists when they changed, so edits apply without a
+    restart. If the database is unavailable the current lists are kept.
+    """
+
+    def __init__(self, session_factory=None, refresh_seconds: float = None):
+        self.session_factory = session_factory or SessionLocal
+        self.refresh_seconds = (
+            settings.PREFILTER_REFRESH_SECONDS if refresh_seconds is None else refresh_seconds
+        )
+        self.lists = _Lists()
+        self._signature = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False):
+        now = time.monotonic()
+        if not force and self._checked_at is not None and now - self._checked_at < self.refresh_seconds:
+            return
+        # One thread reloads; the others keep using the current lists
+        if not self._lock.acquire(blocking=force):
+            return
+        try:
+            self._checked_at = now
+            self._reload()
+        except Exception as e:
+            logger.warning(f"Prefilter lists unavailable, keeping {self.lists.size} entries: {e}")
+        finally:
+            self._lock.release()
+
+    def _reload(self):
+        db = self.session_factory()
+        try:
+            signature = tuple(db.execute(
+                select(
+                    func.count(PrefilterEntry.id),
+                    func.max(PrefilterEntry.id),
+                    func.max(PrefilterEntry.created_at),
+                )
+            ).one())
+            if signature == self._signature:
+                return
+            entries = db.execute(
+                select(PrefilterEntry.id, PrefilterEntry.list, PrefilterEntry.value)
+            ).all()
+        finally:
+            db.close()
+        self.lists = _Lists(entries)
+        self._signature = signature
+        logger.info(f"Prefilter lists reloaded: {self.lists.size} entries")
+
+    def check(self, text: str):
+        """``(decision, reason)`` for an obvious text, or None to run the models"""
+        lists = self.lists
+        if lists.hashes:
+            entry_id = lists.hashes.get(content_hash(text))
+            if entry_id is not None:
+                return "blocked", f"{HASH_BLOCK}:{entry_id}"
+        if len(lists.keywords):
+            match = blocking_match(lists, text)
+            if match is not None:
+                return "blocked", "%s:%s" % match
+        if not _word.search(text):
+            return "approved", "no_words"
+        # A single CJK character can be a whole word, so only ASCII is "short"
+        if len(text.strip()) <= settings.PREFILTER_SHORT_TEXT_LENGTH and text.isascii():
+            return "approved", "short_text"
+        return None
+
+    def check_many(self, contents) -> dict:
+        """Prefilter verdicts keyed by content id for the items it can decide"""
+        self.refresh()
+        verdicts = {}
+        counts = Counter()
+        for content in contents:
+            outcome = self.check(content.text) if content.text else None
+            if outcome is None:
+                counts["passed", ""] += 1
+                continue
+            decision, reason = outcome
+            counts[decision, reason.split(":")[0]] += 1
+            verdicts[content.id] = {
+                "decision": decision,
+                "model_version": MODEL_VERSION,
+                # No scores: the reason says why, without a category to aggregate
+                "results": [],
+                "reason": reason,
+                "failed": False,
+            }
+        for (outcome, reason), count in counts.items():
+            prefilter_items_total.labels(outcome=outcome, reason=reason).inc(count)
+        return verdicts
+
+
+def normalize_entry(list_name: str, value: str) -> str:
+    """Stored form of a list value: hashes of texts, lower-cased terms and domains"""
+    if list_name == HASH_BLOCK:
+        return content_hash(value)
+    return value.strip().lower()
+
+
+prefilter = Prefilter()
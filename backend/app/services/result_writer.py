@@ -0,0 +1,272 @@
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import case, delete, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.logging import logger
+from app.core.metrics import result_writer_rows_total, result_writer_flush_seconds
+from app.core.queues import priority_for
+from app.core.tracing import stage
+from app.models.content import Content
+from app.models.moderation_result import ModerationResult, ResultJournalEntry
+from app.services.rollup_service import aggregate, mark_rolled_up_from, upsert_rollups
+
+# Keeps one INSERT well under the bind-parameter limits of Postgres/SQLite
+INSERT_ROWS_PER_STATEMENT = 2000
+
+# Hand the caller the batch to write: the one a lapsed lease left behind,
+# else the head of the journal, moved atomically to the processing list.
+# Returns nothing while another flusher holds the lease.
+CLAIM_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    return {}
+end
+local batch = redis.call('LRANGE', KEYS[2], 0, -1)
+if #batch == 0 then
+    batch = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[2]) - 1)
+    if #batch == 0 then
+        return {}
+    end
+    redis.call('LTRIM', KEYS[1], #batch, -1)
+    redis.call('RPUSH', KEYS[2], unpack(batch))
+end
+redis.call('SET', KEYS[3], ARGV[1], 'PX', tonumber(ARGV[3]))
+return batch
+"""
+
+# Drop the written batch, but only while the lease is still ours
+ACK_SCRIPT = """
+if redis.call('GET', KEYS[2]) == ARGV[1] then
+    redis.call('DEL', KEYS[1], KEYS[2])
+    return 1
+end
+return 0
+"""
+
+# Give the lease up after a failed write; the batch is retried first
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class ResultWriter:
+    """
+    Buffers verdicts across tasks and persists them in bulk.
+
+    ``record_many`` gives each verdict an id and appends it to a Redis list
+    (the journal) before the task returns, so a worker crash never loses
+    them. ``flush`` moves up to ``flush_size`` entries atomically to a
+    processing list under a lease, writes all their results with multi-row
+    INSERTs, all status and review priority changes with a single CASE
+    UPDATE and the analytics rollups in one transaction, and only then drops
+    the processing list, if the lease is still its own.
+
+    A flusher that crashes or outlives its lease leaves the batch to be
+    retaken and written again. Writes are idempotent: each entry id is
+    recorded in ``result_journal_entry`` in the same transaction, and only
+    entries whose id was new are written, so a replay adds nothing.
+
+    If Redis is unreachable, verdicts are written straight to the database.
+    Unless ``background_flush`` is off, each process also flushes the
+    journal from a background thread every ``flush_interval_ms``; without
+    it the journal is only flushed when it fills or ``flush`` is called.
+    """
+
+    def __init__(
+        self,
+        redis_client=None,
+        session_factory=None,
+        flush_size: int = None,
+        flush_interval_ms: int = None,
+        key: str = "moderation:results:journal",
+        lease_seconds: float = 60,
+        background_flush: bool = True,
+    ):
+        self._redis = redis_client
+        self.session_factory = session_factory or SessionLocal
+        self.flush_size = flush_size or settings.RESULT_FLUSH_SIZE
+        self.flush_interval = (flush_interval_ms or settings.RESULT_FLUSH_INTERVAL_MS) / 1000
+        self.key = key
+        self.processing_key = f"{key}:processing"
+        self.lease_key = f"{key}:lease"
+        self.lease_seconds = lease_seconds
+        self.background_flush = background_flush
+        self._scripts = None
+        self._lock = threading.Lock()
+        self._pid = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            import redis
+            self._redis = redis.Redis.from_url(settings.REDIS_URL)
+        return self._redis
+
+    def record_many(self, entries: list[dict]):
+        """
+        Journal verdicts of the form ``{"content_id", "source_app", "decision",
+        "model_version", "results": [{"label", "score"}]}`` plus an optional
+        ``"reason"``; each is stamped with an ``"id"`` and the ``"decided_at"``
+        time its rollups are bucketed by
+        """
+        if not entries:
+            return
+        decided_at = datetime.now(timezone.utc).isoformat()
+        for entry in entries:
+            entry.setdefault("id", uuid.uuid4().hex)
+            entry.setdefault("decided_at", decided_at)
+        try:
+            length = self.redis.rpush(self.key, *(json.dumps(e) for e in entries))
+        except Exception as e:
+            logger.warning(f"Result journal unavailable, writing directly: {e}")
+            self.write(entries)
+            return
+
+        self._ensure_flusher()
+        if length >= self.flush_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """Drain the journal; returns the number of verdicts written"""
+        total = 0
+        while True:
+            written = self._flush_once()
+            total += written
+            if written < self.flush_size:
+                return total
+
+    def _flush_once(self) -> int:
+        if self._scripts is None:
+            self._scripts = [self.redis.register_script(s) for s in (CLAIM_SCRIPT, ACK_SCRIPT, RELEASE_SCRIPT)]
+        claim, ack, release = self._scripts
+
+        token = uuid.uuid4().hex
+        raw = claim(
+            keys=[self.key, self.processing_key, self.lease_key],
+            args=[token, self.flush_size, int(self.lease_seconds * 1000)],
+        )
+        if not raw:
+            # Empty, or another process is flushing this journal
+            return 0
+        try:
+            self.write([json.loads(r) for r in raw])
+        except Exception:
+            release(keys=[self.lease_key], args=[token])
+            raise
+        if not ack(keys=[self.processing_key, self.lease_key], args=[token]):
+            logger.warning(f"Result flush outlived its {self.lease_seconds}s lease; the batch will be rewritten")
+        return len(raw)
+
+    def write(self, entries: list[dict]):
+        """Persist ``entries`` in one transaction, skipping any already written"""
+        start = time.perf_counter()
+        for entry in entries:
+            entry.setdefault("id", uuid.uuid4().hex)  # written without the journal
+
+        with stage("commit"):
+            db = self.session_factory()
+            try:
+                entries = self._new_entries(db, entries)
+                rows = self._write_entries(db, entries) if entries else 0
+                db.commit()
+            finally:
+                db.close()
+
+        result_writer_rows_total.labels(table="moderation_result").inc(rows)
+        result_writer_rows_total.labels(table="content").inc(len({e["content_id"] for e in entries}))
+        result_writer_flush_seconds.observe(time.perf_counter() - start)
+
+    def _new_entries(self, db, entries: list[dict]) -> list[dict]:
+        """Record the entries' ids and return the entries not written before"""
+        dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+        # A replay can land in the same batch as the original
+        unique = {}
+        for entry in entries:
+            unique.setdefault(entry["id"], entry)
+        entries = list(unique.values())
+        fresh = set()
+        for i in range(0, len(entries), INSERT_ROWS_PER_STATEMENT):
+            stmt = (
+                dialect.insert(ResultJournalEntry)
+                .values([{"id": e["id"]} for e in entries[i:i + INSERT_ROWS_PER_STATEMENT]])
+                .on_conflict_do_nothing(index_elements=["id"])
+                .returning(ResultJournalEntry.id)
+            )
+            fresh.update(db.execute(stmt).scalars())
+        return [e for e in entries if e["id"] in fresh]
+
+    def _write_entries(self, db, entries: list[dict]) -> int:
+        rows = [
+            {
+                "content_id": e["content_id"],
+                "category": r["label"],
+                "score": r["score"],
+                "decision": e["decision"],
+                "model_version": e["model_version"],
+                "reason": e.get("reason"),
+            }
+            for e in entries
+            # A verdict decided without scores (by the prefilter) keeps its
+            # reason on one row with no category, which rollups never see
+            for r in e["results"] or ([{"label": None, "score": None}] if e.get("reason") else [])
+        ]
+        # Later entries for the same content win
+        statuses = {e["content_id"]: e["decision"] for e in entries}
+        priorities = {e["content_id"]: priority_for(e.get("source_app")) for e in entries}
+
+        for i in range(0, len(rows), INSERT_ROWS_PER_STATEMENT):
+            stmt = insert(ModerationResult).values(rows[i:i + INSERT_ROWS_PER_STATEMENT])
+            if i:
+                db.execute(stmt)
+                continue
+            # Results from here on are rolled up below; the backfill covers older ones
+            mark_rolled_up_from(db, min(db.execute(stmt.returning(ModerationResult.id)).scalars()))
+        db.execute(
+            update(Content)
+            .where(Content.id.in_(statuses))
+            .values(
+                status=case(statuses, value=Content.id),
+                review_priority=case(priorities, value=Content.id),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        # Same transaction, so rollups never drift from the raw rows
+        upsert_rollups(db, aggregate(entries))
+        return len(rows)
+
+    def _ensure_flusher(self):
+        # One background flusher per (forked) process
+        pid = os.getpid()
+        if self.background_flush and self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    threading.Thread(target=self._run, name="result-writer", daemon=True).start()
+                    self._pid = pid
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Result flush failed, will retry: {e}")
+
+
+def prune_journal(db, now: datetime = None) -> int:
+    """Forget written journal ids old enough that no flush can replay them"""
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(hours=settings.RESULT_JOURNAL_RETENTION_HOURS)
+    return db.execute(delete(ResultJournalEntry).where(ResultJournalEntry.written_at < cutoff)).rowcount
+
+
+result_writer = ResultWriter()
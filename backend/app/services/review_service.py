@@ -0,0 +1,136 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import bindparam, or_, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import keyset_column
+from app.core.metrics import review_decisions_total, review_items_claimed_total
+from app.models.content import Content, REVIEW_STATUSES
+from app.models.review import Review
+
+QUEUE_ORDER = (Content.review_priority, Content.create_at, Content.id)
+
+# The partial index predicate, rendered as literals: SQLite only uses a
+# partial index when the query repeats its WHERE clause verbatim
+QUEUED = Content.status.in_(
+    bindparam("review_statuses", list(REVIEW_STATUSES), expanding=True, literal_execute=True)
+)
+
+
+class ClaimConflict(Exception):
+    """The item is leased to another reviewer"""
+
+
+def encode_cursor(content: Content, created) -> str:
+    """``created`` is the row's create_at as ``keyset_column`` read it"""
+    if isinstance(created, datetime):
+        created = created.isoformat()
+    key = [content.review_priority, created, content.id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        priority, created, content_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        datetime.fromisoformat(created)
+        return int(priority), created, int(content_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def list_queue(db: Session, status: str = "flagged", limit: int = None, cursor: str = None):
+    """
+    One page of the queue in (priority, age, id) order and the cursor of the next.
+
+    Each page resumes after the last row of the previous one, so it is an
+    index range scan of ``ix_content_review_queue`` however deep it is.
+    """
+    limit = limit or settings.REVIEW_PAGE_SIZE
+    created = keyset_column(db, Content.create_at)
+    query = (
+        select(Content, created.label("cursor_at"))
+        .where(QUEUED, Content.status == status)
+        .order_by(*QUEUE_ORDER)
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        priority, created_at, content_id = decode_cursor(cursor)
+        if created is Content.create_at:
+            created_at = datetime.fromisoformat(created_at)
+        query = query.where(tuple_(Content.review_priority, created, Content.id) > (priority, created_at, content_id))
+    rows = db.execute(query).all()
+
+    next_cursor = encode_cursor(*rows[limit - 1]) if len(rows) > limit else None
+    return [content for content, _ in rows[:limit]], next_cursor
+
+
+def claim(db: Session, reviewer: str, limit: int = None, status: str = "flagged", now: datetime = None):
+    """
+    Lease the next ``limit`` unclaimed items to ``reviewer`` and commit.
+
+    Rows are picked with FOR UPDATE SKIP LOCKED, so concurrent claims never
+    wait on or hand out the same rows. Items whose lease expired count as
+    unclaimed, which is how abandoned work returns to the queue.
+    """
+    limit = min(limit or settings.REVIEW_CLAIM_MAX, settings.REVIEW_CLAIM_MAX)
+    now = now or datetime.now(timezone.utc)
+    lease_until = now + timedelta(seconds=settings.REVIEW_LEASE_SECONDS)
+
+    ids = db.execute(
+        select(Content.id)
+        .where(QUEUED, Content.status == status)
+        .where(or_(Content.lease_until.is_(None), Content.lease_until < now))
+        .order_by(*QUEUE_ORDER)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not ids:
+        db.commit()
+        return []
+
+    db.execute(
+        update(Content)
+        .where(Content.id.in_(ids))
+        .values(claimed_by=reviewer, lease_until=lease_until)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    review_items_claimed_total.inc(len(ids))
+    return db.execute(select(Content).where(Content.id.in_(ids)).order_by(*QUEUE_ORDER)).scalars().all()
+
+
+def release(db: Session, reviewer: str, content_ids: list[int]) -> int:
+    """Hand ``reviewer``'s claims on ``content_ids`` back to the queue"""
+    released = db.execute(
+        update(Content)
+        .where(Content.id.in_(content_ids), Content.claimed_by == reviewer)
+        .values(claimed_by=None, lease_until=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return released
+
+
+def record_review(
+    db: Session, content: Content, reviewer: str, decision: str, note: str = None, now: datetime = None
+) -> Review:
+    """Apply a human decision; only the lease holder may decide a claimed item"""
+    now = now or datetime.now(timezone.utc)
+    lease_until = content.lease_until
+    if lease_until is not None and lease_until.tzinfo is None:
+        lease_until = lease_until.replace(tzinfo=timezone.utc)  # SQLite drops the zone
+    if content.claimed_by not in (None, reviewer) and lease_until is not None and lease_until > now:
+        raise ClaimConflict(f"Content {content.id} is claimed by {content.claimed_by}")
+
+    review = Review(content_id=content.id, reviewer=reviewer, decision=decision, note=note)
+    content.status = decision
+    content.claimed_by = None
+    content.lease_until = None
+    db.add(review)
+    db.commit()
+    db.refresh(review)
+    review_decisions_total.labels(decision=decision).inc()
+    return review
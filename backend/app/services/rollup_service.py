@@ -0,0 +1,229 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.logging import logger
+from app.models.content import Content
+from app.models.moderation_result import ModerationResult
+from app.models.rollup import ModerationRollup, RollupBackfill
+
+ITEM = "*"
+GRANULARITIES = ("minute", "hour", "day")
+KEY_COLUMNS = ("granularity", "bucket_start", "category", "decision", "model_version", "source_app")
+BACKFILL_ROW = 1
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    if granularity == "minute":
+        return moment.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def aggregate(entries: list[dict], moment: datetime = None) -> list[dict]:
+    """
+    Pre-aggregate journal entries into one increment per rollup key.
+
+    Entries land in the buckets of their ``decided_at`` timestamp, so a
+    journal that backs up doesn't shift counts into later buckets; entries
+    without one fall back to ``moment`` (default now).
+    """
+    moment = moment or datetime.now(timezone.utc)
+    buckets = {}
+    totals = defaultdict(lambda: [0, 0.0])
+
+    for entry in entries:
+        decided = entry.get("decided_at") or moment
+        if decided not in buckets:
+            at = datetime.fromisoformat(decided) if isinstance(decided, str) else decided
+            buckets[decided] = {g: bucket_start(at, g) for g in GRANULARITIES}
+        base = (entry["decision"], entry.get("model_version") or "", entry.get("source_app") or "")
+        points = [(ITEM, 0.0)] + [(r["label"], r["score"]) for r in entry["results"]]
+        for category, score in points:
+            for granularity, start in buckets[decided].items():
+                total = totals[(granularity, start, category) + base]
+                total[0] += 1
+                total[1] += score
+
+    return [
+        dict(zip(KEY_COLUMNS, key), count=count, score_sum=score_sum)
+        for key, (count, score_sum) in totals.items()
+    ]
+
+
+def upsert_rollups(db, increments: list[dict]):
+    """Add increments to their rollup rows with one INSERT ... ON CONFLICT DO UPDATE"""
+    if not increments:
+        return
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(ModerationRollup).values(increments)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(KEY_COLUMNS),
+        set_={
+            "count": ModerationRollup.count + stmt.excluded.count,
+            "score_sum": ModerationRollup.score_sum + stmt.excluded.score_sum,
+        },
+    )
+    db.execute(stmt)
+
+
+def pick_granularity(start: datetime, end: datetime) -> str:
+    span = end - start
+    if span <= timedelta(hours=6):
+        return "minute"
+    if span <= timedelta(days=14):
+        return "hour"
+    return "day"
+
+
+def query_counts(db, group_by, start: datetime, end: datetime, granularity: str = None, items: bool = False):
+    """Sum rollup counts over [start, end) grouped by ``group_by`` columns"""
+    granularity = granularity or pick_granularity(start, end)
+    columns = [getattr(ModerationRollup, c) for c in group_by]
+    query = (
+        select(*columns, func.sum(ModerationRollup.count).label("count"))
+        .where(
+            ModerationRollup.granularity == granularity,
+            ModerationRollup.bucket_start >= bucket_start(start, granularity),
+            ModerationRollup.bucket_start < end,
+            (ModerationRollup.category == ITEM) if items else (ModerationRollup.category != ITEM),
+        )
+        .group_by(*columns)
+    )
+    return db.execute(query).all()
+
+
+def retention_cutoffs(now: datetime = None) -> dict:
+    """Oldest bucket kept per fine granularity; day buckets are kept forever"""
+    now = now or datetime.now(timezone.utc)
+    return {
+        "minute": now - timedelta(days=settings.ROLLUP_MINUTE_RETENTION_DAYS),
+        "hour": now - timedelta(days=settings.ROLLUP_HOUR_RETENTION_DAYS),
+    }
+
+
+def prune_rollups(db, now: datetime = None) -> int:
+    """Drop fine-grained buckets past their retention; day buckets are kept"""
+    deleted = 0
+    for granularity, cutoff in retention_cutoffs(now).items():
+        deleted += db.execute(
+            delete(ModerationRollup).where(
+                ModerationRollup.granularity == granularity,
+                ModerationRollup.bucket_start < cutoff,
+            )
+        ).rowcount
+    return deleted
+
+
+def mark_rolled_up_from(db, first_id: int):
+    """Record that results from ``first_id`` on are rolled up as they are written"""
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(RollupBackfill).values(id=BACKFILL_ROW, until_id=first_id, done_id=0)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={"until_id": stmt.excluded.until_id},
+        where=stmt.excluded.until_id < RollupBackfill.until_id,
+    )
+    db.execute(stmt)
+
+
+def _verdict_key(row) -> tuple:
+    return (row.content_id, row.decision, row.model_version, row.created_at)
+
+
+def _verdicts(rows) -> list[dict]:
+    """Group result rows back into the journal entries ``aggregate`` takes"""
+    entries = {}
+    for row in rows:
+        entry = entries.get(_verdict_key(row))
+        if entry is None:
+            decided = row.created_at
+            if decided is not None and decided.tzinfo is None:
+                decided = decided.replace(tzinfo=timezone.utc)  # SQLite drops the offset
+            entry = entries[_verdict_key(row)] = {
+                "decision": row.decision,
+                "model_version": row.model_version,
+                "source_app": row.source_app,
+                "decided_at": decided,
+                "results": [],
+            }
+        if row.category is not None:
+            entry["results"].append({"label": row.category, "score": row.score or 0.0})
+    return list(entries.values())
+
+
+def backfill_rollups(session_factory=None, chunk_size: int = None) -> int:
+    """
+    Roll up the moderation_result rows written before rollups were kept.
+
+    The result writer records the first result id it rolled up itself;
+    this walks the ids below it in chunks, each upserted together with the
+    ``rollup_backfill`` watermark in one transaction, so it can be stopped
+    and run again at any time without counting a row twice. Returns the
+    number of results rolled up.
+    """
+    session_factory = session_factory or SessionLocal
+    chunk_size = chunk_size or settings.ROLLUP_BACKFILL_CHUNK_SIZE
+    total = 0
+
+    while True:
+        db = session_factory()
+        try:
+            state = db.get(RollupBackfill, BACKFILL_ROW)
+            if state is None:
+                # The writer hasn't rolled anything up yet, so every result is history
+                last = db.scalar(select(func.max(ModerationResult.id)))
+                if last is None:
+                    return total
+                mark_rolled_up_from(db, last + 1)
+                db.commit()
+                continue
+
+            rows = db.execute(
+                select(
+                    ModerationResult.id,
+                    ModerationResult.content_id,
+                    ModerationResult.category,
+                    ModerationResult.score,
+                    ModerationResult.decision,
+                    ModerationResult.model_version,
+                    ModerationResult.created_at,
+                    Content.source_app,
+                )
+                .outerjoin(Content, Content.id == ModerationResult.content_id)
+                .where(ModerationResult.id >= state.done_id, ModerationResult.id < state.until_id)
+                .order_by(ModerationResult.id)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                return total
+            if len(rows) == chunk_size:
+                # Leave a verdict the limit cut through to the next chunk
+                tail = _verdict_key(rows[-1])
+                cut = len(rows)
+                while cut and _verdict_key(rows[cut - 1]) == tail:
+                    cut -= 1
+                rows = rows[:cut] or rows
+
+            cutoffs = retention_cutoffs()
+            upsert_rollups(db, [
+                i for i in aggregate(_verdicts(rows))
+                if i["granularity"] not in cutoffs or i["bucket_start"] >= cutoffs[i["granularity"]]
+            ])
+            state.done_id = rows[-1].id + 1
+            db.commit()
+        finally:
+            db.close()
+
+        total += len(rows)
+        logger.info(f"Rollup backfill rolled up {total} results so far (done below id {rows[-1].id + 1})")
+
+
+if __name__ == "__main__":
+    # One-off after deploying rollups: python -m app.services.rollup_service
+    backfill_rollups()
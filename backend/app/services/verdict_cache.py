@@ -0,0 +1,146 @@
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from app.ai import model_registry
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import verdict_cache_hits_total, verdict_cache_misses_total
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Fold case, width and whitespace so trivially edited reposts share a key"""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return _whitespace.sub(" ", text).strip()
+
+
+def content_hash(text: str = None, image_url: str = None, video_url: str = None) -> str:
+    parts = (
+        normalize_text(text or ""),
+        (image_url or "").strip(),
+        (video_url or "").strip(),
+    )
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe LRU with per-entry TTL"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class VerdictCache:
+    """
+    Two-tier cache of model signals keyed by content hash and model version.
+
+    Entries are the per-modality partials, not decisions, so each source
+    app's policy still decides a cached item.
+
+    The in-process LRU absorbs repeats within a worker; the Redis tier shares
+    them across workers. Redis errors are treated as misses and the tier
+    is skipped for ``REDIS_RETRY_SECONDS`` so an outage never slows moderation.
+    """
+
+    REDIS_RETRY_SECONDS = 30
+
+    def __init__(self, redis_client=None, max_size: int = None, ttl: int = None):
+        self.ttl = ttl or settings.VERDICT_CACHE_TTL_SECONDS
+        self.local = LRUCache(max_size or settings.VERDICT_CACHE_SIZE, self.ttl)
+        self._redis = redis_client
+        self._redis_down_until = 0.0
+        self._model_version = None
+
+    @property
+    def redis(self):
+        if self._redis is None and settings.VERDICT_CACHE_REDIS:
+            import redis
+            self._redis = redis.Redis.from_url(
+                settings.REDIS_URL, socket_timeout=0.05, socket_connect_timeout=0.05
+            )
+        if self._redis_down_until > time.monotonic():
+            return None
+        return self._redis
+
+    def key_for(self, content) -> str:
+        active = model_registry.registry.active
+        if active != self._model_version:
+            # Redis keys embed the version, so only the local tier needs clearing
+            self.local.clear()
+            self._model_version = active
+        digest = content_hash(content.text, content.image_url, content.video_url)
+        # Canary routing is sticky per hash, so this is the version that scores it
+        return f"signals:{model_registry.registry.route(digest)}:{digest}"
+
+    def get(self, key: str):
+        verdict = self.local.get(key)
+        if verdict is not None:
+            verdict_cache_hits_total.labels(tier="local").inc()
+            return verdict
+
+        client = self.redis
+        if client is not None:
+            try:
+                raw = client.get(key)
+            except Exception as e:
+                self._mark_redis_down(e)
+                raw = None
+            if raw is not None:
+                verdict = json.loads(raw)
+                self.local.set(key, verdict)
+                verdict_cache_hits_total.labels(tier="redis").inc()
+                return verdict
+
+        verdict_cache_misses_total.inc()
+        return None
+
+    def set(self, key: str, verdict: dict):
+        self.local.set(key, verdict)
+        client = self.redis
+        if client is not None:
+            try:
+                client.setex(key, self.ttl, json.dumps(verdict))
+            except Exception as e:
+                self._mark_redis_down(e)
+
+    def _mark_redis_down(self, error):
+        logger.warning(f"Verdict cache Redis tier unavailable: {error}")
+        self._redis_down_until = time.monotonic() + self.REDIS_RETRY_SECONDS
+
+
+verdict_cache = VerdictCache()
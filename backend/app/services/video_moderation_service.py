@@ -1,10 +1,119 @@
-from app.ai.vision.video_frames import extract_frames
-from app.ai.vision.nsfw import analyze_image
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
 
-def moderate_video(video_path: str) -> bool:
-    frames = extract_frames(video_path)
-    for frame in frames:
-        if analyze_image(frame):
-            return False
+from app.ai.vision.video_frames import open_video, sample_times
+from app.ai.vision.nsfw import nsfw_score
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import video_frames_scanned, video_frame_buffer_peak_bytes
+from app.services.media_fetcher import is_remote, open_remote_video
 
-    return True
+
+@dataclass
+class VideoScanReport:
+    safe: bool = True
+    blocked_at: float = None
+    score: float = 0.0
+    frames_scanned: int = 0
+    peak_frame_bytes: int = 0
+    suspicious: list[float] = field(default_factory=list)
+
+
+def _scan(source, timestamps, pool, workers, max_side, threshold, report):
+    """
+    Decode frames lazily and score them on ``pool``.
+
+    At most ``2 * workers`` decoded frames are alive at once; decoding stops
+    and queued scoring is cancelled as soon as one frame crosses
+    ``threshold``.
+    """
+    in_flight = {}
+    held_bytes = 0
+    frames = source.frames(timestamps, max_side)
+
+    def settle(done):
+        nonlocal held_bytes
+        for future in done:
+            t, nbytes = in_flight.pop(future)
+            held_bytes -= nbytes
+            score = future.result()
+            report.frames_scanned += 1
+            if score > report.score:
+                report.score = score
+            if score > threshold:
+                report.safe = False
+                report.blocked_at = t if report.blocked_at is None else min(report.blocked_at, t)
+            elif score >= settings.VIDEO_SUSPECT_SCORE:
+                report.suspicious.append(t)
+
+    try:
+        for t, frame in frames:
+            future = pool.submit(nsfw_score, frame)
+            in_flight[future] = (t, frame.nbytes)
+            held_bytes += frame.nbytes
+            report.peak_frame_bytes = max(report.peak_frame_bytes, held_bytes)
+            del frame
+
+            if len(in_flight) >= 2 * workers:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            else:
+                done = [f for f in in_flight if f.done()]
+            settle(done)
+            if not report.safe:
+                break
+
+        while report.safe and in_flight:
+            settle(wait(in_flight, return_when=FIRST_COMPLETED)[0])
+    finally:
+        frames.close()
+        for future in in_flight:
+            future.cancel()
+
+
+def scan_video(
+    video_path: str,
+    interval: float = None,
+    max_side: int = None,
+    workers: int = None,
+    adaptive: bool = None,
+    threshold: float = None,
+) -> VideoScanReport:
+    interval = interval or settings.VIDEO_SAMPLE_INTERVAL_SECONDS
+    max_side = max_side or settings.VIDEO_MAX_SIDE
+    workers = workers or settings.VIDEO_WORKERS
+    adaptive = settings.VIDEO_ADAPTIVE_SAMPLING if adaptive is None else adaptive
+    threshold = settings.NSFW_THRESHOLD if threshold is None else threshold
+    report = VideoScanReport()
+
+    source = open_remote_video(video_path) if is_remote(video_path) else open_video(video_path)
+    with source, ThreadPoolExecutor(workers) as pool:
+        if not adaptive:
+            _scan(source, sample_times(0, source.duration, interval), pool, workers, max_side, threshold, report)
+        else:
+            coarse = settings.VIDEO_COARSE_INTERVAL_SECONDS
+            fine = settings.VIDEO_FINE_INTERVAL_SECONDS
+            scanned = set(sample_times(0, source.duration, coarse))
+            _scan(source, sorted(scanned), pool, workers, max_side, threshold, report)
+
+            if report.safe and report.suspicious:
+                # Refine only the windows around frames that looked borderline
+                refine = sorted({
+                    t
+                    for center in report.suspicious
+                    for t in sample_times(max(0, center - coarse / 2), min(source.duration, center + coarse / 2), fine)
+                } - scanned)
+                _scan(source, refine, pool, workers, max_side, threshold, report)
+
+    video_frames_scanned.observe(report.frames_scanned)
+    video_frame_buffer_peak_bytes.observe(report.peak_frame_bytes)
+    return report
+
+
+def moderate_video(video_path: str, threshold: float = None) -> VideoScanReport:
+    """Scan ``video_path``, stopping at the first frame scoring above ``threshold``"""
+    report = scan_video(video_path, threshold=threshold)
+    logger.info(
+        f"Video scan | safe={report.safe} frames={report.frames_scanned} "
+        f"peak_bytes={report.peak_frame_bytes} blocked_at={report.blocked_at}"
+    )
+    return report
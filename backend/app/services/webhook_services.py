@@ -1,12 +1,248 @@
-import requests
+import asyncio
+import atexit
+import json
 import logging
+import os
+import random
+import threading
+import time
+
+import httpx
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import webhook_deliveries_total, webhook_batch_size
+from app.models.webhook import Webhook, WebhookDeadLetter
 
 logger = logging.getLogger(__name__)
 
+RETRYABLE_STATUS = {408, 425, 429}
+
+
+class CallbackDirectory:
+    """Cached source_app -> callback_url map backed by the webhooks table"""
+
+    def __init__(self, session_factory=None, ttl: int = None):
+        self.session_factory = session_factory or SessionLocal
+        self.ttl = ttl if ttl is not None else settings.WEBHOOK_CALLBACK_TTL_SECONDS
+        self._urls: dict[str, str] = {}
+        self._loaded_at = None
+
+    @property
+    def stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def get(self, source_app: str):
+        return self._urls.get(source_app)
+
+    def refresh(self):
+        db = self.session_factory()
+        try:
+            rows = db.query(Webhook.source_app, Webhook.callback_url).all()
+            self._urls = {source_app: url for source_app, url in rows if url}
+        except Exception as e:
+            # Keep serving the previous map rather than dropping deliveries
+            logger.error(f"Failed to load webhook callbacks: {e}")
+        finally:
+            db.close()
+        self._loaded_at = time.monotonic()
+
+
+class WebhookDispatcher:
+    """
+    Delivers moderation decisions to client callbacks off the moderation path.
+
+    ``submit`` only hands the payload to a background event loop. Payloads for
+    the same callback URL are coalesced into ``{"events": [...]}`` batches of
+    up to ``batch_size``, flushed at least every ``flush_interval_ms``, and
+    posted through one pooled keep-alive client. Failed batches are retried
+    with capped exponential backoff and then written to the dead-letter table.
+    """
+
+    def __init__(
+        self,
+        directory: CallbackDirectory = None,
+        session_factory=None,
+        batch_size: int = None,
+        flush_interval_ms: int = None,
+        max_attempts: int = None,
+        backoff_base: float = None,
+        backoff_max: float = None,
+    ):
+        self.session_factory = session_factory or SessionLocal
+        self.directory = directory or CallbackDirectory(self.session_factory)
+        self.batch_size = batch_size or settings.WEBHOOK_BATCH_SIZE
+        self.flush_interval = (flush_interval_ms or settings.WEBHOOK_FLUSH_INTERVAL_MS) / 1000
+        self.max_attempts = max_attempts or settings.WEBHOOK_MAX_ATTEMPTS
+        self.backoff_base = backoff_base if backoff_base is not None else settings.WEBHOOK_BACKOFF_BASE_SECONDS
+        self.backoff_max = backoff_max if backoff_max is not None else settings.WEBHOOK_BACKOFF_MAX_SECONDS
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._loop = None
+
+    # Caller side (any thread)
+
+    def submit(self, source_app: str, payload: dict):
+        """Queue a decision for the callback registered for ``source_app``"""
+        loop = self._ensure_started()
+        loop.call_soon_threadsafe(self._track, self._route(source_app, None, payload))
+
+    def submit_to_url(self, url: str, payload: dict, source_app: str = None):
+        loop = self._ensure_started()
+        loop.call_soon_threadsafe(self._track, self._route(source_app, url, payload))
+
+    def flush(self, timeout: float = None):
+        """Deliver everything buffered so far and wait for in-flight requests"""
+        if self._loop is None or self._pid != os.getpid():
+            return
+        asyncio.run_coroutine_threadsafe(self._drain(), self._loop).result(timeout)
+
+    def close(self, timeout: float = 10):
+        if self._loop is None or self._pid != os.getpid():
+            return
+        try:
+            self.flush(timeout)
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result(timeout)
+        except Exception as e:
+            logger.error(f"Webhook dispatcher did not drain cleanly: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+        self._pid = None
+
+    def _ensure_started(self):
+        # Each forked worker process needs its own loop thread and client
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    loop = asyncio.new_event_loop()
+                    self._buffers: dict[str, list] = {}
+                    self._timers = {}
+                    self._tasks = set()
+                    self._refreshing = None
+                    self._client = httpx.AsyncClient(
+                        timeout=settings.WEBHOOK_TIMEOUT_SECONDS,
+                        limits=httpx.Limits(
+                            max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+                            max_keepalive_connections=settings.WEBHOOK_MAX_KEEPALIVE,
+                        ),
+                    )
+                    threading.Thread(
+                        target=loop.run_forever,
+                        name="webhook-dispatcher",
+                        daemon=True,
+                    ).start()
+                    self._loop = loop
+                    self._pid = pid
+        return self._loop
+
+    # Event loop side
+
+    def _track(self, coro):
+        task = self._loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _route(self, source_app, url, payload):
+        if url is None:
+            if self.directory.stale:
+                await self._refresh_directory()
+            url = self.directory.get(source_app)
+            if url is None:
+                return
+
+        buffer = self._buffers.setdefault(url, [])
+        buffer.append((source_app, payload))
+        if len(buffer) >= self.batch_size:
+            self._flush_url(url)
+        elif url not in self._timers:
+            self._timers[url] = self._loop.call_later(self.flush_interval, self._flush_url, url)
+
+    async def _refresh_directory(self):
+        # Concurrent routes share one DB round trip
+        if self._refreshing is None:
+            self._refreshing = self._loop.run_in_executor(None, self.directory.refresh)
+        try:
+            await self._refreshing
+        finally:
+            self._refreshing = None
+
+    def _flush_url(self, url):
+        timer = self._timers.pop(url, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._buffers.pop(url, None)
+        if batch:
+            self._track(self._deliver(url, batch))
+
+    async def _drain(self):
+        while self._buffers or self._tasks - {asyncio.current_task()}:
+            for url in list(self._buffers):
+                self._flush_url(url)
+            pending = self._tasks - {asyncio.current_task()}
+            if pending:
+                await asyncio.wait(pending)
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_base * 2 ** (attempt - 1), self.backoff_max)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _deliver(self, url, batch):
+        webhook_batch_size.observe(len(batch))
+        body = {"events": [payload for _, payload in batch]}
+        error = None
+
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = await self._client.post(url, json=body)
+                if response.status_code < 300:
+                    webhook_deliveries_total.labels(outcome="delivered").inc()
+                    logger.info(f"Webhook batch of {len(batch)} sent to {url}")
+                    return
+                error = f"HTTP {response.status_code}"
+                if response.status_code < 500 and response.status_code not in RETRYABLE_STATUS:
+                    break
+            except httpx.HTTPError as e:
+                error = f"{type(e).__name__}: {e}"
+
+            if attempt < self.max_attempts:
+                webhook_deliveries_total.labels(outcome="retried").inc()
+                await asyncio.sleep(self._backoff(attempt))
+
+        webhook_deliveries_total.labels(outcome="dead_lettered").inc()
+        logger.error(f"Webhook to {url} failed after {attempt} attempts: {error}")
+        await self._loop.run_in_executor(None, self._dead_letter, url, batch, error, attempt)
+
+    def _dead_letter(self, url, batch, error, attempts):
+        by_source: dict[str, list] = {}
+        for source_app, payload in batch:
+            by_source.setdefault(source_app, []).append(payload)
+
+        db = self.session_factory()
+        try:
+            db.add_all([
+                WebhookDeadLetter(
+                    source_app=source_app,
+                    callback_url=url,
+                    payload=json.dumps({"events": events}, default=str),
+                    error=error,
+                    attempts=attempts,
+                )
+                for source_app, events in by_source.items()
+            ])
+            db.commit()
+        except Exception as e:
+            logger.error(f"Failed to dead-letter webhook batch for {url}: {e}")
+        finally:
+            db.close()
+
+
+webhook_dispatcher = WebhookDispatcher()
+# Prefork children skip atexit; they close it from worker_process_shutdown
+atexit.register(webhook_dispatcher.close)
+
+
 def send_webhook(url: str, payload: dict):
-    try:
-        response = requests.post(url, json=payload, timeout=5)
-        response.raise_for_status()
-        logger.info(f"Webhook sent successfully to {url}")
-    except Exception as e:
-        logger.error(f"Webhook failed: {e}")
+    """Queue ``payload`` for ``url``; delivery happens on the dispatcher thread"""
+    webhook_dispatcher.submit_to_url(url, payload)
@@ -0,0 +1,12 @@
+from app.core.celery import celery_app
+from app.services.cleanup_service import cleanup_old_content
+from app.services.rollup_service import backfill_rollups
+
+@celery_app.task(bind=True)
+def cleanup_old_content_task(self):
+    return cleanup_old_content()
+
+
+@celery_app.task(bind=True)
+def backfill_rollups_task(self):
+    return backfill_rollups()
@@ -1,6 +1,56 @@
+from celery import chord
+
 from app.core.celery import celery_app
-from app.services.moderation_service import run_moderation
+from app.core.config import settings
+from app.core.queues import priority_for
+from app.services.moderation_service import (
+    run_moderation,
+    run_moderation_batch,
+    run_image_stage,
+    run_video_stage,
+    finalize_verdict,
+)
+
+
+def split_by_modality(content, text_partial):
+    """Score an item's media on the image/video queues and merge the verdicts in a chord"""
+    priority = priority_for(content.source_app)
+    stages = []
+    if content.image_url:
+        stages.append(moderate_image_task.si(content.id).set(priority=priority))
+    if content.video_url:
+        stages.append(moderate_video_task.si(content.id).set(priority=priority))
+    chord(stages)(merge_verdicts_task.s(content.id, text_partial).set(priority=priority))
 
+
+def _defer():
+    # A worker with its own inference pool scores an item's media itself
+    if settings.INFERENCE_POOL_WORKERS:
+        return None
+    return split_by_modality if settings.MODERATION_SPLIT_MODALITIES else None
+
+# Retries keep the task id, which the journal entry ids derive from, so
+# verdicts a failed attempt already journaled are not written twice
 @celery_app.task(bind=True, autoretry_for=(Exception,), retry_backoff=5 , retry_kwargs = {"max_retries": 3})
 def moderate_content_task(self, content_id: int):
-    run_moderation(content_id)
+    run_moderation(content_id, defer=_defer(), task_id=self.request.id)
+
+@celery_app.task(bind=True, autoretry_for=(Exception,), retry_backoff=5 , retry_kwargs = {"max_retries": 3})
+def moderate_content_batch_task(self, content_ids: list[int]):
+    run_moderation_batch(content_ids, defer=_defer(), task_id=self.request.id)
+
+@celery_app.task(bind=True, autoretry_for=(Exception,), retry_backoff=5 , retry_kwargs = {"max_retries": 3})
+def moderate_image_task(self, content_id: int):
+    return run_image_stage(content_id)
+
+# acks_late: a worker lost mid-video hands the task to another worker
+@celery_app.task(bind=True, acks_late=True, autoretry_for=(Exception,), retry_backoff=5 , retry_kwargs = {"max_retries": 3})
+def moderate_video_task(self, content_id: int):
+    return run_video_stage(content_id)
+
+@celery_app.task(bind=True, autoretry_for=(Exception,), retry_backoff=5 , retry_kwargs = {"max_retries": 3})
+def merge_verdicts_task(self, partials: list, content_id: int, text_partial: dict = None):
+    partials = [p for p in partials if p is not None]
+    if text_partial is not None:
+        partials.append(text_partial)
+    finalize_verdict(content_id, partials, task_id=self.request.id)
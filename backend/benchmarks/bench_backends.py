@@ -0,0 +1,91 @@
+"""
+Throughput and latency of the toxicity inference backends.
+
+    python -m benchmarks.bench_backends [--model unitary/toxic-bert] [--batch-size 16]
+
+Scores the parity corpus (tests/fixtures/toxicity_corpus.txt) repeatedly
+with each backend and reports items/sec, p50/p99 batch latency and score
+parity against PyTorch. Without ``--model`` a tiny randomly initialised
+BERT is built locally, so no network is needed; its absolute numbers only
+show relative backend overhead.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from app.ai.backends import ONNX, ONNX_INT8, TORCH, build_backend, compare_backends
+from app.core.config import settings
+
+CORPUS = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "toxicity_corpus.txt"
+
+
+def build_tiny_model(path: Path, texts: list[str]) -> str:
+    import torch
+    import transformers
+
+    words = sorted({w for text in texts for w in text.lower().split()})
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *words]
+    (path / "vocab.txt").write_text("\n".join(vocab) + "\n")
+    config = transformers.BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=128,
+        num_hidden_layers=4,
+        num_attention_heads=4,
+        intermediate_size=512,
+        num_labels=6,
+        problem_type="multi_label_classification",
+    )
+    torch.manual_seed(0)
+    transformers.BertForSequenceClassification(config).save_pretrained(path)
+    transformers.BertTokenizer(str(path / "vocab.txt")).save_pretrained(path)
+    return str(path)
+
+
+def measure(backend, texts: list[str], batch_size: int, items: int) -> dict:
+    backend(texts[:batch_size])  # warm-up
+    timings = []
+    done = 0
+    start = time.perf_counter()
+    while done < items:
+        batch = [texts[(done + i) % len(texts)] for i in range(batch_size)]
+        t0 = time.perf_counter()
+        backend(batch)
+        timings.append(time.perf_counter() - t0)
+        done += batch_size
+    elapsed = time.perf_counter() - start
+    timings.sort()
+    return {
+        "items_per_sec": done / elapsed,
+        "p50_ms": timings[len(timings) // 2] * 1000,
+        "p99_ms": timings[min(int(len(timings) * 0.99), len(timings) - 1)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model", help="Hugging Face model id or local path (default: tiny random BERT)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--backend", choices=[TORCH, ONNX, ONNX_INT8], action="append")
+    args = parser.parse_args()
+
+    texts = CORPUS.read_text().splitlines()
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.ONNX_CACHE_DIR = str(Path(tmp) / "onnx")
+        model = args.model or build_tiny_model(Path(tmp), texts)
+
+        reference = build_backend(model, TORCH, top_k=None)
+        for name in args.backend or [TORCH, ONNX, ONNX_INT8]:
+            backend = reference if name == TORCH else build_backend(model, name, top_k=None)
+            stats = measure(backend, texts, args.batch_size, args.items)
+            parity = compare_backends(reference, backend, texts)
+            print(
+                f"{name:>10}: {stats['items_per_sec']:.0f} items/s  p50={stats['p50_ms']:.2f}ms  "
+                f"p99={stats['p99_ms']:.2f}ms  max_diff={parity['max_abs_diff']:.4f}  "
+                f"top1={parity['top1_agreement']:.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Wall-clock time of a multi-modal item: modalities in turn vs. in the inference pool.
+
+    OMP_NUM_THREADS=1 python -m benchmarks.bench_inference_pool [--items 20] [--text-ms 40] [--image-ms 80] [--video-ms 200]
+
+Each modality is a fixed amount of single-threaded NumPy work, calibrated to
+take the given time on an idle core, standing in for its model (no weights
+needed) and submitted through ``InferencePool`` as ``analyze`` does. Inline
+runs them one after another in this process; the pool (3 spawned
+processes, one thread each) runs them side by side, so with a core per
+modality an item takes about as long as its slowest one. On fewer cores
+the work can only interleave. Pool start-up, which loads the real models
+(or their stubs), is reported separately.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.ai.inference_pool import InferencePool, cores
+
+MODALITIES = ("text", "image", "video")
+
+
+def burn(rounds: int) -> int:
+    a = np.random.default_rng(0).random((64, 64))
+    for _ in range(rounds):
+        a = np.tanh(a @ a)
+    return rounds
+
+
+def rounds_per_ms() -> float:
+    burn(100)
+    start = time.perf_counter()
+    burn(2000)
+    return 2000 / ((time.perf_counter() - start) * 1e3)
+
+
+def item_times(pool: InferencePool, costs: dict, items: int) -> list[float]:
+    timings = []
+    for _ in range(items):
+        start = time.perf_counter()
+        futures = {m: pool.submit(m, burn, costs[m]) for m in MODALITIES}
+        for m, future in futures.items():
+            pool.result(future, m)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(name: str, timings: list[float]):
+    timings = sorted(timings)
+    p50 = timings[len(timings) // 2] * 1e3
+    p99 = timings[min(int(len(timings) * 0.99), len(timings) - 1)] * 1e3
+    print(f"{name:>8}: p50 {p50:7.1f} ms  p99 {p99:7.1f} ms  ({len(timings)} items)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--text-ms", type=float, default=40)
+    parser.add_argument("--image-ms", type=float, default=80)
+    parser.add_argument("--video-ms", type=float, default=200)
+    args = parser.parse_args()
+    costs_ms = {"text": args.text_ms, "image": args.image_ms, "video": args.video_ms}
+    print(
+        f"modality costs {costs_ms} ms, sum {sum(costs_ms.values()):.0f} ms, "
+        f"slowest {max(costs_ms.values()):.0f} ms, {cores()} cores"
+    )
+    rate = rounds_per_ms()
+    costs = {m: int(ms * rate) for m, ms in costs_ms.items()}
+
+    report("inline", item_times(InferencePool(workers=0), costs, args.items))
+
+    pool = InferencePool(workers=len(MODALITIES), threads=1, modules=())
+    start = time.perf_counter()
+    pool.start()
+    print(f"pool start-up {time.perf_counter() - start:.1f}s")
+    try:
+        report("pool", item_times(pool, costs, args.items))
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Accuracy and throughput of language identification against langdetect.
+
+    python -m benchmarks.bench_langid [--repeat 20] [--batch-size 64]
+
+Uses the multilingual fixture (tests/fixtures/langid_corpus.tsv, one
+``language<TAB>text`` per line). Accuracy compares the language family
+(``zh-cn`` counts as ``zh``); the text cache only returns thresholded
+labels, so its accuracy counts "unknown" as wrong. "en routing" shows how many English texts
+reach the English model and how many non-English ones wrongly do at
+LANGID_MIN_CONFIDENCE. langdetect is skipped if it isn't installed.
+"""
+import argparse
+import time
+from pathlib import Path
+
+from app.ai.nlp import language_detect
+from app.ai.nlp.language_detect import LanguageIdentifier
+from app.core.config import settings
+
+CORPUS = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "langid_corpus.tsv"
+
+
+def load_corpus() -> list[tuple[str, str]]:
+    rows = [line.rstrip("\n").split("\t", 1) for line in CORPUS.read_text(encoding="utf-8").splitlines()]
+    return [(lang, text) for lang, text in rows if text]
+
+
+def report(name: str, predict, corpus, repeat: int):
+    """``predict`` returns (language, language used for routing) per text"""
+    labels = [lang for lang, _ in corpus]
+    texts = [text for _, text in corpus]
+
+    predicted = predict(texts)
+    correct = sum(got.split("-")[0] == want for (got, _), want in zip(predicted, labels))
+    english = sum(routed == "en" and want == "en" for (_, routed), want in zip(predicted, labels))
+    wrongly = sum(routed == "en" and want != "en" for (_, routed), want in zip(predicted, labels))
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        predict(texts)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{name:>22}: accuracy {correct / len(corpus):6.1%}  "
+        f"en routing {english}/{labels.count('en')} (+{wrongly} wrong)  "
+        f"{len(texts) * repeat / elapsed:>10,.0f} items/s"
+    )
+
+
+def batched(fn, batch_size: int):
+    def predict(texts):
+        out = []
+        for i in range(0, len(texts), batch_size):
+            out.extend(fn(texts[i:i + batch_size]))
+        return out
+    return predict
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    threshold = settings.LANGID_MIN_CONFIDENCE
+
+    try:
+        import langdetect
+        langdetect.DetectorFactory.seed = 0
+
+        def detect(text):
+            try:
+                lang = langdetect.detect(text)
+            except Exception:
+                lang = "unknown"
+            return lang, lang
+        report("langdetect", lambda texts: [detect(t) for t in texts], corpus, max(args.repeat // 10, 1))
+    except ImportError:
+        print("langdetect not installed, skipping it")
+
+    start = time.perf_counter()
+    model = LanguageIdentifier()
+    print(f"{'n-gram model load':>22}: {time.perf_counter() - start:.2f}s, {model.weights.nbytes / 1e6:.1f} MB weights")
+
+    def identify(texts):
+        return [(lang, lang if conf >= threshold else "unknown") for lang, conf in model.identify(texts)]
+
+    def cold(texts):
+        # Fresh word memo each pass: the cost of text never seen before
+        model._words = {}
+        return identify(texts)
+
+    report("n-gram, cold", batched(cold, args.batch_size), corpus, args.repeat)
+    report("n-gram, word memo", batched(identify, args.batch_size), corpus, args.repeat)
+
+    # The text-hash cache in front of the model, as score_texts uses it
+    language_detect.models._models["langid"] = model
+    cached = batched(language_detect.detect_languages, args.batch_size)
+    report("n-gram, text cache", lambda texts: [(lang, lang) for lang in cached(texts)], corpus, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Startup time and per-process memory of forked workers, lazy vs preloaded.
+
+    python -m benchmarks.bench_model_loading [--workers 4] [--weights-mb 256] [--real]
+
+Forks ``--workers`` children the way Celery's prefork pool does. In
+"lazy" mode each child loads its own models; in "preload" mode the parent
+loads them first and children only warm up. Each child reports its time
+to ready and its RSS, PSS and private memory from /proc/self/smaps_rollup
+(Linux only). A synthetic model of ``--weights-mb`` of float32 weights is
+used unless ``--real`` loads the models in MODEL_PRELOAD.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from app.ai.loader import ModelLoader, models as registered_models, register_all
+
+
+def synthetic_loader(weights_mb: int):
+    loader = ModelLoader()
+
+    def load():
+        rng = np.random.default_rng(0)
+        return rng.standard_normal((weights_mb * 1024 * 256 // 512, 512), dtype=np.float32)
+
+    loader.register("synthetic", load, warmup=lambda weights: weights[:, :8].sum())
+    return loader, ["synthetic"]
+
+
+def memory_kb() -> dict:
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss_mb": fields.get("Rss", 0) / 1024,
+        "pss_mb": fields.get("Pss", 0) / 1024,
+        "private_mb": (fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)) / 1024,
+    }
+
+
+def run(mode: str, loader: ModelLoader, names: list, workers: int) -> list[dict]:
+    if mode == "preload":
+        loader.preload(names)
+        loader.freeze()
+
+    children = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        started = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            loader.forget()
+            loader.warm_up(names)  # loads first when not preloaded
+            report = {"ready_s": time.perf_counter() - started, **memory_kb()}
+            os.write(write_fd, json.dumps(report).encode())
+            os._exit(0)
+        os.close(write_fd)
+        children.append((pid, read_fd))
+
+    reports = []
+    for pid, read_fd in children:
+        with os.fdopen(read_fd) as f:
+            reports.append(json.loads(f.read()))
+        os.waitpid(pid, 0)
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--weights-mb", type=int, default=256)
+    parser.add_argument("--real", action="store_true", help="load the MODEL_PRELOAD models")
+    parser.add_argument("--mode", choices=["lazy", "preload"], action="append")
+    args = parser.parse_args()
+
+    for mode in args.mode or ["lazy", "preload"]:
+        # Each mode runs in its own process so the parent starts empty
+        pid = os.fork()
+        if pid:
+            os.waitpid(pid, 0)
+            continue
+
+        if args.real:
+            register_all()
+            loader, names = registered_models, registered_models.names()
+        else:
+            loader, names = synthetic_loader(args.weights_mb)
+        reports = run(mode, loader, names, args.workers)
+
+        mean = {k: sum(r[k] for r in reports) / len(reports) for k in reports[0]}
+        total_pss = sum(r["pss_mb"] for r in reports)
+        print(
+            f"{mode:>8}: ready={mean['ready_s']:.2f}s  rss={mean['rss_mb']:.0f}MB  "
+            f"pss={mean['pss_mb']:.0f}MB  private={mean['private_mb']:.0f}MB  "
+            f"total_pss={total_pss:.0f}MB  (per child, {args.workers} children)"
+        )
+        os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
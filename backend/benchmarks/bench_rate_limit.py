@@ -0,0 +1,56 @@
+"""
+Per-request overhead of the token-bucket rate limiter.
+
+    python -m benchmarks.bench_rate_limit [--redis redis://localhost:6379/0]
+
+Without ``--redis`` an in-process fakeredis is used, which measures the
+limiter's own cost but not network latency. Compares leasing (the default)
+with a Redis round trip on every request.
+"""
+import argparse
+import statistics
+import time
+
+from app.core.rate_limit import TokenBucketLimiter
+
+# Large enough that every request is allowed; leases then hold 10% of the burst
+TIERS = {"bench": {"rate": 100_000, "burst": 10_000}}
+
+
+def measure(limiter: TokenBucketLimiter, requests: int, keys: int) -> dict:
+    timings = []
+    for i in range(requests):
+        start = time.perf_counter()
+        limiter.acquire(f"bench-{i % keys}", "bench")
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "mean_us": statistics.fmean(timings) * 1e6,
+        "p50_us": timings[len(timings) // 2] * 1e6,
+        "p99_us": timings[int(len(timings) * 0.99)] * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--redis", help="Redis URL (default: in-process fakeredis)")
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--keys", type=int, default=100)
+    args = parser.parse_args()
+
+    if args.redis:
+        import redis
+        client = redis.Redis.from_url(args.redis)
+    else:
+        import fakeredis
+        client = fakeredis.FakeRedis()
+
+    for name, fraction in (("leased", 0.1), ("per-request", 0.0)):
+        client.delete(*(f"ratelimit:bench-{i}" for i in range(args.keys)))
+        limiter = TokenBucketLimiter(redis_client=client, tiers=TIERS, lease_fraction=fraction)
+        stats = measure(limiter, args.requests, args.keys)
+        print(f"{name:>12}: " + "  ".join(f"{k}={v:.1f}" for k, v in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Review queue fetch and claim latency on a multi-million-row content table.
+
+    python -m benchmarks.bench_review_queue [--rows 2000000] [--database-url postgresql://...]
+
+Seeds a fresh content table (2% flagged, 0.5% pending, the rest decided)
+in a temporary SQLite file unless ``--database-url`` names a scratch
+database, whose content table is dropped and recreated. Reports p50/p99
+for the first page, for every page of a full keyset walk, and for claims;
+then drops ``ix_content_review_queue`` and times the first page again to
+show the table scan it replaces. SQLite ignores FOR UPDATE SKIP LOCKED,
+so only Postgres shows contention-free claims; it runs in WAL mode with
+synchronous=NORMAL, otherwise every claim's commit is a disk fsync.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from app.models.content import Content
+from app.services.review_service import claim, list_queue
+
+CHUNK = 50_000
+
+
+def seed(engine, rows: int):
+    Content.__table__.drop(engine, checkfirst=True)
+    Content.__table__.create(engine)
+    rng = random.Random(0)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    statuses = ["flagged"] * 40 + ["pending"] * 10 + ["approved"] * 1600 + ["blocked"] * 350
+    with engine.begin() as conn:
+        for offset in range(0, rows, CHUNK):
+            conn.execute(insert(Content), [
+                {
+                    "external_id": f"bench-{i}",
+                    "text": "benchmark text",
+                    "content_type": "comment",
+                    "source_app": f"app-{i % 50}",
+                    "status": rng.choice(statuses),
+                    "review_priority": rng.randint(0, 9),
+                    "create_at": start + timedelta(seconds=i),
+                }
+                for i in range(offset, min(offset + CHUNK, rows))
+            ])
+
+
+def percentiles(timings: list[float]) -> str:
+    timings = sorted(timings)
+    p50 = timings[len(timings) // 2] * 1e3
+    p99 = timings[min(int(len(timings) * 0.99), len(timings) - 1)] * 1e3
+    return f"p50 {p50:8.3f} ms  p99 {p99:8.3f} ms  ({len(timings)} samples)"
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--samples", type=int, default=500)
+    args = parser.parse_args()
+
+    path = None
+    if args.database_url is None:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+    engine = create_engine(args.database_url or f"sqlite:///{path}")
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def wal(conn, _):
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+    Session = sessionmaker(bind=engine)
+
+    try:
+        start = time.perf_counter()
+        seed(engine, args.rows)
+        print(f"seeded {args.rows:,} rows in {time.perf_counter() - start:.1f}s")
+
+        db = Session()
+        first = [timed(lambda: list_queue(db, limit=args.page_size)) for _ in range(args.samples)]
+        print(f"{'first page':>20}: {percentiles(first)}")
+
+        walk, cursor = [], None
+        while True:
+            begin = time.perf_counter()
+            _, cursor = list_queue(db, limit=args.page_size, cursor=cursor)
+            walk.append(time.perf_counter() - begin)
+            if cursor is None:
+                break
+        print(f"{'keyset walk':>20}: {percentiles(walk)}")
+
+        claims = [timed(lambda i=i: claim(db, f"reviewer-{i}", limit=10)) for i in range(args.samples)]
+        print(f"{'claim 10':>20}: {percentiles(claims)}")
+        db.close()
+
+        with engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_content_review_queue"))
+        db = Session()
+        unindexed = [timed(lambda: list_queue(db, limit=args.page_size)) for _ in range(max(args.samples // 50, 3))]
+        print(f"{'first page, no index':>20}: {percentiles(unindexed)}")
+        db.close()
+    finally:
+        if path is None:
+            Content.__table__.drop(engine, checkfirst=True)
+        engine.dispose()
+        if path is not None:
+            for leftover in (path, f"{path}-wal", f"{path}-shm"):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,460 @@
+"""
+Offline benchmark suite for the moderation pipeline.
+
+    python -m benchmarks.suite [--only pipeline decide_text ...] [--items 2000] [--repeat 3]
+                               [--output results.json] [--baseline baseline.json] [--tolerance 0.1]
+                               [--database-url postgresql://...]
+
+Drives run_moderation, decide_text, mask_email, detect_language,
+extract_frames and analyze_image directly over seeded synthetic corpora.
+The toxicity and NSFW models are replaced by deterministic stubs (scores
+are a hash of the input, NSFW still letterboxes every image) and videos
+by synthetic clips, so no weights, GPU or network are needed and the
+numbers cover everything around inference. Redis is a fakeredis; the
+database is a temporary SQLite file unless ``--database-url`` names a
+scratch database, whose tables are created and dropped.
+
+Every case runs in its own spawned process after one warm-up pass, so
+its peak RSS is its own. Results are JSON with items/sec, p50/p99 per
+call and peak RSS per case. With ``--baseline``, cases whose throughput
+fell or whose p99 rose by more than ``--tolerance`` are listed and the
+exit status is 1.
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+
+CORPUS = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "langid_corpus.tsv"
+
+WORDS = (
+    "the this is really great post thanks for sharing i think you are wrong "
+    "about that lol what did they say in the video yesterday agree totally "
+    "nobody cares honestly best comment here please stop spamming idiot"
+).split()
+
+PII = ["mail me at user{n}@example.com", "call 415-555-{n:04d}", "see https://example.com/p/{n}"]
+
+LABELS = ("toxic", "insult", "threat")
+
+# p99 changes below this are timer jitter on microsecond-scale calls
+P99_FLOOR_MS = 0.005
+
+CASES = {}
+
+
+def case(name: str):
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+# Deterministic corpora and stand-in models
+
+
+def comments(items: int, seed: int = 0, pii_fraction: float = 0.1, foreign_fraction: float = 0.2) -> list[str]:
+    """Distinct comments: mostly English, some from the langid fixture, some with PII"""
+    rng = random.Random(seed)
+    foreign = [text for lang, text in (
+        line.split("\t", 1) for line in CORPUS.read_text(encoding="utf-8").splitlines()
+    ) if lang != "en"]
+    texts = []
+    for n in range(items):
+        if rng.random() < foreign_fraction:
+            text = rng.choice(foreign)
+        else:
+            text = " ".join(rng.choices(WORDS, k=rng.randint(4, 30)))
+        if rng.random() < pii_fraction:
+            text += " " + rng.choice(PII).format(n=n)
+        texts.append(f"{text} #{n}")
+    return texts
+
+
+def unit(data: bytes) -> float:
+    return zlib.crc32(data) / 0xFFFFFFFF
+
+
+def stub_toxicity(texts):
+    """Skewed per-label scores: most texts pass, a few are borderline or toxic"""
+    return [
+        [{"label": label, "score": unit(f"{label}:{text}".encode()) ** 6} for label in LABELS]
+        for text in texts
+    ]
+
+
+def stub_class_scores(images) -> np.ndarray:
+    from app.ai.vision.nsfw import decode_image, letterbox_batch
+    from app.core.config import settings
+
+    batch = letterbox_batch([decode_image(synthetic_image(image)) for image in images], 320)
+    scores = np.zeros((len(images), len(settings.NSFW_LABELS)), dtype=np.float32)
+    for i, tensor in enumerate(batch):
+        sample = tensor[:, ::32, ::32].tobytes()
+        scores[i] = [unit(label.encode() + sample) ** 6 for label in settings.NSFW_LABELS]
+    return scores
+
+
+def image(seed: int, height: int = 480, width: int = 640) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+def synthetic_image(source):
+    """``synthetic://image/<seed>`` URLs become 640x480 noise; anything else is left to decode_image"""
+    if isinstance(source, str) and source.startswith("synthetic://image/"):
+        return image(int(source.rsplit("/", 1)[1]))
+    return source
+
+
+class SyntheticClip:
+    """``synthetic://<seconds>/<seed>``: a noise frame panning one column per 1/30 s"""
+
+    def __init__(self, path: str, height: int = 720, width: int = 1280):
+        seconds, seed = path.removeprefix("synthetic://").split("/")
+        self.duration = float(seconds)
+        self._frame = image(int(seed), height, width)
+
+    def get_frame(self, t: float) -> np.ndarray:
+        return np.roll(self._frame, int(t * 30), axis=1)
+
+    def close(self):
+        pass
+
+
+def synthetic_video(path: str):
+    from app.ai.vision.video_frames import VideoSource
+    return VideoSource(SyntheticClip(path))
+
+
+@contextlib.contextmanager
+def offline(session_factory):
+    """Route the pipeline's singletons to ``session_factory``, fake Redis and the stub models"""
+    import fakeredis
+
+    from app.ai.model_registry import registry
+    from app.ai.nlp import toxicity_multilingual
+    from app.ai.vision import nsfw, video_frames
+    from app.core.config import settings
+    from app.services import moderation_service, video_moderation_service
+    from app.services.policy_service import policy_engine
+    from app.services.prefilter_service import prefilter
+    from app.services.result_writer import ResultWriter
+    from app.services.verdict_cache import VerdictCache
+
+    # No background flusher to outlive the run: the journal is flushed when
+    # it fills (inside the timed call, as in production) and after each pass
+    writer = ResultWriter(
+        redis_client=fakeredis.FakeRedis(), session_factory=session_factory, background_flush=False
+    )
+    with contextlib.ExitStack() as stack:
+        for name, value in (("VERDICT_CACHE_REDIS", False), ("BROADCAST_ENABLED", False), ("WEBHOOKS_ENABLED", False)):
+            stack.enter_context(patch.object(settings, name, value))
+        stack.enter_context(patch.object(moderation_service, "SessionLocal", session_factory))
+        stack.enter_context(patch.object(moderation_service, "result_writer", writer))
+        stack.enter_context(patch.object(moderation_service, "verdict_cache", VerdictCache()))
+        stack.enter_context(patch.object(policy_engine, "session_factory", session_factory))
+        stack.enter_context(patch.object(prefilter, "session_factory", session_factory))
+        stack.enter_context(patch.object(registry, "_redis", fakeredis.FakeRedis()))
+        for batcher in (*registry._batchers.values(), toxicity_multilingual._batcher):
+            stack.enter_context(patch.object(batcher, "predict", stub_toxicity))
+        stack.enter_context(patch.object(nsfw, "class_scores", stub_class_scores))
+        stack.enter_context(patch.object(video_frames, "open_video", synthetic_video))
+        stack.enter_context(patch.object(video_moderation_service, "open_video", synthetic_video))
+        policy_engine.refresh(force=True)
+        prefilter.refresh(force=True)
+        yield writer
+        writer.flush()
+
+
+@contextlib.contextmanager
+def database(url: str = None):
+    """A session factory over fresh tables: a temporary SQLite file, or the scratch database at ``url``"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.core.database import Base
+    import app.models.content, app.models.moderation_result, app.models.policy  # noqa: F401,E401
+    import app.models.prefilter, app.models.review, app.models.rollup, app.models.webhook  # noqa: F401,E401
+
+    path = None
+    if url is None:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+    engine = create_engine(url or f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    try:
+        yield sessionmaker(bind=engine)
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+        if path is not None:
+            os.remove(path)
+
+
+# Cases: each sets up (untimed) and returns ``run(timer)``, one pass over its corpus
+
+
+class Timer:
+    def __init__(self):
+        self.samples = []
+        self.items = 0
+
+    def __call__(self, fn, *args, items: int = 1):
+        start = time.perf_counter()
+        result = fn(*args)
+        self.samples.append(time.perf_counter() - start)
+        self.items += items
+        return result
+
+
+def seed_contents(session_factory, texts, offset: int, media_every: int = 0) -> list[int]:
+    from app.models.content import Content
+
+    db = session_factory()
+    try:
+        contents = [
+            Content(
+                external_id=f"bench-{offset + n}", text=text, content_type="comment",
+                source_app=f"app-{n % 20}",
+                image_url=f"synthetic://image/{n}" if media_every and n % media_every == 0 else None,
+            )
+            for n, text in enumerate(texts)
+        ]
+        db.add_all(contents)
+        db.commit()
+        return [content.id for content in contents]
+    finally:
+        db.close()
+
+
+@case("pipeline")
+def pipeline(args, session_factory):
+    """run_moderation per item: load, prefilter, langid, PII, text model, policy, journal"""
+    from app.services import moderation_service
+    from app.services.moderation_service import run_moderation
+
+    passes = iter(range(1_000))
+
+    def run(timer):
+        # Fresh texts each pass, a tenth repeated to exercise the verdict cache like spam does
+        n = next(passes)
+        texts = comments(args.items, seed=1000 + n)
+        texts += texts[: args.items // 10]
+        ids = seed_contents(session_factory, texts, offset=n * len(texts))
+        for content_id in ids:
+            timer(run_moderation, content_id)
+        moderation_service.result_writer.flush()
+
+    return run
+
+
+@case("pipeline_batch")
+def pipeline_batch(args, session_factory):
+    """run_moderation_batch over chunks of 64, with an image on every tenth item"""
+    from app.services import moderation_service
+    from app.services.moderation_service import run_moderation_batch
+
+    passes = iter(range(1_000))
+
+    def run(timer):
+        n = next(passes)
+        texts = comments(args.items, seed=2000 + n)
+        ids = seed_contents(session_factory, texts, offset=10**6 + n * len(texts), media_every=10)
+        for start in range(0, len(ids), 64):
+            chunk = ids[start:start + 64]
+            timer(run_moderation_batch, chunk, items=len(chunk))
+        moderation_service.result_writer.flush()
+
+    return run
+
+
+@case("decide_text")
+def decide_text(args, session_factory):
+    from app.ai.pipelines.decision_engine import decide_text
+
+    texts = comments(args.items, seed=3)
+    results = stub_toxicity(texts)
+    apps = [f"app-{n % 20}" for n in range(len(texts))]
+
+    def run(timer):
+        for scored, source_app in zip(results, apps):
+            timer(decide_text, scored, "bench", source_app)
+
+    return run
+
+
+@case("mask_email")
+def mask_email(args, session_factory):
+    from app.services.pii_service import mask_email
+
+    texts = comments(args.items, seed=4, pii_fraction=0.3)
+
+    def run(timer):
+        for text in texts:
+            timer(mask_email, text)
+
+    return run
+
+
+@case("detect_language")
+def detect_language(args, session_factory):
+    """Uncached: the identifier's cache is cleared before each pass"""
+    from app.ai.nlp import language_detect
+    from app.ai.nlp.language_detect import detect_language
+
+    texts = comments(args.items, seed=5, foreign_fraction=0.5)
+
+    def run(timer):
+        language_detect._cache.clear()
+        for text in texts:
+            timer(detect_language, text)
+
+    return run
+
+
+@case("extract_frames")
+def extract_frames(args, session_factory):
+    """Frames of 60 s 720p synthetic clips every 2 s; items are frames"""
+    from app.ai.vision.video_frames import extract_frames
+
+    videos = [f"synthetic://60/{n}" for n in range(max(args.items // 200, 3))]
+
+    def run(timer):
+        for path in videos:
+            timer(extract_frames, path, items=30)
+
+    return run
+
+
+@case("analyze_image")
+def analyze_image(args, session_factory):
+    """640x480 RGB arrays through letterboxing and the stub detector"""
+    from app.ai.vision.nsfw import analyze_image
+
+    images = [image(n) for n in range(max(args.items // 20, 10))]
+
+    def run(timer):
+        for array in images:
+            timer(analyze_image, array)
+
+    return run
+
+
+# Running, reporting and comparing
+
+
+def percentile(samples: list[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * q), len(samples) - 1)]
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10  # bytes on macOS, KiB elsewhere
+
+
+def run_case(name: str, options: dict) -> dict:
+    """Warm up once, then time ``repeat`` passes of case ``name``"""
+    args = SimpleNamespace(**options)
+    with database(args.database_url) as session_factory, offline(session_factory):
+        run = CASES[name](args, session_factory)
+        run(Timer())
+        timer = Timer()
+        for _ in range(args.repeat):
+            run(timer)
+
+    return {
+        "items_per_sec": timer.items / sum(timer.samples),
+        "p50_ms": percentile(timer.samples, 0.50) * 1e3,
+        "p99_ms": percentile(timer.samples, 0.99) * 1e3,
+        "peak_rss_mb": peak_rss_mb(),
+        "items": timer.items,
+        "calls": len(timer.samples),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions of ``results`` against ``baseline`` beyond ``tolerance`` (0.1 = 10%)"""
+    regressions = []
+    for name, current in results["cases"].items():
+        before = baseline["cases"].get(name)
+        if before is None:
+            continue
+        if current["items_per_sec"] < before["items_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {current['items_per_sec']:,.0f} items/s, was {before['items_per_sec']:,.0f}"
+            )
+        if current["p99_ms"] > max(before["p99_ms"] * (1 + tolerance), before["p99_ms"] + P99_FLOOR_MS):
+            regressions.append(f"{name}: p99 {current['p99_ms']:.3f} ms, was {before['p99_ms']:.3f}")
+    return regressions
+
+
+def revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--only", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--items", type=int, default=2000, help="corpus size per case")
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes per case")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--output", default=None, help="write the JSON results here")
+    parser.add_argument("--baseline", default=None, help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+
+    options = {"items": args.items, "repeat": args.repeat, "database_url": args.database_url}
+    results = {
+        "meta": {
+            "revision": revision(),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "cpus": os.cpu_count(),
+            **options,
+        },
+        "cases": {},
+    }
+    print(f"{'case':>16} {'items/s':>12} {'p50 ms':>10} {'p99 ms':>10} {'peak RSS MB':>12}")
+    spawn = multiprocessing.get_context("spawn")
+    for name in args.only:
+        with ProcessPoolExecutor(1, mp_context=spawn) as pool:
+            result = results["cases"][name] = pool.submit(run_case, name, options).result()
+        print(
+            f"{name:>16} {result['items_per_sec']:>12,.0f} {result['p50_ms']:>10.3f} "
+            f"{result['p99_ms']:>10.3f} {result['peak_rss_mb']:>12.1f}"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.tolerance:.0%} of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
 import pytest
+import fakeredis
 from unittest.mock import patch, MagicMock
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from fastapi.testclient import TestClient
 
 from app.main import app
-from app.core.database import Base, get_db
+from app.core.database import Base, get_db, get_async_db, get_async_session_factory
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 
@@ -18,6 +20,10 @@ TestingSessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=engine
 )
 
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db")
+
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
 @pytest.fixture(scope="session")
 def db_engine():
     Base.metadata.create_all(bind=engine)
@@ -49,4 +55,24 @@ def client(db):
         mock_celery.task = MagicMock(return_value=lambda f: mock_task)
 
     app.dependency_overrides[get_db] = override_get_db
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_session_factory] = lambda: TestingAsyncSessionLocal
     return TestClient(app)
+
+
+@pytest.fixture
+def result_writer(db_engine, monkeypatch):
+    """Route run_moderation through the test DB and a fake Redis journal"""
+    from app.services import moderation_service
+    from app.services.result_writer import ResultWriter
+
+    writer = ResultWriter(
+        redis_client=fakeredis.FakeRedis(), session_factory=TestingSessionLocal, background_flush=False
+    )
+    monkeypatch.setattr(moderation_service, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(moderation_service, "result_writer", writer)
+    return writer
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+
+from app.models.content import Content
+from app.models.moderation_result import ModerationResult
+from app.models.rollup import ModerationRollup, RollupBackfill
+from app.services.result_writer import ResultWriter
+from app.services.rollup_service import aggregate, backfill_rollups, bucket_start
+from tests.conftest import TestingSessionLocal
+
+
+def test_aggregate_merges_keys():
+    moment = datetime(2026, 5, 4, 13, 37, 21, tzinfo=timezone.utc)
+    entries = [
+        {"decision": "blocked", "model_version": "v1", "source_app": "a",
+         "results": [{"label": "toxic", "score": 0.9}]},
+        {"decision": "blocked", "model_version": "v1", "source_app": "a",
+         "results": [{"label": "toxic", "score": 0.7}]},
+    ]
+
+    increments = {
+        (i["granularity"], i["category"]): (i["count"], round(i["score_sum"], 6))
+        for i in aggregate(entries, moment)
+    }
+
+    assert len(increments) == 6
+    assert increments[("minute", "toxic")] == (2, 1.6)
+    assert increments[("day", "*")] == (2, 0.0)
+    assert bucket_start(moment, "hour") == datetime(2026, 5, 4, 13, tzinfo=timezone.utc)
+
+
+def test_aggregate_buckets_by_decision_time():
+    flushed = datetime(2026, 5, 4, 14, 2, tzinfo=timezone.utc)
+    entries = [
+        {"decision": "approved", "results": [], "decided_at": "2026-05-04T13:59:58+00:00"},
+        {"decision": "approved", "results": []},
+    ]
+
+    buckets = {(i["granularity"], i["bucket_start"]): i["count"] for i in aggregate(entries, flushed)}
+
+    assert buckets[("minute", datetime(2026, 5, 4, 13, 59, tzinfo=timezone.utc))] == 1
+    assert buckets[("minute", datetime(2026, 5, 4, 14, 2, tzinfo=timezone.utc))] == 1
+    assert buckets[("hour", datetime(2026, 5, 4, 13, tzinfo=timezone.utc))] == 1
+    assert buckets[("day", datetime(2026, 5, 4, tzinfo=timezone.utc))] == 2
+
+
+def test_overview_served_from_rollups(client, db):
+    db.query(ModerationRollup).delete()
+    contents = [
+        Content(external_id=f"rollup-{i}", text="x", content_type="comment", source_app="dash")
+        for i in range(3)
+    ]
+    db.add_all(contents)
+    db.commit()
+
+    writer = ResultWriter(redis_client=None, session_factory=TestingSessionLocal)
+    decisions = ["blocked", "approved", "blocked"]
+    for _ in range(2):  # repeated flushes accumulate into the same buckets
+        writer.write([
+            {"content_id": c.id, "source_app": "dash", "decision": d, "model_version": "v1",
+             "results": [{"label": "toxic", "score": 0.9}]}
+            for c, d in zip(contents, decisions)
+        ])
+
+    response = client.get("/api/v1/analytics/overview")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "flagged": 0,
+        "approved": 2,
+        "rejected": 4,
+        "categories": {"toxic": 6},
+    }
+
+    perf = client.get("/api/v1/analytics/model-performance", params={"granularity": "day"}).json()
+    assert {(p["decision"], p["count"]) for p in perf} == {("approved", 2), ("blocked", 4)}
+
+
+def test_backfill_rolls_up_results_written_before_rollups(client, db):
+    db.query(ModerationRollup).delete()
+    db.query(RollupBackfill).delete()
+    db.query(ModerationResult).delete()
+    contents = [
+        Content(external_id=f"history-{i}", text="x", content_type="comment", source_app="dash")
+        for i in range(3)
+    ]
+    db.add_all(contents)
+    db.flush()
+    # As the pre-rollup code wrote them: one row per label, no rollups
+    decided = datetime.now(timezone.utc) - timedelta(hours=1)
+    for c, decision in zip(contents, ["blocked", "approved", "blocked"]):
+        for label in ("toxic", "insult"):
+            db.add(ModerationResult(content_id=c.id, category=label, score=0.5, decision=decision,
+                                    model_version="v1", created_at=decided))
+    db.commit()
+
+    writer = ResultWriter(redis_client=None, session_factory=TestingSessionLocal)
+    writer.write([{"content_id": contents[0].id, "source_app": "dash", "decision": "blocked",
+                   "model_version": "v1", "results": [{"label": "toxic", "score": 0.9}]}])
+    assert client.get("/api/v1/analytics/overview").json()["rejected"] == 1
+
+    # Chunks of 3 would cut the second verdict in half
+    assert backfill_rollups(session_factory=TestingSessionLocal, chunk_size=3) == 6
+    assert backfill_rollups(session_factory=TestingSessionLocal, chunk_size=3) == 0
+
+    assert client.get("/api/v1/analytics/overview").json() == {
+        "flagged": 0,
+        "approved": 1,
+        "rejected": 3,
+        "categories": {"toxic": 4, "insult": 3},
+    }
+    perf = client.get("/api/v1/analytics/model-performance", params={"granularity": "minute"}).json()
+    assert {(p["decision"], p["count"]) for p in perf} == {("approved", 1), ("blocked", 3)}
@@ -0,0 +1,89 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.ai import model_registry
+from app.ai.backends import build_backend, compare_backends, label_scores, sigmoid, softmax
+from app.core.config import settings
+
+CORPUS = Path(__file__).parent / "fixtures" / "toxicity_corpus.txt"
+LABELS = ["toxic", "severe_toxic", "obscene", "threat", "insult", "identity_hate"]
+
+
+def test_label_scores_match_pipeline_shape():
+    scores = softmax(np.array([[1.0, 3.0, 2.0]]))
+
+    top, = label_scores(scores, ["a", "b", "c"], top_k=1)
+    everything, = label_scores(scores, ["a", "b", "c"], top_k=None)
+
+    assert top == [{"label": "b", "score": pytest.approx(0.665, abs=1e-3)}]
+    assert [r["label"] for r in everything] == ["b", "c", "a"]
+    assert sum(r["score"] for r in everything) == pytest.approx(1.0)
+    assert sigmoid(np.array([0.0]))[0] == 0.5
+
+
+def test_compare_backends_reports_gap_and_agreement():
+    def reference(texts):
+        return [[{"label": "toxic", "score": 0.9}, {"label": "insult", "score": 0.1}] for _ in texts]
+
+    def candidate(texts):
+        return [[{"label": "insult", "score": 0.6}, {"label": "toxic", "score": 0.5}], *reference(texts[1:])]
+
+    report = compare_backends(reference, candidate, ["a", "b"])
+
+    assert report["max_abs_diff"] == pytest.approx(0.5)
+    assert report["top1_agreement"] == 0.5
+
+
+def test_backend_is_selected_per_version(monkeypatch):
+    assert model_registry.backend_for(model_registry.TOXICITY_MODEL_V1) == "torch"
+    assert model_registry.backend_for(model_registry.TOXICITY_MODEL_V2) == "onnx-int8"
+
+    monkeypatch.setattr(settings, "TOXICITY_BACKENDS", {model_registry.TOXICITY_MODEL_V2: "torch"})
+    assert model_registry.backend_for(model_registry.TOXICITY_MODEL_V2) == "torch"
+
+    with pytest.raises(ValueError):
+        build_backend("some/model", "tensorrt")
+
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory):
+    """A randomly initialised 2-layer BERT with toxic-bert's label set; no downloads"""
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("onnxruntime")
+    transformers = pytest.importorskip("transformers")
+
+    path = tmp_path_factory.mktemp("tiny-bert")
+    words = sorted({w for line in CORPUS.read_text().split("\n") for w in line.lower().split()})
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *words]
+    (path / "vocab.txt").write_text("\n".join(vocab) + "\n")
+
+    tokenizer = transformers.BertTokenizer(str(path / "vocab.txt"))
+    config = transformers.BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        num_labels=len(LABELS),
+        id2label=dict(enumerate(LABELS)),
+        label2id={label: i for i, label in enumerate(LABELS)},
+        problem_type="multi_label_classification",
+    )
+    torch.manual_seed(0)
+    transformers.BertForSequenceClassification(config).save_pretrained(path)
+    tokenizer.save_pretrained(path)
+    return str(path)
+
+
+@pytest.mark.parametrize("backend,max_diff", [("onnx", 1e-4), ("onnx-int8", 0.05)])
+def test_onnx_matches_pytorch(tiny_model, tmp_path, monkeypatch, backend, max_diff):
+    monkeypatch.setattr(settings, "ONNX_CACHE_DIR", str(tmp_path))
+    texts = CORPUS.read_text().splitlines()
+    reference = build_backend(tiny_model, "torch", top_k=None)
+    candidate = build_backend(tiny_model, backend, top_k=None)
+
+    report = compare_backends(reference, candidate, texts)
+
+    assert report["max_abs_diff"] < max_diff
@@ -0,0 +1,106 @@
+import threading
+import time
+import pytest
+
+from app.ai.batching import MicroBatcher, as_label_list
+
+
+def test_concurrent_calls_share_a_batch():
+    batches = []
+    deadline = time.monotonic() + 5
+
+    def predict(texts):
+        batches.append(list(texts))
+        # Hold the first batch until the other callers have queued up
+        while len(batches) == 1 and len(batches[0]) + batcher._pending < 8 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        return [t.upper() for t in texts]
+
+    batcher = MicroBatcher(predict, name="test", max_batch_size=16, max_wait_ms=200)
+    results = {}
+
+    def call(i):
+        results[i] = batcher(f"text-{i}")
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == {i: f"TEXT-{i}" for i in range(8)}
+    assert len(batches) < 8
+
+
+def test_map_respects_max_batch_size():
+    batches = []
+
+    def predict(texts):
+        batches.append(len(texts))
+        return texts
+
+    batcher = MicroBatcher(predict, name="test", max_batch_size=4, max_wait_ms=50)
+
+    assert batcher.map(list(range(10))) == list(range(10))
+    assert max(batches) <= 4
+    assert sum(batches) == 10
+
+
+def test_lone_caller_does_not_wait():
+    batches = []
+
+    def predict(texts):
+        batches.append(len(texts))
+        return texts
+
+    batcher = MicroBatcher(predict, name="test", max_batch_size=4, max_wait_ms=2000)
+
+    start = time.perf_counter()
+    assert batcher("hello") == "hello"
+    assert batcher.map(list(range(6))) == list(range(6))
+    assert time.perf_counter() - start < 1
+    assert batches == [1, 4, 2]
+
+
+def test_requests_in_flight_do_not_hold_the_next_batch():
+    batches = []
+    release = threading.Event()
+
+    def predict(texts):
+        batches.append(list(texts))
+        release.wait(5)
+        return texts
+
+    batcher = MicroBatcher(predict, name="test", max_batch_size=8, max_wait_ms=2000)
+    first = threading.Thread(target=batcher, args=("first",))
+    first.start()
+    while not batches:
+        time.sleep(0.001)
+
+    # Queued behind the batch in flight, submitted items are counted too
+    futures = [batcher.submit(i) for i in range(2)]
+    assert batcher._pending == 2
+    start = time.perf_counter()
+    release.set()
+    assert [f.result(timeout=5) for f in futures] == [0, 1]
+    first.join()
+
+    # Nobody else is on their way, so the second batch skips the wait
+    assert time.perf_counter() - start < 1
+    assert batches == [["first"], [0, 1]]
+    assert batcher._pending == 0
+
+
+def test_errors_are_raised_to_every_caller():
+    def predict(texts):
+        raise ValueError("model exploded")
+
+    batcher = MicroBatcher(predict, name="test", max_batch_size=4, max_wait_ms=1)
+
+    with pytest.raises(ValueError):
+        batcher("hello")
+
+
+def test_as_label_list():
+    assert as_label_list({"label": "toxic", "score": 0.9}) == [{"label": "toxic", "score": 0.9}]
+    assert as_label_list([{"label": "toxic", "score": 0.9}]) == [{"label": "toxic", "score": 0.9}]
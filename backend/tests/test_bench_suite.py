@@ -0,0 +1,29 @@
+from benchmarks import suite
+
+
+def test_cases_run_offline_and_deterministically():
+    options = {"items": 20, "repeat": 1, "database_url": None}
+    for name in ("pipeline", "extract_frames", "analyze_image"):
+        result = suite.run_case(name, options)
+        assert result["items"] > 0 and result["items_per_sec"] > 0
+        assert result["p50_ms"] <= result["p99_ms"]
+
+    assert suite.comments(50, seed=7) == suite.comments(50, seed=7)
+    assert suite.stub_toxicity(["same text"]) == suite.stub_toxicity(["same text"])
+
+
+def test_compare_flags_throughput_and_p99_regressions():
+    baseline = {"cases": {
+        "fast": {"items_per_sec": 1000, "p99_ms": 2.0},
+        "tiny": {"items_per_sec": 1000, "p99_ms": 0.001},
+        "gone": {"items_per_sec": 1000, "p99_ms": 2.0},
+    }}
+    results = {"cases": {
+        "fast": {"items_per_sec": 850, "p99_ms": 2.5},
+        "tiny": {"items_per_sec": 950, "p99_ms": 0.003},
+        "new": {"items_per_sec": 1, "p99_ms": 100.0},
+    }}
+
+    regressions = suite.compare(results, baseline, tolerance=0.1)
+
+    assert len(regressions) == 2 and all(r.startswith("fast:") for r in regressions)
@@ -0,0 +1,71 @@
+import asyncio
+import json
+import time
+
+import fakeredis
+import fakeredis.aioredis
+
+from app import main
+from app.services.broadcaster import Broadcaster, DecisionPublisher, Subscription
+
+
+def _event(**fields):
+    return json.dumps({"content_id": 1, "source_app": "forum", "decision": "blocked", **fields})
+
+
+def test_dispatch_respects_filters():
+    async def scenario():
+        broadcaster = Broadcaster()
+        everyone = Subscription()
+        forum_blocks = Subscription(source_apps=["forum"], decisions=["blocked"])
+        chat_only = Subscription(source_apps=["chat"])
+        broadcaster.subscriptions |= {everyone, forum_blocks, chat_only}
+
+        assert broadcaster.dispatch(_event()) == 2
+        assert broadcaster.dispatch(_event(decision="approved")) == 1
+        return everyone.queue.qsize(), forum_blocks.queue.qsize(), chat_only.queue.qsize()
+
+    assert asyncio.run(scenario()) == (2, 1, 0)
+
+
+def test_slow_consumer_is_dropped():
+    async def scenario():
+        broadcaster = Broadcaster()
+        slow = Subscription(queue_size=2)
+        fast = Subscription(queue_size=10)
+        broadcaster.subscriptions |= {slow, fast}
+
+        for i in range(4):
+            broadcaster.dispatch(_event(content_id=i))
+        return slow, fast
+
+    slow, fast = asyncio.run(scenario())
+    assert slow.dropped.is_set()
+    assert slow.queue.qsize() == 2
+    assert not fast.dropped.is_set()
+    assert fast.queue.qsize() == 4
+
+
+def test_published_decisions_reach_filtered_sockets(client, monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(main, "broadcaster", Broadcaster(
+        redis_factory=lambda: fakeredis.aioredis.FakeRedis(server=server),
+    ))
+    publisher = DecisionPublisher(redis_client=fakeredis.FakeRedis(server=server))
+
+    with client.websocket_connect("/ws/moderation?decision=blocked") as ws:
+        deadline = time.monotonic() + 5
+        while not publisher.redis.pubsub_numsub(publisher.channel)[0][1]:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+        publisher.publish_many([
+            {"content_id": 1, "source_app": "forum", "decision": "approved", "model_version": "v1"},
+            {"content_id": 2, "source_app": "forum", "decision": "blocked", "model_version": "v1"},
+        ])
+
+        event = json.loads(ws.receive_text())
+
+    assert event["content_id"] == 2
+    assert event["decision"] == "blocked"
+    assert "published_at" in event
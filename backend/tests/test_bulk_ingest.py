@@ -0,0 +1,61 @@
+import json
+from app.models.content import Content
+from app.models.moderation_result import ModerationResult
+from app.services import moderation_service
+from app.workers import moderation_worker
+
+
+def _ndjson(items):
+    return "\n".join(
+        item if isinstance(item, str) else json.dumps(item) for item in items
+    ) + "\n"
+
+
+def test_bulk_endpoint_streams_ids(client, db, monkeypatch):
+    queued = []
+    monkeypatch.setattr(
+        moderation_worker.moderate_content_batch_task,
+        "apply_async",
+        lambda args, priority: queued.append(args[0]),
+    )
+
+    body = _ndjson([
+        {"external_id": "bulk-1", "text": "first", "content_type": "comment", "source_app": "pytest"},
+        "{not json",
+        {"external_id": "bulk-2", "text": "second", "content_type": "comment", "source_app": "pytest"},
+    ])
+
+    response = client.post(
+        "/api/v1/moderation/analyse/bulk",
+        headers={"X-API-KEY": "test-key-123"},
+        content=body,
+    )
+
+    assert response.status_code == 200
+    lines = [json.loads(l) for l in response.text.splitlines()]
+    accepted = [l for l in lines if "id" in l]
+    rejected = [l for l in lines if "error" in l]
+
+    assert [l["external_id"] for l in accepted] == ["bulk-1", "bulk-2"]
+    assert [l["line"] for l in rejected] == [2]
+    assert sum(queued, []) == [l["id"] for l in accepted]
+
+    stored = db.query(Content).filter(Content.id.in_([l["id"] for l in accepted])).all()
+    assert {c.status for c in stored} == {"pending"}
+
+
+def test_run_moderation_batch_updates_status(db, result_writer):
+    contents = [
+        Content(external_id=f"batch-{i}", text=f"hello {i}", content_type="comment", source_app="pytest")
+        for i in range(3)
+    ]
+    db.add_all(contents)
+    db.commit()
+    ids = [c.id for c in contents]
+
+    moderation_service.run_moderation_batch(ids)
+    result_writer.flush()
+
+    db.expire_all()
+    assert {c.status for c in db.query(Content).filter(Content.id.in_(ids))} == {"approved"}
+    assert db.query(ModerationResult).filter(ModerationResult.content_id.in_(ids)).count() == 3
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone
+
+from app.models.content import Content
+from app.models.moderation_result import ModerationResult
+from app.models.review import Review
+from app.services import cleanup_service
+from app.services.cleanup_service import cleanup_old_content
+from tests.conftest import TestingSessionLocal
+
+NOW = datetime(2026, 6, 1, tzinfo=timezone.utc)
+
+
+def _seed(db, prefix, age_days, n):
+    contents = [
+        Content(
+            external_id=f"{prefix}-{i}",
+            text="x",
+            content_type="comment",
+            source_app="retention",
+            create_at=NOW - timedelta(days=age_days),
+        )
+        for i in range(n)
+    ]
+    db.add_all(contents)
+    db.flush()
+    for c in contents:
+        db.add(ModerationResult(content_id=c.id, category="toxic", score=0.1, decision="approved", model_version="v1"))
+        db.add(Review(content_id=c.id, reviewer="admin", decision="approved"))
+    db.commit()
+    return [c.id for c in contents]
+
+
+def test_deletes_expired_rows_in_chunks(db, monkeypatch):
+    pauses = []
+    monkeypatch.setattr(cleanup_service.time, "sleep", pauses.append)
+    old_ids = _seed(db, "old", 120, 5)
+    fresh_ids = _seed(db, "fresh", 10, 2)
+
+    deleted = cleanup_old_content(
+        cutoff=NOW - timedelta(days=90),
+        chunk_size=2,
+        rows_per_second=1,
+        session_factory=TestingSessionLocal,
+    )
+
+    assert deleted == 5
+    db.expire_all()
+    assert db.query(Content).filter(Content.id.in_(old_ids)).count() == 0
+    assert db.query(ModerationResult).filter(ModerationResult.content_id.in_(old_ids)).count() == 0
+    assert db.query(Review).filter(Review.content_id.in_(old_ids)).count() == 0
+    assert db.query(Content).filter(Content.id.in_(fresh_ids)).count() == 2
+    assert db.query(ModerationResult).filter(ModerationResult.content_id.in_(fresh_ids)).count() == 2
+    # 3 chunks of <= 2 rows at 1 row/sec
+    assert len(pauses) == 3
+    assert all(0 < p <= 2 for p in pauses)
+
+
+def test_chunks_resume_within_a_second(db, monkeypatch):
+    # Server-default timestamps have no microseconds, so the rows tie
+    monkeypatch.setattr(cleanup_service.time, "sleep", lambda seconds: None)
+    contents = [
+        Content(external_id=f"tie-{i}", text="x", content_type="comment", source_app="retention-tie")
+        for i in range(5)
+    ]
+    db.add_all(contents)
+    db.commit()
+    ids = [c.id for c in contents]
+    stored = {created for (created,) in db.query(Content.create_at).filter(Content.id.in_(ids))}
+    assert len(stored) <= 2  # at most a second boundary between them
+
+    deleted = cleanup_old_content(
+        cutoff=datetime.now(timezone.utc) + timedelta(minutes=1),
+        chunk_size=2,
+        rows_per_second=1_000_000,
+        session_factory=TestingSessionLocal,
+    )
+
+    assert deleted >= 5
+    db.expire_all()
+    assert db.query(Content).filter(Content.id.in_(ids)).count() == 0
+
+
+def test_chunk_deletes_use_content_id_indexes(db):
+    from sqlalchemy import delete, inspect, text
+
+    indexes = {
+        table: {ix["name"] for ix in inspect(db.get_bind()).get_indexes(table)}
+        for table in ("moderation_result", "review")
+    }
+    assert "ix_moderation_result_content_id" in indexes["moderation_result"]
+    assert "ix_review_content_id" in indexes["review"]
+
+    for model in (ModerationResult, Review):
+        statement = delete(model).where(model.content_id.in_([1, 2]))
+        compiled = statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+        plan = " ".join(str(row[-1]) for row in db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+        assert f"ix_{model.__tablename__}_content_id" in plan
@@ -0,0 +1,24 @@
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from app.core.database import async_url, instrumented_pool, _observe_pool
+
+
+def test_async_url_swaps_driver():
+    assert async_url("postgresql://u:p@db:5432/moderation") == "postgresql+asyncpg://u:p@db:5432/moderation"
+    assert async_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+
+
+def test_pool_checkout_metrics():
+    engine = create_engine(
+        "sqlite://", poolclass=instrumented_pool(QueuePool, "pytest"), pool_size=2, max_overflow=0
+    )
+    _observe_pool(engine, "pytest")
+
+    with engine.connect() as conn:
+        conn.execute(text("select 1"))
+        assert REGISTRY.get_sample_value("db_pool_in_use", {"pool": "pytest"}) == 1
+
+    assert REGISTRY.get_sample_value("db_pool_in_use", {"pool": "pytest"}) == 0
+    assert REGISTRY.get_sample_value("db_pool_checkout_seconds_count", {"pool": "pytest"}) >= 1
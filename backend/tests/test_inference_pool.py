@@ -0,0 +1,50 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.ai.inference_pool import InferencePool
+from app.services import moderation_service
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = InferencePool(workers=3, threads=1)
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+
+def test_modalities_overlap_and_late_ones_fall_back(pool, monkeypatch):
+    monkeypatch.setattr(moderation_service.settings, "INFERENCE_TIMEOUTS", {"text": 5, "image": 5, "video": 0.2})
+    timeouts = REGISTRY.get_sample_value("inference_pool_timeouts_total", {"modality": "video"}) or 0
+
+    start = time.perf_counter()
+    futures = {modality: pool.submit(modality, time.sleep, 0.4) for modality in ("text", "image")}
+    assert [pool.result(f, m, fallback="late") for m, f in futures.items()] == [None, None]
+    assert time.perf_counter() - start < 0.75
+
+    assert pool.result(pool.submit("video", time.sleep, 1.0), "video", fallback="late") == "late"
+    assert REGISTRY.get_sample_value("inference_pool_timeouts_total", {"modality": "video"}) == timeouts + 1
+
+
+def test_analyze_scores_every_modality_in_the_pool(pool, monkeypatch):
+    monkeypatch.setattr(moderation_service, "inference_pool", pool)
+    content = SimpleNamespace(
+        id=7, text="a perfectly ordinary comment", image_url="img.png", video_url="clip.mp4", source_app="pytest"
+    )
+
+    text_scores, signals = moderation_service.analyze([content], [content])
+
+    assert set(text_scores) == {7} and text_scores[7]["model_version"]
+    assert {m: s["modality"] for m, s in signals[7].items()} == {"image": "image", "video": "video"}
+    partials = moderation_service.evaluate(content, text_scores[7], signals[7])
+    assert [p["modality"] for p in partials] == ["text", "image", "video"]
+
+
+def test_inline_without_workers():
+    pool = InferencePool(workers=0)
+    assert pool.result(pool.submit("text", abs, -2), "text") == 2
+    with pytest.raises(ZeroDivisionError):
+        pool.result(pool.submit("text", lambda: 1 / 0), "text")
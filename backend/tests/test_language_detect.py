@@ -0,0 +1,48 @@
+from pathlib import Path
+from unittest.mock import patch
+
+from app.ai.loader import models
+from app.ai.nlp import language_detect
+from app.ai.nlp.language_detect import UNKNOWN, detect_languages
+
+CORPUS = Path(__file__).parent / "fixtures" / "langid_corpus.tsv"
+
+
+def _corpus():
+    return [line.split("\t", 1) for line in CORPUS.read_text(encoding="utf-8").splitlines()]
+
+
+def test_identifies_fixture_sentences():
+    sentences = [(lang, text) for lang, text in _corpus() if len(text.split()) > 4 or lang in ("ja", "ko", "zh")]
+    found = models.get("langid").identify([text for _, text in sentences])
+
+    assert [lang.split("-")[0] for lang, _ in found] == [lang for lang, _ in sentences]
+
+
+def test_only_english_is_routed_as_english():
+    corpus = _corpus()
+    routed = detect_languages([text for _, text in corpus])
+
+    assert all(want == "en" for (want, _), got in zip(corpus, routed) if got == "en")
+    assert sum(got == "en" for got in routed) >= 12
+
+
+def test_ambiguous_short_text_is_unknown():
+    assert detect_languages(["so true", "🔥", "This is clearly an English sentence."]) == [
+        UNKNOWN, UNKNOWN, "en"
+    ]
+
+
+def test_batches_are_deterministic_and_order_independent():
+    texts = [text for _, text in _corpus()]
+    identifier = models.get("langid")
+
+    assert identifier.identify(texts) == identifier.identify(texts)
+    assert identifier.identify(texts[::-1]) == identifier.identify(texts)[::-1]
+
+
+def test_results_are_cached_per_normalized_text():
+    detect_languages(["Is this cached already?"])
+    with patch.object(language_detect.models, "get") as get:
+        assert detect_languages(["is this  CACHED already?"]) == ["en"]
+    get.assert_not_called()
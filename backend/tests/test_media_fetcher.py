@@ -0,0 +1,199 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import media_fetcher as media, moderation_service
+from app.services.media_fetcher import BlobCache, MediaBlocked, MediaFetcher, MediaTooLarge, RemoteFile
+
+VIDEO = bytes(range(256)) * 4096  # 1 MiB
+IMAGE = b"\x89PNG fixture image" * 100
+
+
+class FixtureMedia(BaseHTTPRequestHandler):
+    """
+    Serves fixture bytes by path, honouring single byte ranges; ``/chunked/``
+    omits Content-Length, ``/greedy/`` answers any range with the whole file
+    and ``/redirect/<host>/<path>`` redirects to ``<host>`` on this port
+    """
+
+    files = {
+        "/video.mp4": VIDEO, "/image.png": IMAGE, "/mirror.png": IMAGE,
+        "/chunked/video.mp4": VIDEO, "/greedy/video.mp4": VIDEO,
+    }
+    log = []
+
+    def do_GET(self):
+        if self.path.startswith("/redirect/"):
+            host, path = self.path.removeprefix("/redirect/").split("/", 1)
+            self.log.append((self.path, None, 0))
+            self.send_response(302)
+            self.send_header("Location", f"http://{host}:{self.server.server_port}/{path}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = self.files.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        status, headers = 200, {}
+        requested = self.headers.get("Range")
+        if requested and self.path.startswith("/greedy/"):
+            status, headers = 206, {"Content-Range": f"bytes 0-{len(body) - 1}/{len(body)}"}
+        elif requested:
+            start, end = (int(x) for x in requested.removeprefix("bytes=").split("-"))
+            end = min(end, len(body) - 1)
+            status, headers = 206, {"Content-Range": f"bytes {start}-{end}/{len(body)}"}
+            body = body[start:end + 1]
+        self.log.append((self.path, requested, len(body)))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if self.path.startswith("/chunked/"):
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for start in range(0, len(body), 65536):
+                chunk = body[start:start + 65536]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FixtureMedia)
+    httpd.protocol_version = "HTTP/1.1"
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+@pytest.fixture
+def fetcher(tmp_path, monkeypatch):
+    # The fixture server is on loopback
+    monkeypatch.setattr(media.settings, "MEDIA_ALLOW_PRIVATE_ADDRESSES", True)
+    FixtureMedia.log.clear()
+    fetcher = MediaFetcher(BlobCache(tmp_path / "media", max_bytes=10 * 1024 ** 2))
+    yield fetcher
+    fetcher.close()
+
+
+def test_fetches_once_and_stores_identical_bytes_once(server, fetcher):
+    path = fetcher.fetch(f"{server}/image.png")
+    assert path.read_bytes() == IMAGE
+    assert fetcher.fetch(f"{server}/image.png") == path
+    assert fetcher.fetch(f"{server}/mirror.png") == path
+
+    assert [p for p, _, _ in FixtureMedia.log] == ["/image.png", "/mirror.png"]
+    assert list((fetcher.cache.directory / "tmp").iterdir()) == []
+
+
+def test_size_cap_stops_the_download(server, fetcher, monkeypatch):
+    monkeypatch.setattr(media.settings, "MEDIA_MAX_BYTES", 256 * 1024)
+    for url in (f"{server}/video.mp4", f"{server}/chunked/video.mp4"):
+        with pytest.raises(MediaTooLarge):
+            fetcher.fetch(url)
+        assert fetcher.cache.get(url) is None
+    assert list((fetcher.cache.directory / "tmp").iterdir()) == []
+
+
+def test_remote_file_reads_only_the_blocks_it_needs(server, fetcher):
+    remote = RemoteFile(fetcher, f"{server}/video.mp4", block_size=64 * 1024)
+    remote.seek(600_000)
+    assert remote.read(100_000) == VIDEO[600_000:700_000]
+    remote.seek(-10, 2)
+    assert remote.read() == VIDEO[-10:]
+
+    assert remote.size == len(VIDEO)
+    assert [r for _, r, _ in FixtureMedia.log] == [
+        "bytes=0-0", "bytes=589824-720895", f"bytes={len(VIDEO) - 65536}-{len(VIDEO) - 1}",
+    ]
+    assert remote.fetched == 3 * 64 * 1024
+
+
+def test_range_reads_are_capped_to_the_range(server, fetcher):
+    with pytest.raises(MediaTooLarge):
+        fetcher.fetch_range(f"{server}/greedy/video.mp4", 0, 1023)
+
+
+def test_private_and_unlisted_hosts_are_refused(server, fetcher, monkeypatch):
+    monkeypatch.setattr(media.settings, "MEDIA_ALLOW_PRIVATE_ADDRESSES", False)
+    for url in (f"{server}/image.png", "http://169.254.169.254/latest/meta-data/", "file:///etc/passwd"):
+        with pytest.raises(MediaBlocked):
+            fetcher.fetch(url)
+    assert FixtureMedia.log == []
+
+    # Every redirect hop is checked, not just the URL the client sent
+    monkeypatch.setattr(media.settings, "MEDIA_ALLOW_PRIVATE_ADDRESSES", True)
+    monkeypatch.setattr(media.settings, "MEDIA_ALLOWED_HOSTS", ["127.0.0.1"])
+    assert fetcher.fetch(f"{server}/redirect/127.0.0.1/image.png").read_bytes() == IMAGE
+    with pytest.raises(MediaBlocked):
+        fetcher.fetch(f"{server}/redirect/localhost/mirror.png")
+    assert [p for p, _, _ in FixtureMedia.log] == [
+        "/redirect/127.0.0.1/image.png", "/image.png", "/redirect/localhost/mirror.png",
+    ]
+
+
+def test_least_recently_used_blobs_are_evicted(tmp_path):
+    cache = BlobCache(tmp_path, max_bytes=250)
+    blobs = {}
+    for age, name in enumerate("abc"):
+        temp = cache.tmp / name
+        temp.write_bytes(name.encode() * 100)
+        blobs[name] = cache.put(f"http://x/{name}", temp, name * 64)
+        os.utime(blobs[name], (age, age))
+        if name == "b":
+            cache.get("http://x/a")  # a is now more recent than b
+
+    assert cache.get("http://x/b") is None
+    assert cache.get("http://x/a") == blobs["a"] and cache.get("http://x/c") == blobs["c"]
+    assert len(list((tmp_path / "refs").iterdir())) == 2
+
+
+def test_image_signal_scores_the_fetched_file(server, fetcher, monkeypatch):
+    monkeypatch.setattr(media, "media_fetcher", fetcher)
+    scored = []
+    monkeypatch.setattr(moderation_service, "nsfw_score", lambda image: scored.append(image) or 0.1)
+
+    signal = moderation_service.image_signal(SimpleNamespace(image_url=f"{server}/image.png"))
+    missing = moderation_service.image_signal(SimpleNamespace(image_url=f"{server}/gone.png"))
+
+    assert signal == {"modality": "image", "score": 0.1, "failed": False}
+    assert missing["failed"] and len(scored) == 1
+    assert open(scored[0], "rb").read() == IMAGE
+
+
+def test_remote_videos_are_scanned_from_the_cache(server, fetcher, monkeypatch):
+    from app.services.video_moderation_service import moderate_video
+    monkeypatch.setattr(media, "media_fetcher", fetcher)
+    opened = []
+    monkeypatch.setattr("app.ai.vision.video_frames.open_video", lambda path: opened.append(path) or _empty())
+
+    moderate_video(f"{server}/video.mp4")
+
+    assert opened == [str(fetcher.cache.get(f"{server}/video.mp4"))]
+
+
+def test_small_remote_videos_are_sized_then_fetched_whole(server, fetcher, monkeypatch):
+    from app.ai.vision import video_frames
+    monkeypatch.setattr(media, "media_fetcher", fetcher)
+    monkeypatch.setattr(video_frames, "open_video_stream", lambda remote: pytest.fail("sampled by range"))
+    monkeypatch.setattr(video_frames, "open_video", lambda path: path)
+
+    path = media.open_remote_video(f"{server}/video.mp4")
+
+    assert open(path, "rb").read() == VIDEO
+    assert [(r, size) for _, r, size in FixtureMedia.log] == [("bytes=0-0", 1), (None, len(VIDEO))]
+
+
+def _empty():
+    from app.ai.vision.video_frames import VideoSource
+    return VideoSource(None)
@@ -0,0 +1,131 @@
+import os
+import socket
+import time
+from unittest.mock import MagicMock
+
+import fakeredis
+
+from app.ai import loader
+from app.ai.loader import ModelLoader
+from app.core.config import settings
+
+
+def test_loads_once_and_reports_readiness(monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_PRELOAD", ["fake", "other"])
+    loads, warmups = [], []
+    models = ModelLoader()
+    models.register("fake", lambda: loads.append("fake") or "model", warmup=warmups.append)
+
+    assert models.status() == {"fake": "pending"}
+    models.preload()
+    assert models.get("fake") == "model"
+    assert loads == ["fake"]
+    assert not models.ready
+
+    models.warm_up()
+    assert warmups == ["model"]
+    assert models.ready
+    assert models.status() == {"fake": "ready"}
+
+    models.forget()  # as in a freshly forked child
+    assert not models.ready
+    assert models.get("fake") == "model"
+    assert loads == ["fake"]
+
+
+def test_failed_model_is_not_ready(monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_PRELOAD", ["broken"])
+    models = ModelLoader()
+
+    def fail():
+        raise OSError("weights missing")
+
+    models.register("broken", fail)
+    models.preload()
+    models.warm_up()
+
+    assert not models.ready
+    assert models.status() == {"broken": "error"}
+    assert models.errors["broken"] == "weights missing"
+
+
+def test_heartbeat_publishes_and_withdraws_warm_state(monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_PRELOAD", ["fake"])
+    redis_client = fakeredis.FakeRedis()
+    models = ModelLoader()
+    models.register("fake", lambda: "model")
+
+    models.heartbeat(redis_client)
+    assert loader.worker_warm_state(redis_client) == {
+        f"{socket.gethostname()}:{os.getpid()}": {"ready": False, "models": {"fake": "pending"}},
+    }
+    assert 0 < redis_client.ttl(loader.heartbeat_key()) <= settings.MODEL_HEARTBEAT_TTL_SECONDS
+
+    models.warm_up()
+    models.start_heartbeat(redis_client=redis_client)
+    deadline = time.monotonic() + 5
+    while not all(s["ready"] for s in loader.worker_warm_state(redis_client).values()):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    models.stop_heartbeat()
+    assert loader.worker_warm_state(redis_client) == {}
+
+
+def test_health_exposes_readiness(client, monkeypatch):
+    redis_client = fakeredis.FakeRedis()
+    models = ModelLoader()
+    models.register("fake", lambda: "model")
+    monkeypatch.setattr(settings, "MODEL_PRELOAD", ["fake"])
+    monkeypatch.setattr(settings, "API_MODEL_PRELOAD", [])
+    monkeypatch.setattr("app.main.models", models)
+    monkeypatch.setattr("app.main.redis_client", lambda: redis_client)
+
+    # No worker has reported warm models yet
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json() == {
+        "ready": False, "checks": {"database": "ok", "redis": "ok"}, "models": {}, "workers": {},
+    }
+    assert client.get("/health").json()["ready"] is False
+
+    # A worker child publishes its state once warm
+    worker = ModelLoader()
+    worker.register("fake", lambda: "model")
+    worker.heartbeat(redis_client)
+    assert client.get("/health/ready").status_code == 503
+    worker.warm_up()
+    worker.heartbeat(redis_client)
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert list(response.json()["workers"].values()) == [{"ready": True, "models": {"fake": "ready"}}]
+    assert client.get("/health").json()["ready"] is True
+
+    # Models the API preloads itself gate it too
+    monkeypatch.setattr(settings, "API_MODEL_PRELOAD", ["fake"])
+    assert client.get("/health/ready").status_code == 503
+    assert client.get("/health").json()["models"] == {"fake": "pending"}
+    models.warm_up(["fake"])
+    assert client.get("/health/ready").json()["ready"] is True
+
+    # An expired heartbeat takes the worker out again
+    redis_client.delete(loader.heartbeat_key())
+    assert client.get("/health/ready").status_code == 503
+
+    worker.heartbeat(redis_client)
+    down = MagicMock()
+    down.ping.side_effect = ConnectionError("redis down")
+    down.scan_iter.side_effect = ConnectionError("redis down")
+    monkeypatch.setattr("app.main.redis_client", lambda: down)
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"] == {"database": "ok", "redis": "error"}
+    assert response.json()["workers"] == {}
+
+
+def test_stub_models_register_and_warm_up():
+    loader.register_all()
+    loader.models.preload(["toxicity_v1.1"])
+    loader.models.warm_up(["toxicity_v1.1"])
+
+    assert loader.models.status()["toxicity_v1.1"] == "ready"
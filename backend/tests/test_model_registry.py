@@ -0,0 +1,109 @@
+import time
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+from prometheus_client import REGISTRY
+
+from app.ai import model_registry
+from app.ai.loader import models
+from app.ai.model_registry import ModelRegistry, Routing, registry
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_canary_routing_is_sticky():
+    reg = ModelRegistry(Routing(active="toxicity_v1.1", canary="toxicity_v1.2", canary_percent=10))
+    reg._refreshed_at = float("inf")  # no Redis in this test
+
+    keys = [f"content-{i}" for i in range(2000)]
+    first = [reg.route(k) for k in keys]
+
+    assert first == [reg.route(k) for k in keys]
+    assert 150 < first.count("toxicity_v1.2") < 250
+
+
+def test_published_routing_reaches_other_processes(monkeypatch):
+    monkeypatch.setattr(model_registry.settings, "MODEL_ROUTING_REFRESH_SECONDS", 0)
+    redis = fakeredis.FakeRedis()
+    api = ModelRegistry(Routing(active="toxicity_v1.1"), redis_client=redis)
+    worker = ModelRegistry(Routing(active="toxicity_v1.1"), redis_client=redis)
+
+    api.publish(Routing(active="toxicity_v1.2", canary="toxicity_v1.1", canary_percent=5))
+    worker.refresh()
+
+    assert api.routing.active == "toxicity_v1.2"
+    _wait_for(lambda: worker.routing.active == "toxicity_v1.2")
+    assert worker.routing.canary_percent == 5
+
+    with pytest.raises(ValueError):
+        api.publish(Routing(active="toxicity_v404"))
+    assert api.routing.active == "toxicity_v1.2"
+
+
+def test_shadow_records_disagreement():
+    reg = ModelRegistry(Routing(active="toxicity_v1.1", shadow="shadow-candidate"))
+    reg._refreshed_at = float("inf")
+    reg.register("shadow-candidate", "unused")
+    models.register("shadow-candidate", lambda: lambda texts: [[{"label": "toxic", "score": 0.99}] for _ in texts])
+
+    def sample(outcome):
+        return REGISTRY.get_sample_value(
+            "model_shadow_comparisons_total", {"candidate": "shadow-candidate", "outcome": outcome}
+        ) or 0
+
+    before = sample("disagree"), sample("agree")
+    served = [[{"label": "toxic", "score": 0.1}], [{"label": "toxic", "score": 0.95}]]
+    reg.shadow(["fine", "awful"], served, ["toxicity_v1.1", "toxicity_v1.1"])
+    reg._shadow_pool.shutdown(wait=True)
+
+    assert (sample("disagree"), sample("agree")) == (before[0] + 1, before[1] + 1)
+
+
+def test_routing_endpoint_requires_admin_and_known_versions(client, monkeypatch):
+    from app.ai.loader import models
+    monkeypatch.setattr(registry, "_redis", fakeredis.FakeRedis())
+    monkeypatch.setattr(registry, "routing", registry.routing)
+    loaded = []
+    monkeypatch.setattr(models, "preload", loaded.append)
+    body = {"active": "toxicity_v1.2", "canary": None, "canary_percent": 0}
+
+    assert client.put("/api/v1/models/routing", json=body, headers={"X-API-KEY": "test-key-123"}).status_code == 403
+
+    response = client.put("/api/v1/models/routing", json=body, headers={"X-API-KEY": "admin-key-456"})
+    assert response.status_code == 200
+    assert response.json()["active"] == "toxicity_v1.2"
+    assert loaded == []  # the workers warm it, not the API
+
+    body["active"] = "toxicity_v404"
+    assert client.put("/api/v1/models/routing", json=body, headers={"X-API-KEY": "admin-key-456"}).status_code == 422
+
+
+def test_every_path_routes_an_item_by_its_content_hash(monkeypatch):
+    from app.ai.nlp import toxicity
+    from app.services import moderation_service
+    from app.services.verdict_cache import content_hash, verdict_cache
+
+    reg = ModelRegistry(Routing(active="toxicity_v1.1", canary="toxicity_v1.2", canary_percent=50))
+    reg._refreshed_at = float("inf")  # no Redis in this test
+    monkeypatch.setattr(model_registry, "registry", reg)
+    monkeypatch.setattr(toxicity, "registry", reg)
+    monkeypatch.setattr("app.ai.pipelines.canary_router.registry", reg)
+    monkeypatch.setattr(moderation_service, "detect_languages", lambda texts: ["en"] * len(texts))
+    monkeypatch.setattr(moderation_service.settings, "PII_REDACTION_ENABLED", False)
+
+    texts = [f"Some Comment {i}" for i in range(40)]
+    items = [SimpleNamespace(id=i, text=t, image_url=None, video_url=None) for i, t in enumerate(texts)]
+    # Raw text and content hash disagree for some of these texts
+    assert any(reg.route(t) != reg.route(content_hash(t)) for t in texts)
+
+    scored = moderation_service.score_texts(items)
+    for item in items:
+        version = scored[item.id]["model_version"]
+        assert toxicity.analyze_text(item.text)["model_version"] == version
+        assert verdict_cache.key_for(item).startswith(f"signals:{version}:")
@@ -0,0 +1,81 @@
+import numpy as np
+
+from app.ai.vision import nsfw
+from app.ai.vision.nsfw import BatchedDetector, letterbox_batch, decode_image
+
+
+class FakeSession:
+    """Mimics onnxruntime: output is (N, 4 + classes, anchors)"""
+
+    def __init__(self, classes, batch="batch"):
+        self.classes = classes
+        self.batch = batch
+        self.batches = []
+
+    def get_inputs(self):
+        return [type("Input", (), {"name": "images", "shape": [self.batch, 3, 320, 320]})()]
+
+    def run(self, outputs, feeds):
+        batch = feeds["images"]
+        if isinstance(self.batch, int) and batch.shape[0] != self.batch:
+            raise ValueError(f"Got invalid dimensions for input: images, expected {self.batch}")
+        self.batches.append(batch.shape)
+        out = np.zeros((batch.shape[0], 4 + len(self.classes), 10), dtype=np.float32)
+        # Brightness of the top-left pixel drives the first class' score
+        out[:, 4, 3] = batch[:, 0, 0, 0]
+        return [out]
+
+
+def test_letterbox_pads_and_scales():
+    image = np.full((100, 200, 3), 255, dtype=np.uint8)
+    batch = letterbox_batch([image], 64)
+
+    assert batch.shape == (1, 3, 64, 64)
+    assert batch.dtype == np.float32
+    assert batch[0, :, :32, :].min() == 1.0
+    assert batch[0, :, 32:, :].max() == 0.0
+
+
+def test_decode_grayscale_array():
+    assert decode_image(np.zeros((8, 8), dtype=np.uint8)).shape == (8, 8, 3)
+
+
+def test_batched_detector_stacks_inputs(monkeypatch):
+    monkeypatch.setattr(nsfw.settings, "NSFW_LABELS", ["FEMALE_BREAST_EXPOSED", "NOT_A_CLASS"])
+    monkeypatch.setattr(nsfw.settings, "NSFW_BATCH_SIZE", 4)
+    session = FakeSession(["FEMALE_BREAST_EXPOSED", "FACE_MALE"])
+    detector = BatchedDetector(session, session.classes, input_size=32)
+
+    images = [np.full((40, 40, 3), v, dtype=np.uint8) for v in (255, 0, 255, 0, 255)]
+    scores = detector.class_scores(images)
+
+    assert session.batches == [(4, 3, 32, 32), (1, 3, 32, 32)]
+    assert scores[:, 0].tolist() == [1.0, 0.0, 1.0, 0.0, 1.0]
+    assert scores[:, 1].tolist() == [0.0] * 5
+
+
+def test_batched_detector_feeds_fixed_batch_exports(monkeypatch):
+    monkeypatch.setattr(nsfw.settings, "NSFW_LABELS", ["FEMALE_BREAST_EXPOSED"])
+    monkeypatch.setattr(nsfw.settings, "NSFW_BATCH_SIZE", 4)
+    images = [np.full((40, 40, 3), v, dtype=np.uint8) for v in (255, 0, 255)]
+
+    single = FakeSession(["FEMALE_BREAST_EXPOSED"], batch=1)
+    scores = BatchedDetector(single, single.classes, input_size=32).class_scores(images)
+    assert single.batches == [(1, 3, 32, 32)] * 3
+    assert scores[:, 0].tolist() == [1.0, 0.0, 1.0]
+
+    pairs = FakeSession(["FEMALE_BREAST_EXPOSED"], batch=2)
+    scores = BatchedDetector(pairs, pairs.classes, input_size=32).class_scores(images)
+    assert pairs.batches == [(2, 3, 32, 32)] * 2
+    assert scores[:, 0].tolist() == [1.0, 0.0, 1.0]
+
+
+def test_analyze_images_applies_threshold(monkeypatch):
+    monkeypatch.setattr(nsfw.settings, "NSFW_LABELS", ["A", "B"])
+    monkeypatch.setattr(nsfw.settings, "NSFW_THRESHOLD", 0.5)
+    monkeypatch.setattr(nsfw, "class_scores", lambda images: np.array([[0.1, 0.9], [0.4, 0.2]]))
+
+    results = nsfw.analyze_images([b"img1", b"img2"])
+
+    assert results[0] == {"label": "nsfw", "score": 0.9, "class": "B"}
+    assert results[1] is None
@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.ai.nlp.keywords import KeywordAutomaton
+from app.services import moderation_service
+from app.services.pii_service import PiiEngine, PiiSpan, luhn_valid, mask_email
+
+engine = PiiEngine(keywords=[])
+
+
+def test_redacts_each_kind():
+    text = (
+        "mail bob.smith@example.com or @bobby_s, call +1 415-555-2671, "
+        "pay 4111 1111 1111 1111 via https://pay.example.com/x?a=1. from 192.168.0.10"
+    )
+    assert engine.redact(text) == (
+        "mail [EMAIL] or [HANDLE], call [PHONE], pay [CARD] via [URL]. from [IP]"
+    )
+
+
+def test_spans_index_the_original_text():
+    text = "ping @mod about a@b.io"
+    spans = engine.scan(text)
+
+    assert spans == [PiiSpan("handle", 5, 9), PiiSpan("email", 16, 22)]
+    assert [text[s.start:s.end] for s in spans] == ["@mod", "a@b.io"]
+
+
+def test_card_numbers_must_pass_luhn():
+    assert luhn_valid("4111 1111 1111 1111")
+    assert not luhn_valid("4111 1111 1111 1112")
+    assert engine.redact("order 4111 1111 1111 1112") == "order 4111 1111 1111 1112"
+
+
+def test_leaves_lookalikes_alone():
+    for text in ("version 1.2.3.4.5", "meet at 10:30:00", "score 99.5%", "no pii here"):
+        assert engine.redact(text) == text
+
+
+def test_keywords_are_whole_word_and_case_insensitive():
+    engine = PiiEngine(keywords=["Jane Doe", "corp.internal"])
+
+    assert engine.redact("JANE DOE on corp.internal, not janedoes") == "[KEYWORD] on [KEYWORD], not janedoes"
+
+
+def test_automaton_finds_overlapping_keywords():
+    automaton = KeywordAutomaton(["he", "she", "hers"], whole_words=False)
+
+    assert sorted(automaton.finditer("ushers")) == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+
+
+def test_redact_many_matches_redact():
+    texts = ["a@b.io", "", None, "fine", "call 415-555-2671"]
+
+    assert engine.redact_many(texts) == ["[EMAIL]", "", None, "fine", "call [PHONE]"]
+
+
+def test_mask_email_is_unchanged():
+    assert mask_email("hi a.b@example.org!") == "hi [REDACTED]!"
+
+
+def test_models_never_see_pii():
+    content = SimpleNamespace(id=1, text="email me at a@b.io", image_url=None, video_url=None)
+    with patch.object(moderation_service, "detect_languages", return_value=["en"]), \
+         patch.object(moderation_service, "analyze_texts", return_value={"results": [[]], "model_versions": ["v"]}) as analyze:
+        moderation_service.score_texts([content])
+
+    assert analyze.call_args.args[0] == ["email me at [EMAIL]"]
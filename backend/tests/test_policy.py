@@ -0,0 +1,134 @@
+import json
+
+import fakeredis
+
+from app.api.v1 import policies
+from app.models.content import Content
+from app.models.policy import Policy
+from app.schemas.policy import ModerationPolicy
+from app.services import moderation_service
+from app.services.policy_service import PolicyEngine
+from app.services.verdict_cache import VerdictCache
+from tests.conftest import TestingSessionLocal
+
+ADMIN = {"X-API-KEY": "admin-key-456"}
+
+
+def _text(*scores, label="toxic"):
+    return {"modality": "text", "results": [{"label": label, "score": s} for s in scores], "failed": False}
+
+
+def _media(modality, score):
+    return {"modality": modality, "score": score, "failed": False}
+
+
+def _engine(db, documents):
+    db.query(Policy).delete()
+    db.add_all(Policy(source_app=app, document=json.dumps(doc)) for app, doc in documents.items())
+    db.commit()
+    return PolicyEngine(session_factory=TestingSessionLocal, refresh_seconds=0)
+
+
+def test_default_policy_has_a_review_band(db):
+    engine = _engine(db, {})
+
+    assert engine.decide_many([
+        ("any", [_text(0.9)]),
+        ("any", [_text(0.75, 0.1)]),
+        ("any", [_text(0.5)]),
+        ("any", []),
+    ]) == ["blocked", "flagged", "approved", "approved"]
+
+
+def test_thresholds_are_per_source_app_and_category(db):
+    engine = _engine(db, {
+        "kids": {"text": {"block": 0.5, "review": 0.2}},
+        "forum": {"text": {"categories": {"threat": {"block": 0.3}}}},
+    })
+    items = [(app, [_text(0.4)]) for app in ("kids", "forum", "unknown")]
+    items.append(("forum", [_text(0.4, label="threat")]))
+    items.append(("kids", [_text(0.4, label="threat")]))
+
+    assert engine.decide_many(items) == ["flagged", "approved", "approved", "blocked", "flagged"]
+
+
+def test_signals_combine_across_modalities(db):
+    engine = _engine(db, {
+        "strict": {"image": {"block": 0.5}, "video": {"block": 0.5}},
+        "cautious": {"image": {"block": 0.5}, "video": {"block": 0.5}, "min_block_signals": 2},
+    })
+    one = [_text(0.1), _media("image", 0.6), _media("video", 0.1)]
+    two = [_text(0.1), _media("image", 0.6), _media("video", 0.6)]
+
+    assert engine.decide_many([("strict", one), ("cautious", one), ("cautious", two)]) == [
+        "blocked", "flagged", "blocked"
+    ]
+
+
+def test_failed_signals_are_ignored_and_explicit_decisions_kept(db):
+    engine = _engine(db, {})
+    failed = {**_text(0.99), "failed": True}
+
+    assert engine.decide("any", [failed]) == "approved"
+    assert engine.decide("any", [_text(0.1), {"decision": "blocked", "failed": False}]) == "blocked"
+
+
+def test_policy_changes_apply_without_restart(db):
+    engine = _engine(db, {})
+    assert engine.decide("shop", [_media("image", 0.6)]) == "approved"
+
+    db.add(Policy(source_app="shop", document=json.dumps({"image": {"block": 0.5}})))
+    db.commit()
+    assert engine.decide("shop", [_media("image", 0.6)]) == "blocked"
+
+    row = db.query(Policy).filter(Policy.source_app == "shop").one()
+    row.document, row.version = json.dumps({"image": {"block": 0.9, "review": 0.5}}), 2
+    db.commit()
+    assert engine.decide("shop", [_media("image", 0.6)]) == "flagged"
+    assert engine.block_threshold("shop", "image") == 0.9
+
+
+def test_cached_signals_are_decided_per_source_app(db, monkeypatch, result_writer):
+    monkeypatch.setattr(moderation_service, "policy_engine", _engine(db, {"kids": {"text": {"block": 0.3}}}))
+    monkeypatch.setattr(moderation_service, "verdict_cache", VerdictCache(redis_client=fakeredis.FakeRedis()))
+    monkeypatch.setattr(moderation_service, "detect_languages", lambda texts: ["fr"] * len(texts))
+    monkeypatch.setattr(
+        moderation_service, "analyze_texts_multilingual",
+        lambda texts: [[{"label": "toxic", "score": 0.4}] for _ in texts],
+    )
+    contents = [
+        Content(external_id=f"policy-{app}", text="same borderline text", content_type="comment", source_app=app)
+        for app in ("kids", "forum")
+    ]
+    db.add_all(contents)
+    db.commit()
+
+    verdicts = moderation_service.moderate_contents(contents)
+    assert [verdicts[c.id]["decision"] for c in contents] == ["blocked", "approved"]
+
+    monkeypatch.setattr(moderation_service, "analyze_texts_multilingual", None)
+    verdicts = moderation_service.moderate_contents(contents[::-1])
+    assert [verdicts[c.id]["decision"] for c in contents] == ["blocked", "approved"]
+
+
+def test_policies_endpoint(client, db, monkeypatch):
+    db.query(Policy).delete()
+    db.commit()
+    monkeypatch.setattr(policies, "policy_engine", PolicyEngine(session_factory=TestingSessionLocal))
+    body = {"text": {"block": 0.6, "review": 0.4}, "min_block_signals": 2}
+
+    assert client.put("/api/v1/policies/blog", json=body, headers={"X-API-KEY": "test-key-123"}).status_code == 403
+    assert client.put("/api/v1/policies/blog", json={"text": {"block": 0.4, "review": 0.6}}, headers=ADMIN).status_code == 422
+    created = client.put("/api/v1/policies/blog", json=body, headers=ADMIN).json()
+    assert created["version"] == 1
+    assert created["policy"]["text"]["block"] == 0.6
+    assert client.put("/api/v1/policies/blog", json=body, headers=ADMIN).json()["version"] == 2
+    assert policies.policy_engine.decide("blog", [_text(0.65)]) == "flagged"
+
+    default = client.get("/api/v1/policies/other", headers=ADMIN).json()
+    assert default["version"] == 0
+    assert default["policy"] == ModerationPolicy().model_dump()
+
+    assert client.delete("/api/v1/policies/blog", headers=ADMIN).status_code == 204
+    assert client.get("/api/v1/policies/", headers=ADMIN).json() == []
+    assert policies.policy_engine.decide("blog", [_text(0.65)]) == "approved"
@@ -0,0 +1,120 @@
+from app.models.content import Content
+from app.models.moderation_result import ModerationResult
+from app.models.prefilter import PrefilterEntry
+from app.models.rollup import ModerationRollup
+from app.services import moderation_service
+from app.services.prefilter_service import Prefilter, normalize_entry
+from tests.conftest import TestingSessionLocal
+
+ADMIN = {"X-API-KEY": "admin-key-456"}
+
+
+def _prefilter(db, entries):
+    db.query(PrefilterEntry).delete()
+    db.add_all(PrefilterEntry(list=name, value=normalize_entry(name, value)) for name, value in entries)
+    db.commit()
+    return Prefilter(session_factory=TestingSessionLocal, refresh_seconds=0)
+
+
+def test_obvious_items_are_decided(db):
+    prefilter = _prefilter(db, [
+        ("term_block", "badword"),
+        ("term_allow", "badword detector"),
+        ("domain_block", "spam.example"),
+        ("hash_block", "Buy cheap followers now"),
+    ])
+    prefilter.refresh()
+
+    assert prefilter.check("you BADWORD")[0] == "blocked"
+    assert prefilter.check("the badword detector works") is None
+    assert prefilter.check("go to https://win.spam.example/now")[0] == "blocked"
+    assert prefilter.check("buy cheap  FOLLOWERS now")[1].startswith("hash_block:")
+    assert prefilter.check("🔥🔥🔥 !!") == ("approved", "no_words")
+    assert prefilter.check("ok") == ("approved", "short_text")
+    assert prefilter.check("死ね") is None
+    assert prefilter.check("a perfectly normal comment") is None
+
+
+def test_list_changes_apply_without_restart(db):
+    prefilter = _prefilter(db, [])
+    prefilter.refresh()
+    assert prefilter.check("newslur here") is None
+
+    entry = PrefilterEntry(list="term_block", value="newslur")
+    db.add(entry)
+    db.commit()
+    prefilter.refresh()
+    assert prefilter.check("newslur here") == ("blocked", f"term_block:{entry.id}")
+
+    db.delete(entry)
+    db.commit()
+    prefilter.refresh()
+    assert prefilter.check("newslur here") is None
+
+
+def test_prefiltered_items_skip_the_models(db, monkeypatch, result_writer):
+    monkeypatch.setattr(moderation_service, "prefilter", _prefilter(db, [("term_block", "badword")]))
+    scored = []
+    monkeypatch.setattr(moderation_service, "score_texts", lambda contents: scored.extend(contents) or {})
+
+    contents = [
+        Content(external_id="pre-1", text="total badword", content_type="comment", source_app="pytest"),
+        Content(external_id="pre-2", text="👍", content_type="comment", source_app="pytest"),
+    ]
+    db.add_all(contents)
+    db.commit()
+
+    moderation_service.run_moderation_batch([c.id for c in contents])
+    result_writer.flush()
+
+    db.expire_all()
+    assert scored == []
+    assert [db.get(Content, c.id).status for c in contents] == ["blocked", "approved"]
+    reasons = {
+        r.content_id: r.reason
+        for r in db.query(ModerationResult).filter(ModerationResult.content_id.in_([c.id for c in contents]))
+    }
+    assert reasons[contents[0].id].startswith("term_block:")
+    assert reasons[contents[1].id] == "no_words"
+    # Reasons aren't scores: no category, and nothing in the category rollups
+    rows = db.query(ModerationResult).filter(ModerationResult.content_id.in_([c.id for c in contents])).all()
+    assert {(r.category, r.score) for r in rows} == {(None, None)}
+    assert db.query(ModerationRollup).filter(ModerationRollup.model_version == "prefilter").filter(
+        ModerationRollup.category != "*"
+    ).count() == 0
+
+
+def test_prefilter_approval_does_not_skip_media(db, monkeypatch, result_writer):
+    monkeypatch.setattr(moderation_service, "prefilter", _prefilter(db, []))
+    monkeypatch.setattr(moderation_service, "score_texts", lambda contents: {})
+    images = []
+    monkeypatch.setattr(
+        moderation_service, "image_signal",
+        lambda content: images.append(content.image_url) or {"modality": "image", "score": 0.99, "failed": False},
+    )
+
+    content = Content(external_id="pre-media", text="👍", image_url="https://cdn.example/pre-media.png",
+                      content_type="post", source_app="pytest")
+    db.add(content)
+    db.commit()
+
+    verdicts = moderation_service.moderate_contents([content])
+
+    assert images == ["https://cdn.example/pre-media.png"]
+    assert verdicts[content.id]["decision"] == "blocked"
+    assert "reason" not in verdicts[content.id]
+
+
+def test_entries_endpoint(client, db):
+    db.query(PrefilterEntry).delete()
+    db.commit()
+    body = {"list": "hash_block", "value": "Known spam text"}
+
+    assert client.post("/api/v1/prefilter/entries", json=body, headers={"X-API-KEY": "test-key-123"}).status_code == 403
+    created = client.post("/api/v1/prefilter/entries", json=body, headers=ADMIN)
+    assert created.status_code == 201
+    assert created.json()["value"] == normalize_entry("hash_block", "known spam text")
+    assert client.post("/api/v1/prefilter/entries", json=body, headers=ADMIN).status_code == 409
+
+    assert client.delete(f"/api/v1/prefilter/entries/{created.json()['id']}", headers=ADMIN).status_code == 204
+    assert client.get("/api/v1/prefilter/entries", headers=ADMIN).json() == []
@@ -0,0 +1,123 @@
+from types import SimpleNamespace
+
+import fakeredis
+
+from app.core.celery import celery_app
+from app.core.config import settings
+from app.core.queues import QueueDepthCollector, prefetch_for, priority_for, queue_depths
+from app.models.content import Content
+from app.models.moderation_result import ModerationResult
+from app.services import moderation_service
+from app.workers import moderation_worker
+
+
+def _queue(task_name):
+    return celery_app.amqp.router.route({}, f"app.workers.moderation_worker.{task_name}")["queue"].name
+
+
+def test_tasks_are_routed_per_modality():
+    assert _queue("moderate_content_batch_task") == "moderation.text"
+    assert _queue("merge_verdicts_task") == "moderation.text"
+    assert _queue("moderate_image_task") == "moderation.image"
+    assert _queue("moderate_video_task") == "moderation.video"
+
+
+def test_priority_and_prefetch(monkeypatch):
+    monkeypatch.setattr(settings, "MODERATION_PRIORITIES", {"kids-app": 0})
+
+    assert priority_for("kids-app") == 0
+    assert priority_for("forum") == settings.MODERATION_DEFAULT_PRIORITY
+    assert prefetch_for(["moderation.text", "moderation.video"]) == 1
+    assert prefetch_for(["celery"]) is None
+
+
+def test_queue_depth_sums_priority_lists():
+    redis = fakeredis.FakeRedis()
+    redis.lpush("moderation.text", "a", "b")
+    redis.lpush("moderation.text:7", "c")
+    redis.lpush("moderation.video:3", "d")
+
+    assert queue_depths(redis) == {"moderation.text": 3, "moderation.image": 0, "moderation.video": 1}
+
+    family, = QueueDepthCollector(redis_client=redis).collect()
+    assert {s.labels["queue"]: s.value for s in family.samples}["moderation.text"] == 3
+
+
+def test_media_is_split_into_a_chord(monkeypatch):
+    dispatched = []
+    monkeypatch.setattr(moderation_worker, "chord", lambda header: lambda body: dispatched.append((header, body)))
+    content = SimpleNamespace(id=7, source_app="forum", image_url="http://x/a.png", video_url="http://x/a.mp4")
+    text_partial = {"decision": "approved", "model_version": "v1", "results": [], "failed": False}
+
+    moderation_worker.split_by_modality(content, text_partial)
+
+    (header, body), = dispatched
+    assert [s.task for s in header] == [
+        "app.workers.moderation_worker.moderate_image_task",
+        "app.workers.moderation_worker.moderate_video_task",
+    ]
+    assert body.task == "app.workers.moderation_worker.merge_verdicts_task"
+    assert body.args == (7, text_partial)
+
+
+def test_deferred_media_is_finalized_by_merge(db, monkeypatch, result_writer):
+    deferred = []
+    monkeypatch.setattr(moderation_service, "detect_languages", lambda texts: ["fr"] * len(texts))
+    monkeypatch.setattr(
+        moderation_service, "analyze_texts_multilingual",
+        lambda texts: [[{"label": "toxic", "score": 0.01}] for _ in texts],
+    )
+    text_only = Content(external_id="split-text", text="hello split", content_type="comment", source_app="pytest")
+    with_image = Content(
+        external_id="split-image", text="look split", image_url="http://x/split.png",
+        content_type="post", source_app="pytest",
+    )
+    db.add_all([text_only, with_image])
+    db.commit()
+
+    moderation_service.run_moderation_batch(
+        [text_only.id, with_image.id],
+        defer=lambda content, text_partial: deferred.append((content.id, text_partial)),
+    )
+    result_writer.flush()
+
+    db.expire_all()
+    assert db.get(Content, text_only.id).status == "approved"
+    assert db.get(Content, with_image.id).status == "pending"
+    (content_id, text_partial), = deferred
+    assert content_id == with_image.id
+    assert text_partial["results"] == [{"label": "toxic", "score": 0.01}]
+
+    image_partial = {"modality": "image", "score": 0.99, "failed": False}
+    moderation_worker.merge_verdicts_task.run([image_partial], content_id, text_partial)
+    result_writer.flush()
+
+    db.expire_all()
+    assert db.get(Content, with_image.id).status == "blocked"
+
+
+def test_retried_task_writes_its_verdicts_once(db, monkeypatch, result_writer):
+    monkeypatch.setattr(moderation_service, "detect_languages", lambda texts: ["fr"] * len(texts))
+    monkeypatch.setattr(
+        moderation_service, "analyze_texts_multilingual",
+        lambda texts: [[{"label": "toxic", "score": 0.01}] for _ in texts],
+    )
+    attempts = []
+
+    def notify(content, verdict):
+        attempts.append(content.id)
+        if len(attempts) == 1:
+            raise ConnectionError("webhook store down")  # after the verdict was journaled
+
+    monkeypatch.setattr(moderation_service, "notify", notify)
+    content = Content(external_id="retry-once", text="hello retry", content_type="comment", source_app="pytest")
+    db.add(content)
+    db.commit()
+
+    # Eager retries rerun the task under the same id
+    moderation_worker.moderate_content_batch_task.apply(args=[[content.id]], task_id="retry-task").get()
+    result_writer.flush()
+
+    assert attempts == [content.id, content.id]
+    rows = db.query(ModerationResult).filter(ModerationResult.content_id == content.id).all()
+    assert [(r.category, r.decision) for r in rows] == [("toxic", "approved")]
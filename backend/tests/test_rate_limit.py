@@ -0,0 +1,68 @@
+import fakeredis
+import pytest
+
+from app.core import rate_limit
+from app.core.rate_limit import TokenBucketLimiter
+
+TIERS = {"standard": {"rate": 1, "burst": 10}}
+
+
+class CountingRedis(fakeredis.FakeRedis):
+    calls = 0
+
+    def evalsha(self, *args, **kwargs):
+        # Only completed calls; the very first one also triggers a SCRIPT LOAD
+        result = super().evalsha(*args, **kwargs)
+        CountingRedis.calls += 1
+        return result
+
+
+def test_bucket_is_shared_across_processes():
+    redis = fakeredis.FakeRedis()
+    a = TokenBucketLimiter(redis_client=redis, tiers=TIERS, lease_fraction=0)
+    b = TokenBucketLimiter(redis_client=redis, tiers=TIERS, lease_fraction=0)
+
+    allowed = [lim.acquire("key", "standard").allowed for _ in range(6) for lim in (a, b)]
+
+    assert allowed.count(True) == 10
+    denied = a.acquire("key", "standard")
+    assert not denied.allowed
+    assert 0 < denied.retry_after <= 1
+
+
+def test_local_lease_avoids_round_trips():
+    CountingRedis.calls = 0
+    limiter = TokenBucketLimiter(redis_client=CountingRedis(), tiers=TIERS, lease_fraction=0.5)
+
+    results = [limiter.acquire("key", "standard").allowed for _ in range(12)]
+
+    assert results == [True] * 10 + [False] * 2
+    # two leases of 5, one refusal; the last refusal is answered locally
+    assert CountingRedis.calls == 3
+
+
+def test_unknown_tier_uses_default():
+    limiter = TokenBucketLimiter(redis_client=fakeredis.FakeRedis(), tiers=TIERS, lease_fraction=0)
+
+    assert limiter.acquire("key", "missing").allowed
+
+
+def test_endpoint_returns_429_with_retry_after(client, monkeypatch):
+    monkeypatch.setattr(rate_limit, "rate_limiter", TokenBucketLimiter(
+        redis_client=fakeredis.FakeRedis(),
+        tiers={"standard": {"rate": 0.01, "burst": 1}},
+    ))
+    payload = {
+        "external_id": "limited",
+        "text": "hello",
+        "content_type": "comment",
+        "source_app": "pytest",
+    }
+    monkeypatch.setattr("app.workers.moderation_worker.moderate_content_task.apply_async", lambda *a, **kw: None)
+
+    first = client.post("/api/v1/moderation/analyse", json=payload, headers={"X-API-KEY": "test-key-123"})
+    second = client.post("/api/v1/moderation/analyse", json=payload, headers={"X-API-KEY": "test-key-123"})
+
+    assert first.status_code == 200
+    assert second.status_code == 429
+    assert int(second.headers["Retry-After"]) >= 1
@@ -0,0 +1,139 @@
+import json
+import fakeredis
+from sqlalchemy import func
+
+from app.models.content import Content
+from app.models.moderation_result import ModerationResult
+from app.models.rollup import ModerationRollup
+from app.services.result_writer import ResultWriter
+from tests.conftest import TestingSessionLocal
+
+
+def _contents(db, n, prefix):
+    contents = [
+        Content(external_id=f"{prefix}-{i}", text="x", content_type="comment", source_app="pytest")
+        for i in range(n)
+    ]
+    db.add_all(contents)
+    db.commit()
+    return contents
+
+
+def _entry(content, decision, model_version="v1"):
+    return {
+        "content_id": content.id,
+        "decision": decision,
+        "model_version": model_version,
+        "results": [{"label": "toxic", "score": 0.9}, {"label": "insult", "score": 0.1}],
+    }
+
+
+def test_flush_writes_results_and_statuses(db):
+    redis = fakeredis.FakeRedis()
+    writer = ResultWriter(
+        redis_client=redis, session_factory=TestingSessionLocal, flush_size=100, background_flush=False
+    )
+    contents = _contents(db, 3, "writer")
+
+    writer.record_many([
+        _entry(contents[0], "blocked"),
+        _entry(contents[1], "approved"),
+        _entry(contents[2], "flagged"),
+    ])
+    assert redis.llen(writer.key) == 3
+    assert writer._pid is None  # no background flusher
+
+    assert writer.flush() == 3
+    assert redis.llen(writer.key) == 0
+
+    db.expire_all()
+    assert [db.get(Content, c.id).status for c in contents] == ["blocked", "approved", "flagged"]
+    ids = [c.id for c in contents]
+    assert db.query(ModerationResult).filter(ModerationResult.content_id.in_(ids)).count() == 6
+
+
+def test_failed_write_keeps_journal(db, monkeypatch):
+    redis = fakeredis.FakeRedis()
+    writer = ResultWriter(
+        redis_client=redis, session_factory=TestingSessionLocal, flush_size=100, background_flush=False
+    )
+    contents = _contents(db, 1, "crash")
+    writer.record_many([_entry(contents[0], "blocked")])
+
+    def crash(entries):
+        raise RuntimeError("worker died")
+
+    monkeypatch.setattr(writer, "write", crash)
+    try:
+        writer.flush()
+    except RuntimeError:
+        pass
+
+    assert json.loads(redis.lindex(writer.processing_key, 0))["content_id"] == contents[0].id
+    assert not redis.exists(writer.lease_key)
+
+    monkeypatch.undo()
+    assert writer.flush() == 1
+    db.expire_all()
+    assert db.get(Content, contents[0].id).status == "blocked"
+
+
+def _item_count(db, model_version):
+    return db.query(func.sum(ModerationRollup.count)).filter(
+        ModerationRollup.granularity == "day",
+        ModerationRollup.category == "*",
+        ModerationRollup.model_version == model_version,
+    ).scalar()
+
+
+def test_replayed_entries_are_written_once(db):
+    writer = ResultWriter(redis_client=fakeredis.FakeRedis(), session_factory=TestingSessionLocal)
+    contents = _contents(db, 2, "replay")
+    entries = [dict(_entry(c, "flagged", "replay-v1"), id=f"replay-{c.id}") for c in contents]
+
+    writer.write(entries)
+    writer.write(entries)
+
+    ids = [c.id for c in contents]
+    assert db.query(ModerationResult).filter(ModerationResult.content_id.in_(ids)).count() == 4
+    assert _item_count(db, "replay-v1") == 2
+
+
+def test_flush_that_outlives_its_lease_loses_nothing(db):
+    redis = fakeredis.FakeRedis()
+    journal, slow, other = (
+        ResultWriter(redis_client=redis, session_factory=TestingSessionLocal, flush_size=n, background_flush=False)
+        for n in (100, 2, 2)
+    )
+    contents = _contents(db, 4, "lease")
+    journal.record_many([_entry(c, "approved", "lease-v1") for c in contents])
+
+    write = slow.write
+
+    def stalled(entries):
+        # The lease lapses mid-write and another flusher takes over
+        redis.delete(slow.lease_key)
+        assert other.flush() == 4
+        write(entries)
+
+    slow.write = stalled
+    slow.flush()
+
+    assert redis.llen(slow.key) == redis.llen(slow.processing_key) == 0
+    ids = [c.id for c in contents]
+    assert db.query(ModerationResult).filter(ModerationResult.content_id.in_(ids)).count() == 8
+    assert _item_count(db, "lease-v1") == 4
+
+
+def test_falls_back_to_direct_write_without_redis(db):
+    class DownRedis:
+        def rpush(self, *args):
+            raise ConnectionError("redis down")
+
+    writer = ResultWriter(redis_client=DownRedis(), session_factory=TestingSessionLocal)
+    contents = _contents(db, 1, "direct")
+
+    writer.record_many([_entry(contents[0], "blocked")])
+
+    db.expire_all()
+    assert db.get(Content, contents[0].id).status == "blocked"
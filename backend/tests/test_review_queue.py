@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+
+from app.models.content import Content
+from app.models.review import Review
+from app.services.review_service import claim, list_queue
+from app.services.result_writer import ResultWriter
+from tests.conftest import TestingSessionLocal
+
+ADMIN = {"X-API-KEY": "admin-key-456"}
+NOW = datetime(2026, 6, 1, tzinfo=timezone.utc)
+
+
+def _queue(db, priorities):
+    """Flagged items, one per priority, each a minute younger than the last"""
+    db.query(Content).filter(Content.status == "flagged").update({"status": "approved"})
+    contents = [
+        Content(
+            external_id=f"review-{i}", text=f"borderline {i}", content_type="comment", source_app="review",
+            status="flagged", review_priority=priority, create_at=NOW + timedelta(minutes=i),
+        )
+        for i, priority in enumerate(priorities)
+    ]
+    db.add_all(contents)
+    db.commit()
+    return [c.id for c in contents]
+
+
+def test_pages_follow_priority_then_age(db):
+    ids = _queue(db, [5, 0, 5, 1, 0])
+    order = [ids[1], ids[4], ids[3], ids[0], ids[2]]
+
+    pages, cursor = [], None
+    while True:
+        items, cursor = list_queue(db, limit=2, cursor=cursor)
+        pages.append([c.id for c in items])
+        if cursor is None:
+            break
+
+    assert pages == [order[:2], order[2:4], order[4:]]
+
+
+def test_claims_lease_disjoint_items_until_they_expire(db):
+    ids = _queue(db, [0, 0, 0])
+
+    alice = claim(db, "alice", limit=2, now=NOW)
+    bob = claim(db, "bob", limit=2, now=NOW)
+    assert [c.id for c in alice] == ids[:2]
+    assert [c.id for c in bob] == ids[2:]
+    assert claim(db, "carol", now=NOW) == []
+
+    later = NOW + timedelta(hours=1)
+    assert [c.claimed_by for c in claim(db, "carol", limit=5, now=later)] == ["carol"] * 3
+
+
+def test_result_writer_sets_review_priority(db, monkeypatch):
+    from app.core import queues
+    monkeypatch.setitem(queues.settings.MODERATION_PRIORITIES, "vip", 1)
+    content = Content(external_id="review-writer", text="x", content_type="comment", source_app="vip")
+    db.add(content)
+    db.commit()
+
+    ResultWriter(session_factory=TestingSessionLocal).write([
+        {"content_id": content.id, "source_app": "vip", "decision": "flagged", "model_version": "v1", "results": []}
+    ])
+
+    db.refresh(content)
+    assert (content.status, content.review_priority) == ("flagged", 1)
+
+
+def test_review_endpoints(client, db):
+    ids = _queue(db, [0, 1])
+
+    assert client.get("/api/v1/review/queue", headers={"X-API-KEY": "test-key-123"}).status_code == 403
+    page = client.get("/api/v1/review/queue?limit=1", headers=ADMIN).json()
+    assert [item["id"] for item in page["items"]] == ids[:1]
+    page = client.get(f"/api/v1/review/queue?limit=1&cursor={page['next_cursor']}", headers=ADMIN).json()
+    assert ([item["id"] for item in page["items"]], page["next_cursor"]) == (ids[1:], None)
+    assert client.get("/api/v1/review/queue?cursor=nonsense", headers=ADMIN).status_code == 422
+
+    claimed = client.post("/api/v1/review/claim", json={"reviewer": "alice", "limit": 1}, headers=ADMIN).json()
+    assert [(item["id"], item["claimed_by"]) for item in claimed] == [(ids[0], "alice")]
+
+    decision = {"reviewer": "bob", "decision": "blocked"}
+    assert client.post(f"/api/v1/review/{ids[0]}", json=decision, headers=ADMIN).status_code == 409
+    assert client.post("/api/v1/review/release", json={"reviewer": "alice", "content_ids": [ids[0]]}, headers=ADMIN).json() == {"released": 1}
+    saved = client.post(f"/api/v1/review/{ids[0]}", json=decision, headers=ADMIN)
+    assert saved.status_code == 200
+
+    db.expire_all()
+    content = db.get(Content, ids[0])
+    assert (content.status, content.claimed_by) == ("blocked", None)
+    assert db.get(Review, saved.json()["id"]).reviewer == "bob"
+
+
+def test_pages_resume_within_a_second(db):
+    # Server-default timestamps have no microseconds, so the rows tie
+    db.query(Content).filter(Content.status == "flagged").update({"status": "approved"})
+    contents = [
+        Content(external_id=f"review-tie-{i}", text="x", content_type="comment", source_app="review", status="flagged")
+        for i in range(5)
+    ]
+    db.add_all(contents)
+    db.commit()
+
+    seen, cursor = [], None
+    while True:
+        items, cursor = list_queue(db, limit=2, cursor=cursor)
+        seen += [c.id for c in items]
+        if cursor is None:
+            break
+
+    assert seen == [c.id for c in contents]
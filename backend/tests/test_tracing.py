@@ -0,0 +1,68 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core import tracing
+from app.core.tracing import stage
+from app.models.content import Content
+from app.services import moderation_service
+
+
+def _count(name, modality="none", model_version="none"):
+    return REGISTRY.get_sample_value(
+        "moderation_stage_seconds_count",
+        {"stage": name, "modality": modality, "model_version": model_version},
+    ) or 0
+
+
+def test_stage_observes_its_labels():
+    before = _count("unit", "text", "v9")
+    with stage("unit", modality="text", model_version="v9"):
+        pass
+    with pytest.raises(RuntimeError):
+        with stage("unit", modality="text", model_version="v9"):
+            raise RuntimeError("still timed")
+
+    assert _count("unit", "text", "v9") == before + 2
+
+
+def test_moderation_records_each_stage(db, monkeypatch, result_writer):
+    monkeypatch.setattr(moderation_service, "detect_languages", lambda texts: ["fr"] * len(texts))
+    monkeypatch.setattr(
+        moderation_service, "analyze_texts_multilingual",
+        lambda texts: [[{"label": "toxic", "score": 0.1}] for _ in texts],
+    )
+    content = Content(external_id="traced", text="a traced comment", content_type="comment", source_app="pytest")
+    db.add(content)
+    db.commit()
+    version = moderation_service.MULTILINGUAL_MODEL_VERSION
+    names = [("load",), ("prefilter",), ("langid", "text"), ("text_model", "text", version), ("policy",), ("journal",)]
+    before = {n: _count(*n) for n in names}
+
+    moderation_service.run_moderation(content.id)
+
+    assert all(_count(*n) == before[n] + 1 for n in names)
+
+
+def test_file_exporter_links_celery_tasks_to_the_request(tmp_path, monkeypatch):
+    pytest.importorskip("opentelemetry.sdk")
+    path = tmp_path / "spans.jsonl"
+    monkeypatch.setattr(tracing.settings, "TRACING_FILE", str(path))
+    tracing.configure_tracing("file")
+    try:
+        headers = {}
+        with stage("enqueue"):
+            tracing.inject(headers)
+        token = tracing.attach_from(SimpleNamespace(**headers))
+        with stage("text_model", modality="text", model_version="v1"):
+            pass
+        tracing.detach(token)
+        tracing.flush()
+    finally:
+        tracing.configure_tracing("")
+
+    spans = {s["name"]: s for s in map(json.loads, path.read_text().splitlines())}
+    assert spans["text_model"]["parent_id"] == spans["enqueue"]["context"]["span_id"]
+    assert spans["text_model"]["attributes"] == {"modality": "text", "model_version": "v1"}
@@ -0,0 +1,76 @@
+import fakeredis
+from types import SimpleNamespace
+
+from app.ai import model_registry
+from app.models.content import Content
+from app.services import moderation_service
+from app.services.verdict_cache import VerdictCache, LRUCache, content_hash
+
+
+def _content(text=None, image_url=None, video_url=None):
+    return SimpleNamespace(text=text, image_url=image_url, video_url=video_url)
+
+
+def test_content_hash_normalizes_text():
+    assert content_hash("Buy  NOW\n") == content_hash("buy now")
+    assert content_hash("buy now") != content_hash("buy now", image_url="http://x/a.png")
+
+
+def test_lru_evicts_oldest():
+    cache = LRUCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+
+def test_redis_tier_is_shared():
+    redis = fakeredis.FakeRedis()
+    writer = VerdictCache(redis_client=redis)
+    reader = VerdictCache(redis_client=redis)
+    verdict = {"decision": "blocked", "model_version": "v", "results": []}
+
+    writer.set(writer.key_for(_content("spam")), verdict)
+
+    assert reader.get(reader.key_for(_content("SPAM"))) == verdict
+
+
+def test_model_change_invalidates(monkeypatch):
+    cache = VerdictCache(redis_client=fakeredis.FakeRedis())
+    key = cache.key_for(_content("spam"))
+    cache.set(key, {"decision": "blocked", "model_version": "v", "results": []})
+
+    monkeypatch.setattr(model_registry.registry, "routing", model_registry.Routing(active="toxicity_v9"))
+
+    assert cache.get(cache.key_for(_content("spam"))) is None
+    assert len(cache.local) == 0
+
+
+def test_duplicates_scored_once(db, monkeypatch, result_writer):
+    calls = []
+
+    def fake_multilingual(texts):
+        calls.append(list(texts))
+        return [[{"label": "toxic", "score": 0.99}] for _ in texts]
+
+    monkeypatch.setattr(moderation_service, "verdict_cache", VerdictCache(redis_client=fakeredis.FakeRedis()))
+    monkeypatch.setattr(moderation_service, "detect_languages", lambda texts: ["fr"] * len(texts))
+    monkeypatch.setattr(moderation_service, "analyze_texts_multilingual", fake_multilingual)
+
+    contents = [
+        Content(external_id=f"dup-{i}", text="Same spam  text", content_type="comment", source_app="pytest")
+        for i in range(3)
+    ]
+    db.add_all(contents)
+    db.commit()
+
+    moderation_service.run_moderation_batch([c.id for c in contents[:2]])
+    moderation_service.run_moderation(contents[2].id)
+    result_writer.flush()
+
+    db.expire_all()
+    assert calls == [["Same spam  text"]]
+    assert {db.get(Content, c.id).status for c in contents} == {"blocked"}
@@ -0,0 +1,69 @@
+import threading
+import numpy as np
+
+from app.ai.vision.video_frames import VideoSource, downscale
+from app.services import video_moderation_service
+from app.services.video_moderation_service import scan_video
+
+
+class FakeClip:
+    def __init__(self, duration, scores):
+        self.duration = duration
+        self.scores = scores
+        self.decoded = []
+
+    def get_frame(self, t):
+        self.decoded.append(t)
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        frame[0, 0, 0] = int(self.scores.get(t, 0.0) * 100)
+        return frame
+
+    def close(self):
+        pass
+
+
+def _install(monkeypatch, clip):
+    monkeypatch.setattr(video_moderation_service, "open_video", lambda path: VideoSource(clip))
+    monkeypatch.setattr(video_moderation_service, "nsfw_score", lambda frame: frame[0, 0, 0] / 100)
+
+
+def test_downscale_bounds_longest_side():
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    assert downscale(frame, 320).shape == (180, 320, 3)
+    assert downscale(frame, 2000) is frame
+
+
+def test_safe_video_scans_every_sample(monkeypatch):
+    clip = FakeClip(duration=20, scores={})
+    _install(monkeypatch, clip)
+
+    report = scan_video("video.mp4", interval=2, max_side=320, workers=2, adaptive=False)
+
+    assert report.safe
+    assert report.frames_scanned == 10
+    assert report.peak_frame_bytes <= 4 * 180 * 320 * 3
+
+
+def test_stops_decoding_after_blocked_frame(monkeypatch):
+    clip = FakeClip(duration=600, scores={4: 0.95})
+    _install(monkeypatch, clip)
+
+    report = scan_video("video.mp4", interval=2, max_side=320, workers=2, adaptive=False)
+
+    assert not report.safe
+    assert report.blocked_at == 4
+    assert len(clip.decoded) < 20
+
+
+def test_adaptive_refines_around_suspicious_frames(monkeypatch):
+    monkeypatch.setattr(video_moderation_service.settings, "VIDEO_COARSE_INTERVAL_SECONDS", 8.0)
+    monkeypatch.setattr(video_moderation_service.settings, "VIDEO_FINE_INTERVAL_SECONDS", 1.0)
+    clip = FakeClip(duration=64, scores={16: 0.5, 17: 0.9})
+    _install(monkeypatch, clip)
+
+    report = scan_video("video.mp4", max_side=320, workers=2, adaptive=True)
+
+    assert not report.safe
+    assert report.blocked_at == 17
+    assert 17 in clip.decoded
+    assert 41 not in clip.decoded
@@ -0,0 +1,114 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.models.webhook import Webhook, WebhookDeadLetter
+from app.services.webhook_services import CallbackDirectory, WebhookDispatcher
+from tests.conftest import TestingSessionLocal
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        server.requests.append((self.path, body))
+        status = server.statuses.pop(0) if server.statuses else 200
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.requests = []
+    server.statuses = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def dispatcher(db_engine):
+    dispatcher = WebhookDispatcher(
+        session_factory=TestingSessionLocal,
+        flush_interval_ms=50,
+        max_attempts=3,
+        backoff_base=0.01,
+    )
+    yield dispatcher
+    dispatcher.close()
+
+
+def test_decisions_are_coalesced_per_endpoint(stub_server, dispatcher, db):
+    url = f"http://127.0.0.1:{stub_server.server_port}/hooks/a"
+    db.add(Webhook(source_app="coalesce-app", callback_url=url))
+    db.commit()
+
+    for i in range(5):
+        dispatcher.submit("coalesce-app", {"content_id": i, "decision": "approved"})
+    dispatcher.submit("unknown-app", {"content_id": 99, "decision": "approved"})
+    dispatcher.flush(timeout=5)
+
+    events = [e for path, body in stub_server.requests for e in body["events"]]
+    assert sorted(e["content_id"] for e in events) == list(range(5))
+    assert len(stub_server.requests) < 5
+
+
+def test_retries_then_succeeds(stub_server, dispatcher):
+    stub_server.statuses = [503, 503]
+    url = f"http://127.0.0.1:{stub_server.server_port}/hooks/retry"
+
+    dispatcher.submit_to_url(url, {"content_id": 1})
+    dispatcher.flush(timeout=5)
+
+    assert len(stub_server.requests) == 3
+
+
+def test_exhausted_retries_are_dead_lettered(stub_server, dispatcher, db):
+    stub_server.statuses = [500, 500, 500]
+    url = f"http://127.0.0.1:{stub_server.server_port}/hooks/dead"
+
+    dispatcher.submit_to_url(url, {"content_id": 7}, source_app="dead-app")
+    dispatcher.flush(timeout=5)
+
+    letter = db.query(WebhookDeadLetter).filter_by(source_app="dead-app").one()
+    assert letter.attempts == 3
+    assert letter.error == "HTTP 500"
+    assert json.loads(letter.payload) == {"events": [{"content_id": 7}]}
+
+
+def test_directory_caches_until_stale(db):
+    db.add(Webhook(source_app="cached-app", callback_url="http://example.test/a"))
+    db.commit()
+    directory = CallbackDirectory(TestingSessionLocal, ttl=3600)
+
+    assert directory.stale
+    directory.refresh()
+    db.query(Webhook).filter_by(source_app="cached-app").update({"callback_url": "http://example.test/b"})
+    db.commit()
+
+    assert not directory.stale
+    assert directory.get("cached-app") == "http://example.test/a"
+
+
+def test_worker_shutdown_delivers_buffered_decisions(stub_server, db_engine, monkeypatch):
+    from app.core import celery
+    from app.services import webhook_services
+
+    # Long enough that only the shutdown flush can send the batch
+    dispatcher = WebhookDispatcher(session_factory=TestingSessionLocal, flush_interval_ms=60_000)
+    monkeypatch.setattr(webhook_services, "webhook_dispatcher", dispatcher)
+    url = f"http://127.0.0.1:{stub_server.server_port}/hooks/shutdown"
+
+    dispatcher.submit_to_url(url, {"content_id": 3})
+    celery.close_webhook_dispatcher()
+
+    assert [e["content_id"] for _, body in stub_server.requests for e in body["events"]] == [3]